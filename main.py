@@ -1,11 +1,17 @@
+import os
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from src.api.v1.routes import api_router
 from src.core.config import Settings, settings
 from src.database.session import init_db
+from src.utils.email_utils import start_mail_worker, stop_mail_worker
+from src.utils.media import shutdown_media_pool
+from src.utils.notifications import recover_jobs
+from src.utils.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
 
 
 class App:
@@ -29,15 +35,28 @@ class App:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
         )
 
     def __setup_routes(self, router: APIRouter, settings: Settings):
         self.__app.include_router(router, prefix=settings.API_V1_STR)
+        if settings.STORAGE_BACKEND == "local":
+            os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+            self.__app.mount(
+                settings.MEDIA_URL,
+                StaticFiles(directory=settings.MEDIA_ROOT),
+                name="media",
+            )
 
     @asynccontextmanager
     async def lifespan(self, app: FastAPI):
         init_db()
+        # Notification jobs left by a dead process are resumed once their
+        # lease runs out.
+        start_mail_worker(on_idle=recover_jobs)
         yield
+        stop_mail_worker()
+        shutdown_media_pool()
 
     def __call__(self):
         return self.__app
@@ -1,11 +1,14 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Callable, Generator, Iterator, Optional
 
 from fastapi import Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.core.authentication import from_token
-from src.database.session import SessionLocal
+from src.crud.aio.base import asyncify
+from src.database.session import AsyncSessionLocal, SessionLocal
 from src.models.models import Role, User
 from src.utils.custom_responses import Unauthorized
 
@@ -20,6 +23,33 @@ def get_db() -> Generator:
         db.close()
 
 
+def session_stream(produce: Callable[[Session], Iterator]) -> Iterator:
+    # The request session is closed before the body is sent, so streamed
+    # bodies run on a session of their own.
+    db = SessionLocal()
+    try:
+        yield from produce(db)
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession | Session, None]:
+    """
+    Yield an AsyncSession when DATABASE_ASYNC is enabled, otherwise a regular
+    Session. Use it together with the wrappers in src.crud.aio, which accept both.
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
 ) -> User:
@@ -29,12 +59,38 @@ def get_current_user(
     return user
 
 
-def optional_user(request: Request, db: Session = Depends(get_db)) -> Optional[User]:
+def bearer_token(request: Request) -> Optional[str]:
     auth: str = request.headers.get("Authorization")
     if not auth or not auth.startswith("Bearer "):
         return None
-    token = auth.split(" ")[1]
-    return from_token(db, token)
+    return auth.split(" ")[1]
+
+
+def optional_user(request: Request, db: Session = Depends(get_db)) -> Optional[User]:
+    token = bearer_token(request)
+    return from_token(db, token) if token else None
+
+
+# Async endpoints authenticate on their get_async_db session instead of opening
+# a second one through get_db.
+async_from_token = asyncify(from_token)
+
+
+async def get_async_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession | Session = Depends(get_async_db),
+) -> User:
+    user = await async_from_token(db, token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return user
+
+
+async def optional_async_user(
+    request: Request, db: AsyncSession | Session = Depends(get_async_db)
+) -> Optional[User]:
+    token = bearer_token(request)
+    return await async_from_token(db, token) if token else None
 
 
 def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
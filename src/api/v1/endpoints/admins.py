@@ -1,26 +1,71 @@
+from pathlib import Path
+from typing import Callable, Iterator, Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from itsdangerous import BadSignature, SignatureExpired
 from sqlalchemy.orm import Session
 
-from src.api.deps import get_admin_user, get_db
+from src.api.deps import get_admin_user, get_db, session_stream
+from src.core.security import password_hasher
 from src.crud import admin as admin_crud
+from src.crud import catalogue
+from src.crud import media as media_crud
+from src.crud import stats as stats_crud
+from src.database.session import get_pool_status
 from src.models.models import User as UserModel
 from src.utils.custom_responses import BadRequest
+from src.utils.json_stream import iter_json_array, iter_ndjson
+from src.utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    TOTAL_COUNT_HEADER,
+    set_next_cursor,
+)
 from src.utils.token_utils import verify_approval_token
 
 router = APIRouter()
 
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def stream_listing(rows: Callable[[Session], Iterator[dict]], format: str):
+    """
+    The full listing as NDJSON or one chunked JSON array, sent as rows are
+    read from the database.
+    """
+    encode = iter_ndjson if format == "ndjson" else iter_json_array
+    return StreamingResponse(
+        session_stream(lambda db: encode(rows(db))),
+        media_type=STREAM_MEDIA_TYPES[format],
+    )
+
 
 @router.get("/users")
 def list_users(
+    response: Response,
     role: str = None,
     search: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    stream: Literal["ndjson", "json"] | None = None,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_admin_user),
 ):
-    return admin_crud.list_all_users(db, role, search)
+    """
+    One page of users, or with ``stream`` every matching user in one
+    streamed response.
+    """
+    if stream:
+        # Validate the filters before the response starts.
+        admin_crud.users_query(db, role, search)
+        return stream_listing(
+            lambda db: admin_crud.iter_all_users(db, role, search), stream
+        )
+    users = admin_crud.list_all_users(db, role, search, limit, cursor)
+    set_next_cursor(response, users, limit, "email")
+    return users
 
 
 @router.put("/users/{user_id}/status")
@@ -63,15 +108,69 @@ def approve_teacher_by_token(token: str, db: Session = Depends(get_db)):
 
 @router.get("/courses")
 def list_courses(
+    response: Response,
     teacher_id: UUID | None = None,
     student_id: UUID | None = None,
     title: str | None = None,
     skip: int = 0,
     limit: int = 10,
+    include_students: bool = True,
+    stream: Literal["ndjson", "json"] | None = None,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_admin_user),
 ):
-    return admin_crud.list_all_courses(db, teacher_id, student_id, title)
+    """
+    A page of courses, with their students unless ``include_students`` is
+    false, and the number of matching courses in X-Total-Count. With
+    ``stream`` every matching course is sent in one streamed response.
+    """
+    filters = (teacher_id, student_id, title)
+    if stream:
+        return stream_listing(
+            lambda db: admin_crud.iter_all_courses(db, *filters, include_students),
+            stream,
+        )
+    courses, total = admin_crud.page_all_courses(
+        db, *filters, skip, limit, include_students
+    )
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return courses
+
+
+@router.post("/courses/import")
+async def import_courses(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    owner_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_admin_user),
+):
+    """
+    Import courses with their sections and tags from a CSV or JSONL upload;
+    ``format`` defaults to the file extension.
+    """
+    format = format or Path(file.filename or "").suffix.lstrip(".")
+    # UploadFile spools to disk, so the file is read as a stream here.
+    records = catalogue.read_records(file.file, format)
+    return await run_in_threadpool(catalogue.import_courses, db, records, owner_id)
+
+
+EXPORT_MEDIA_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("/courses/export")
+def export_courses(
+    format: str = "jsonl", current_user: UserModel = Depends(get_admin_user)
+):
+    if format not in catalogue.FORMATS:
+        raise BadRequest(f"Unsupported format: {format}")
+    return StreamingResponse(
+        session_stream(
+            lambda db: catalogue.write_records(catalogue.export_courses(db), format)
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="courses.{format}"'},
+    )
 
 
 @router.put("/courses/{course_id}/visability")
@@ -109,3 +208,56 @@ def get_course_ratings(
     current_user: UserModel = Depends(get_admin_user),
 ):
     return admin_crud.get_course_ratings(db, course_id)
+
+
+@router.get("/stats")
+def get_stats_overview(
+    skip: int = 0,
+    limit: int = 10,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_admin_user),
+):
+    """
+    Teachers with the stored enrollment counters of all their courses.
+    """
+    return stats_crud.teachers_overview(db, skip, limit)
+
+
+@router.get("/courses/{course_id}/stats")
+def get_course_stats(
+    course_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_admin_user),
+):
+    return stats_crud.course_stats(db, course_id)
+
+
+@router.post("/stats/rebuild")
+def rebuild_stats(
+    db: Session = Depends(get_db), current_user: UserModel = Depends(get_admin_user)
+):
+    return stats_crud.rebuild_stats(db)
+
+
+@router.get("/security/password-pool")
+def get_password_pool_status(current_user: UserModel = Depends(get_admin_user)):
+    return password_hasher.status()
+
+
+@router.get("/db/pool")
+def get_db_pool_status(current_user: UserModel = Depends(get_admin_user)):
+    return get_pool_status()
+
+
+@router.post("/media/gc")
+def collect_media_garbage(
+    db: Session = Depends(get_db), current_user: UserModel = Depends(get_admin_user)
+):
+    return media_crud.collect_media_garbage(db)
+
+
+@router.get("/notifications/{job_id}")
+def get_notification_job(
+    job_id: str, current_user: UserModel = Depends(get_admin_user)
+):
+    return admin_crud.get_notification_job(job_id)
@@ -1,35 +1,117 @@
-from typing import Optional
+from typing import Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.api.deps import get_db, get_teacher_user, optional_user
+from src.api.deps import (
+    get_async_db,
+    get_db,
+    get_teacher_user,
+    optional_async_user,
+)
+from src.core.response_cache import json_response, response_cache
+from src.crud.aio import course as aio_course
+from src.crud.aio import search as aio_search
 from src.crud.course import (
     create_courses,
-    get_course,
     get_course_by_id,
-    get_courses_by_tag_id,
     rating_course,
     update_specific_course,
 )
+from src.crud.search import DEFAULT_SEARCH_LIMIT
 from src.schemas.all_models import User, CourseWithRatings
+from src.utils.media import upload_image
+from src.utils.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 
 router = APIRouter(tags=["courses"])
 
 
 @router.get("/")
-def get_courses(
+async def get_courses(
+    request: Request,
+    response: Response,
     title: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(optional_user),
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: AsyncSession | Session = Depends(get_async_db),
+    current_user: Optional[User] = Depends(optional_async_user),
 ):
-    return get_course(db, title=title, current_user=current_user)
+    if current_user is None:
+        # Every anonymous caller sees the same catalogue.
+        async def build():
+            courses = await aio_course.get_course(
+                db, title=title, limit=limit, cursor=cursor
+            )
+            cached = json_response(courses)
+            set_next_cursor(cached, courses, limit, "title", "id")
+            return cached
+
+        return await response_cache.serve(request, "courses", build)
+
+    courses = await aio_course.get_course(
+        db, title=title, current_user=current_user, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, courses, limit, "title", "id")
+    return courses
+
+
+@router.get("/search")
+async def search_courses(
+    q: str,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    db: AsyncSession | Session = Depends(get_async_db),
+    current_user: Optional[User] = Depends(optional_async_user),
+):
+    return await aio_search.search_courses(
+        db, q=q, current_user=current_user, limit=limit
+    )
+
+
+@router.get("/by-tags")
+async def get_courses_by_tags(
+    response: Response,
+    tag_ids: list[UUID] = Query(...),
+    match: Literal["any", "all"] = "any",
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: AsyncSession | Session = Depends(get_async_db),
+    current_user: Optional[User] = Depends(optional_async_user),
+):
+    courses = await aio_course.get_courses_by_tags(
+        db,
+        tag_ids,
+        current_user=current_user,
+        match_all=match == "all",
+        limit=limit,
+        cursor=cursor,
+    )
+    set_next_cursor(response, courses, limit, "title", "id")
+    return courses
 
 
 @router.get("/courses/{course_id}", response_model=CourseWithRatings)
-def get_rating_course(course_id: UUID, db: Session = Depends(get_db)):
-    return rating_course(db, course_id)
+def get_rating_course(
+    course_id: UUID,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    ratings = rating_course(db, course_id, limit=limit, cursor=cursor)
+    set_next_cursor(response, ratings["ratings"], limit, "student_id")
+    return ratings
 
 
 @router.get("/{course_id}")
@@ -43,7 +125,7 @@ def get_courses_by_id(
 
 
 @router.post("/")
-def create_course(
+async def create_course(
     title: str = Form(...),
     description: str = Form(...),
     objectives: str = Form(""),
@@ -53,20 +135,24 @@ def create_course(
     current_user=Depends(get_teacher_user),
 ):
     owner_id = current_user.id
-    new_courses = create_courses(
+    picture_url = None
+    if picture:
+        picture_url = await upload_image(picture, "course_pictures")
+    new_courses = await run_in_threadpool(
+        create_courses,
         db,
         title,
         description,
         objectives,
         is_premium,
         owner_id,
-        picture,
+        picture_url,
     )
     return new_courses
 
 
 @router.put("/{course_id}")
-def update_course(
+async def update_course(
     course_id: UUID,
     title: str = Form(None),
     description: str = Form(None),
@@ -76,7 +162,11 @@ def update_course(
     db: Session = Depends(get_db),
     current_user=Depends(get_teacher_user),
 ):
-    return update_specific_course(
+    picture_url = None
+    if picture:
+        picture_url = await upload_image(picture, "course_pictures")
+    return await run_in_threadpool(
+        update_specific_course,
         db=db,
         id=course_id,
         current_user=current_user,
@@ -84,14 +174,21 @@ def update_course(
         description=description,
         objectives=objectives,
         is_premium=is_premium,
-        picture=picture,
+        picture=picture_url,
     )
 
 
 @router.get("/by-tag/{tag_id}")
-def get_courses_by_tag(
+async def get_courses_by_tag(
     tag_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(optional_user),
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: AsyncSession | Session = Depends(get_async_db),
+    current_user: Optional[User] = Depends(optional_async_user),
 ):
-    return get_courses_by_tag_id(db, tag_id, current_user)
+    courses = await aio_course.get_courses_by_tag_id(
+        db, tag_id, current_user, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, courses, limit, "title", "id")
+    return courses
@@ -1,6 +1,7 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Path
+from fastapi import APIRouter, Depends, Path, Response
 from sqlalchemy.orm import Session
 
 from src.api.deps import (
@@ -19,6 +20,7 @@ from src.crud.section import (
     update_info_about_section,
 )
 from src.schemas.all_models import SectionCreate, SectionUpdate, User
+from src.utils.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 
 router = APIRouter(tags=["sections"])
 
@@ -26,10 +28,18 @@ router = APIRouter(tags=["sections"])
 @router.get("/")
 def get_sections(
     course_id: UUID,
+    response: Response,
+    title: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(teacher_or_admin_student),
 ):
-    return get_all_sections(db, course_id, current_user=current_user)
+    sections = get_all_sections(
+        db, course_id, title, current_user=current_user, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, sections, limit, "position", "id")
+    return sections
 
 
 @router.get("/{section_id}")
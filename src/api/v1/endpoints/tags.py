@@ -1,18 +1,27 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from src.api.deps import get_db, teacher_or_admin
+from src.api.deps import get_db, session_stream, teacher_or_admin
+from src.core.response_cache import json_response, response_cache
 from src.crud import tag as crud_tag
-from src.schemas.all_models import CreateTag
+from src.schemas.all_models import BulkTagAssignment, CreateTag
+from src.utils.json_stream import iter_json_object
+from src.utils.pagination import DEFAULT_PAGE_SIZE, set_next_cursor
 
 router = APIRouter(tags=["tags"])
 
 
 @router.get("")
-def get_tags(db: Session = Depends(get_db)):
-    return crud_tag.get_tags(db)
+async def get_tags(request: Request, db: Session = Depends(get_db)):
+    async def build():
+        return json_response(await run_in_threadpool(crud_tag.get_tags, db))
+
+    return await response_cache.serve(request, "tags", build)
 
 
 @router.post("")
@@ -41,6 +50,15 @@ def add_tag_to_course(
     return crud_tag.add_tag_to_course(db, course_id, tag_id)
 
 
+@router.post("/courses/bulk")
+def assign_tags_bulk(
+    payload: BulkTagAssignment,
+    db: Session = Depends(get_db),
+    current_user=Depends(teacher_or_admin),
+):
+    return crud_tag.assign_tags_bulk(db, payload.items)
+
+
 @router.delete("/courses/{course_id}/tags/{tag_id}")
 def delete_tag_from_course(
     course_id: UUID,
@@ -53,13 +71,29 @@ def delete_tag_from_course(
 
 @router.get("/courses")
 def found_course_tags(
-    tag_name: str, db: Session = Depends(get_db), current_user=Depends(teacher_or_admin)
+    tag_name: str,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(teacher_or_admin),
 ):
-    return crud_tag.search_course_by_tag(db, tag_name)
+    courses = crud_tag.search_course_by_tag(
+        db, tag_name, current_user, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, courses, limit, "title", "id")
+    return courses
 
 
 @router.get("/map")
 def return_course_tag(
-    db: Session = Depends(get_db), current_user=Depends(teacher_or_admin)
+    course_ids: Optional[list[UUID]] = Query(None),
+    current_user=Depends(teacher_or_admin),
 ):
-    return crud_tag.return_all_tags(db)
+    # Not cached: the cache would buffer the whole body before sending it.
+    return StreamingResponse(
+        session_stream(
+            lambda db: iter_json_object(crud_tag.tag_map_rows(db, course_ids))
+        ),
+        media_type="application/json",
+    )
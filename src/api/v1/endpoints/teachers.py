@@ -5,8 +5,10 @@ from itsdangerous import BadSignature, SignatureExpired
 from sqlalchemy.orm import Session
 
 from src.api.deps import get_db, get_teacher_user
+from src.crud.stats import teacher_stats
 from src.crud.teacher import (
     approve_student_by_id,
+    get_course_stats,
     list_pending_students,
     remove_student_from_course,
     toggle_course_visibility_by_teacher,
@@ -29,6 +31,23 @@ def list_pending_students_endpoint(
     )
 
 
+@router.get("/stats")
+def get_own_stats(
+    db: Session = Depends(get_db),
+    current_teacher: UserModel = Depends(get_teacher_user),
+):
+    return teacher_stats(db, current_teacher.id)
+
+
+@router.get("/{course_id}/stats")
+def get_course_stats_endpoint(
+    course_id: UUID,
+    db: Session = Depends(get_db),
+    current_teacher: UserModel = Depends(get_teacher_user),
+):
+    return get_course_stats(db=db, current_teacher=current_teacher, course_id=course_id)
+
+
 @router.get("/approval", include_in_schema=False)
 def approve_student_by_token(token: str, db: Session = Depends(get_db)):
     try:
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, File, Form, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from src.api.deps import get_current_user, get_db
 from src.core.authentication import create_token
+from src.core.security import hash_password_async, needs_rehash, verify_password_async
 from src.crud import user as user_crud
 from src.models.models import User as UserModel
 from src.schemas.all_models import (
@@ -15,23 +17,33 @@ from src.schemas.all_models import (
     TeacherUpdate,
 )
 from src.utils.custom_responses import BadRequest
-from src.utils.s3 import upload_image_to_s3
+from src.utils.media import upload_image
 
 router = APIRouter()
 
 
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
-    user = user_crud.get_by_email(db, form_data.username)
-    if not user or not user_crud.verify_password(form_data.password, user.password):
+    user = await run_in_threadpool(user_crud.get_by_email, db, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.password):
         raise BadRequest("Invalid email or password")
+    if needs_rehash(user.password):
+        hashed_password = await hash_password_async(form_data.password)
+        await run_in_threadpool(
+            user_crud.store_rehashed_password, db, user, hashed_password
+        )
     return {"access_token": create_token(user), "token_type": "bearer"}
 
 
+async def ensure_email_available(db: Session, email: str):
+    if await run_in_threadpool(user_crud.get_by_email, db, email):
+        raise BadRequest("Email already registered")
+
+
 @router.post("/register/admin")
-def register_admin_user(
+async def register_admin_user(
     first_name: str = Form(...),
     last_name: str = Form(...),
     email: str = Form(...),
@@ -41,13 +53,15 @@ def register_admin_user(
     payload = AdminCreate(
         first_name=first_name, last_name=last_name, email=email, password=password
     )
-    if user_crud.get_by_email(db, payload.email):
-        raise BadRequest("Email already registered")
-    return user_crud.register_admin(db, payload)
+    await ensure_email_available(db, payload.email)
+    hashed_password = await hash_password_async(payload.password)
+    return await run_in_threadpool(
+        user_crud.register_admin, db, payload, hashed_password
+    )
 
 
 @router.post("/register/teacher")
-def register_teacher_user(
+async def register_teacher_user(
     first_name: str = Form(...),
     last_name: str = Form(...),
     email: str = Form(...),
@@ -59,7 +73,7 @@ def register_teacher_user(
 ):
     image_url = None
     if profile_picture:
-        image_url = upload_image_to_s3(profile_picture)
+        image_url = await upload_image(profile_picture)
 
     payload = TeacherCreate(
         first_name=first_name,
@@ -71,13 +85,15 @@ def register_teacher_user(
         profile_picture=image_url,
     )
 
-    if user_crud.get_by_email(db, payload.email):
-        raise BadRequest("Email already registered")
-    return user_crud.register_teacher(db, payload)
+    await ensure_email_available(db, payload.email)
+    hashed_password = await hash_password_async(payload.password)
+    return await run_in_threadpool(
+        user_crud.register_teacher, db, payload, hashed_password
+    )
 
 
 @router.post("/register/student")
-def register_student_user(
+async def register_student_user(
     first_name: str = Form(...),
     last_name: str = Form(...),
     email: str = Form(...),
@@ -87,7 +103,7 @@ def register_student_user(
 ):
     image_url = None
     if profile_picture:
-        image_url = upload_image_to_s3(profile_picture)
+        image_url = await upload_image(profile_picture)
 
     payload = StudentCreate(
         first_name=first_name,
@@ -97,9 +113,11 @@ def register_student_user(
         profile_picture=image_url,
     )
 
-    if user_crud.get_by_email(db, payload.email):
-        raise BadRequest("Email already registered")
-    return user_crud.register_student(db, payload)
+    await ensure_email_available(db, payload.email)
+    hashed_password = await hash_password_async(payload.password)
+    return await run_in_threadpool(
+        user_crud.register_student, db, payload, hashed_password
+    )
 
 
 @router.get("/me")
@@ -123,7 +141,7 @@ def update_me_admin(
 
 
 @router.put("/me/teacher")
-def update_me_teacher(
+async def update_me_teacher(
     first_name: str = Form(None),
     last_name: str = Form(None),
     password: str = Form(None),
@@ -136,7 +154,7 @@ def update_me_teacher(
     image_url = None
 
     if profile_picture:
-        image_url = upload_image_to_s3(profile_picture)
+        image_url = await upload_image(profile_picture)
 
     payload = TeacherUpdate(
         first_name=first_name,
@@ -147,11 +165,13 @@ def update_me_teacher(
         profile_picture=image_url,
     )
 
-    return user_crud.update_teacher_info(db, current_user, payload)
+    return await run_in_threadpool(
+        user_crud.update_teacher_info, db, current_user, payload
+    )
 
 
 @router.put("/me/student")
-def update_me_student(
+async def update_me_student(
     first_name: str = Form(None),
     last_name: str = Form(None),
     password: str = Form(None),
@@ -162,7 +182,7 @@ def update_me_student(
     image_url = None
 
     if profile_picture:
-        image_url = upload_image_to_s3(profile_picture)
+        image_url = await upload_image(profile_picture)
 
     payload = StudentUpdate(
         first_name=first_name,
@@ -171,7 +191,9 @@ def update_me_student(
         profile_picture=image_url,
     )
 
-    return user_crud.update_student_info(db, current_user, payload)
+    return await run_in_threadpool(
+        user_crud.update_student_info, db, current_user, payload
+    )
 
 
 @router.delete("/delete")
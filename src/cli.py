@@ -0,0 +1,82 @@
+"""
+Command line tools.
+
+    python -m src.cli import-courses courses.jsonl --owner-id <teacher id>
+    python -m src.cli export-courses courses.csv
+    python -m src.cli rebuild-stats
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from uuid import UUID
+
+from src.crud import catalogue, stats
+from src.database.session import SessionLocal, init_db
+
+
+def file_format(path: str, given: str | None) -> str:
+    return given or Path(path).suffix.lstrip(".") or "jsonl"
+
+
+def import_courses(args):
+    with open(args.path, "rb") as file, SessionLocal() as db:
+        records = catalogue.read_records(file, file_format(args.path, args.format))
+        result = catalogue.import_courses(
+            db, records, args.owner_id, batch_size=args.batch_size
+        )
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 1 if result["failed"] else 0
+
+
+def export_courses(args):
+    format = file_format(args.path, args.format)
+    out = sys.stdout if args.path == "-" else open(args.path, "w", newline="")
+    with SessionLocal() as db:
+        try:
+            out.writelines(
+                catalogue.write_records(catalogue.export_courses(db), format)
+            )
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    return 0
+
+
+def rebuild_stats(args):
+    with SessionLocal() as db:
+        json.dump(stats.rebuild_stats(db), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    commands = parser.add_subparsers(required=True)
+
+    command = commands.add_parser("import-courses", help="import a CSV/JSONL file")
+    command.add_argument("path")
+    command.add_argument("--format", choices=catalogue.FORMATS)
+    command.add_argument("--owner-id", type=UUID, help="owner for rows without one")
+    command.add_argument("--batch-size", type=int, default=catalogue.IMPORT_BATCH_SIZE)
+    command.set_defaults(run=import_courses)
+
+    command = commands.add_parser("export-courses", help="export to CSV/JSONL")
+    command.add_argument("path", help="output file, or - for stdout")
+    command.add_argument("--format", choices=catalogue.FORMATS)
+    command.set_defaults(run=export_courses)
+
+    command = commands.add_parser(
+        "rebuild-stats", help="recount enrollment stats from the enrollments"
+    )
+    command.set_defaults(run=rebuild_stats)
+
+    args = parser.parse_args(argv)
+    init_db()
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+from uuid import UUID
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from src.core.config import settings
+from src.models.models import User
+from src.utils.ttl_cache import TTLCache
+
+# Column values of recently authenticated users, by user id. The cache is per
+# process: writes that go through invalidate_user() take effect immediately
+# here and within AUTH_CACHE_TTL seconds in other workers.
+principal_cache = TTLCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
+
+USER_COLUMNS = [column.key for column in inspect(User).column_attrs]
+
+
+def cache_user(user: User):
+    principal_cache.set(str(user.id), {key: getattr(user, key) for key in USER_COLUMNS})
+
+
+def cached_user(db: Session, user_id: str, token_version: int) -> User | None:
+    """
+    The cached user attached to ``db`` without a query, or None on a miss or
+    when the token was issued for an older token version.
+    """
+    values = principal_cache.get(user_id)
+    if values is None or values["token_version"] != token_version:
+        return None
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_user(user_id: UUID | str):
+    principal_cache.pop(str(user_id))
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
+from src.core.auth_cache import cache_user, cached_user
 from src.core.config import settings
 from src.crud import user as user_crud
 from src.models.models import User
@@ -13,6 +14,7 @@ def create_token(user: User) -> str:
         "user_id": str(user.id),
         "email": user.email,
         "role": user.role.value,
+        "ver": user.token_version or 0,
         "exp": datetime.now(timezone.utc)
         + timedelta(seconds=int(settings.JWT_EXPIRATION)),
     }
@@ -26,9 +28,19 @@ def from_token(db: Session, token: str) -> User | None:
         payload = jwt.decode(
             token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
         )
-        email = payload.get("email")
-        user_id = payload.get("user_id")
-        user = user_crud.get_by_email(db, email)
-        return user if user and str(user.id) == user_id else None
     except JWTError:
         return None
+    email = payload.get("email")
+    user_id = payload.get("user_id")
+    # Tokens issued before token versions existed carry no "ver".
+    version = payload.get("ver", 0)
+
+    user = cached_user(db, user_id, version)
+    if user is not None:
+        return user if user.email == email else None
+
+    user = user_crud.get_by_email(db, email)
+    if not user or str(user.id) != user_id or user.token_version != version:
+        return None
+    cache_user(user)
+    return user
@@ -22,18 +22,50 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM")
     JWT_EXPIRATION: int = os.getenv("JWT_EXPIRATION")
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL: float = 30
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_TTL: float = 60
+    RESPONSE_CACHE_MAX_AGE: int = 30
 
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: str | None = os.getenv("ASYNC_DATABASE_URL")
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     SMTP_HOST: str = os.getenv("SMTP_HOST")
     SMTP_PORT: int = os.getenv("SMTP_PORT")
     EMAIL_USERNAME: str = os.getenv("EMAIL_USERNAME")
     EMAIL_PASSWORD: str = os.getenv("EMAIL_PASSWORD")
+    EMAIL_TRANSPORT: str = "smtp"
+    EMAIL_SPOOL_DIR: str = "var/mail/spool"
+    EMAIL_OUTBOX_DIR: str = "var/mail/outbox"
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BACKOFF: float = 30
+    EMAIL_SMTP_IDLE_TIMEOUT: float = 60
     APP_BASE_URL: str = os.getenv("APP_BASE_URL")
     ADMIN_NOTIFICATION_EMAIL: str = os.getenv("ADMIN_NOTIFICATION_EMAIL")
     AWS_ACCESS_KEY_ID: str = os.getenv("AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY")
     AWS_REGION: str = os.getenv("AWS_REGION")
     AWS_BUCKET_NAME: str = os.getenv("AWS_BUCKET_NAME")
+    S3_MAX_POOL_CONNECTIONS: int = 20
+    STORAGE_BACKEND: str = "s3"
+    MEDIA_ROOT: str = "var/media"
+    MEDIA_URL: str = "/media"
+    MEDIA_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    MEDIA_MAX_DIMENSION: int = 8000
+    MEDIA_WORKERS: int = 2
+    MEDIA_GC_GRACE: float = 24 * 3600
+    MEDIA_GC_BATCH: int = 500
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,183 @@
+import hashlib
+import threading
+from collections import defaultdict
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.models.models import Course, CourseTag, Tag
+from src.utils.pagination import NEXT_CURSOR_HEADER
+from src.utils.ttl_cache import TTLCache
+
+# Which cached responses a write to each model can change.
+MODEL_SCOPES = {
+    Course: {"courses", "tags"},
+    Tag: {"tags"},
+    CourseTag: {"tags"},
+}
+CACHED_HEADERS = ("content-type", NEXT_CURSOR_HEADER.lower())
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: dict[str, str]
+
+
+class MemoryBackend:
+    """
+    Per-process backend. A shared backend (e.g. Redis GET/SETEX/INCR) only
+    needs the same four methods; scope versions must not expire or be evicted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize, ttl)
+        self.versions: defaultdict[str, int] = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> CachedResponse | None:
+        return self.entries.get(key)
+
+    def set(self, key: str, value: CachedResponse):
+        self.entries.set(key, value)
+
+    def version(self, scope: str) -> int:
+        with self.lock:
+            return self.versions[scope]
+
+    def bump(self, scope: str):
+        with self.lock:
+            self.versions[scope] += 1
+
+
+class ResponseCache:
+    """
+    Caches whole JSON responses for endpoints whose output is the same for
+    every caller. Entries are keyed by the version of their scope, so bumping
+    it invalidates them without having to find them.
+    """
+
+    def __init__(self, backend, max_age: int):
+        self.backend = backend
+        self.max_age = max_age
+
+    def key(self, scope: str, request: Request) -> str:
+        query = "&".join(sorted(str(request.query_params).split("&")))
+        version = self.backend.version(scope)
+        return f"{scope}:{version}:{request.url.path}?{query}"
+
+    def invalidate(self, *scopes: str):
+        for scope in scopes:
+            self.backend.bump(scope)
+
+    def store(self, key: str, body: bytes, headers) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            headers={
+                name: value for name, value in headers.items() if name in CACHED_HEADERS
+            },
+        )
+        self.backend.set(key, entry)
+        return entry
+
+    async def tee(
+        self, key: str, body_iterator: AsyncIterator, headers
+    ) -> AsyncIterator:
+        chunks = []
+        async for chunk in body_iterator:
+            chunks.append(chunk if isinstance(chunk, bytes) else chunk.encode())
+            yield chunk
+        self.store(key, b"".join(chunks), headers)
+
+    def cache_headers(self, public: bool) -> dict[str, str]:
+        return {
+            "Cache-Control": f"{'public' if public else 'private'}, "
+            f"max-age={self.max_age}",
+            "Vary": "Authorization",
+        }
+
+    async def serve(
+        self,
+        request: Request,
+        scope: str,
+        build: Callable[[], Awaitable[Response]],
+        public: bool = True,
+    ) -> Response:
+        """
+        The cached response for ``request``, or the one ``build`` returns,
+        answering If-None-Match with 304 Not Modified. A StreamingResponse is
+        passed through as it is produced and cached once it completes.
+        """
+        key = self.key(scope, request)
+        entry = self.backend.get(key)
+        if entry is None:
+            response = await build()
+            if response.status_code != 200:
+                return response
+            if isinstance(response, StreamingResponse):
+                response.body_iterator = self.tee(
+                    key, response.body_iterator, response.headers
+                )
+                response.headers.update(self.cache_headers(public))
+                return response
+            entry = self.store(key, response.body, response.headers)
+
+        headers = {"ETag": entry.etag, **self.cache_headers(public)}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(entry.body, headers={**entry.headers, **headers})
+
+
+def json_response(content) -> JSONResponse:
+    return JSONResponse(jsonable_encoder(content))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+response_cache = ResponseCache(
+    MemoryBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL),
+    max_age=settings.RESPONSE_CACHE_MAX_AGE,
+)
+
+
+def _mark(session: Session, model):
+    scopes = MODEL_SCOPES.get(model)
+    if scopes:
+        session.info.setdefault("response_cache_scopes", set()).update(scopes)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        _mark(session, type(obj))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    # query().update()/delete() and insert(Model) bypass the flush.
+    if orm_execute_state.is_select or orm_execute_state.bind_mapper is None:
+        return
+    _mark(orm_execute_state.session, orm_execute_state.bind_mapper.class_)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    scopes = session.info.pop("response_cache_scopes", None)
+    if scopes:
+        response_cache.invalidate(*scopes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_marks(session, previous_transaction):
+    session.info.pop("response_cache_scopes", None)
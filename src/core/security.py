@@ -1,9 +1,130 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import bcrypt
 
+from src.core.config import settings
+from src.utils.custom_responses import ServiceUnavailable
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on its own bounded thread pool so password work cannot take over
+    the request threadpool. bcrypt releases the GIL while hashing, so threads
+    run in parallel without the pickling cost of a process pool.
+
+    At most ``max_pending`` calls may be queued or running; beyond that callers
+    get a 503 instead of piling up behind the pool.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 4, max_pending: int = 64):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="bcrypt")
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+
+    def submit(self, func, *args) -> Future:
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ServiceUnavailable(
+                    "Too many authentication requests, please try again shortly"
+                )
+            self.pending += 1
+        submitted = time.monotonic()
+
+        def run():
+            waited = time.monotonic() - submitted
+            with self.lock:
+                self.running += 1
+                self.wait_sum += waited
+                self.wait_max = max(self.wait_max, waited)
+            try:
+                return func(*args)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.pending -= 1
+                    self.completed += 1
+
+        return self.executor.submit(run)
+
+    def _hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode(), salt).decode()
+
+    @staticmethod
+    def _verify(password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+
+    def hash(self, password: str) -> str:
+        return self.submit(self._hash, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self.submit(self._verify, password, hashed).result()
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self.submit(self._hash, password))
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await asyncio.wrap_future(self.submit(self._verify, password, hashed))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        True when ``hashed`` was made with a different cost than the current one.
+        """
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def status(self) -> dict:
+        with self.lock:
+            started = self.completed + self.running
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_avg": self.wait_sum / started if started else 0.0,
+                "wait_max": self.wait_max,
+            }
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    return password_hasher.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.hash_async(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify_async(plain_password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    return password_hasher.needs_rehash(hashed_password)
@@ -0,0 +1,125 @@
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import and_, event, null
+from sqlalchemy.orm import Session
+
+from src.models.models import Course, Role, Section, StudentCourse, User
+
+CONTEXTS_KEY = "access_contexts"
+
+
+class CourseAccess(NamedTuple):
+    course: Course
+    # The student's enrollment, approved or not; None for everyone else.
+    enrollment: Optional[StudentCourse]
+
+    @property
+    def is_approved(self) -> bool:
+        return self.enrollment is not None and bool(self.enrollment.is_approved)
+
+
+class AccessContext:
+    """
+    The courses and sections one user has touched in a request, each loaded
+    together with the user's enrollment in a single joined query and then
+    reused by every access check that follows. Contexts live in the request's
+    session and are dropped when it commits or rolls back.
+    """
+
+    def __init__(self, db: Session, current_user: Optional[User]):
+        self.db = db
+        self.user = current_user
+        self.courses: dict[UUID, CourseAccess] = {}
+        self.sections: dict[UUID, Section] = {}
+
+    @property
+    def is_student(self) -> bool:
+        return self.user is not None and self.user.role == Role.STUDENT
+
+    def with_enrollment(self, query):
+        if self.is_student:
+            return query.add_entity(StudentCourse).outerjoin(
+                StudentCourse,
+                and_(
+                    StudentCourse.course_id == Course.id,
+                    StudentCourse.student_id == self.user.id,
+                ),
+            )
+        return query.add_columns(null())
+
+    def course(self, course_id: UUID, missing: int = 403) -> CourseAccess:
+        if course_id not in self.courses:
+            row = (
+                self.with_enrollment(self.db.query(Course))
+                .filter(Course.id == course_id)
+                .first()
+            )
+            if not row:
+                raise HTTPException(status_code=missing, detail="Course not found")
+            self.courses[course_id] = CourseAccess(*row)
+        return self.courses[course_id]
+
+    def section(
+        self, section_id: UUID, missing: int = 403
+    ) -> tuple[Section, CourseAccess]:
+        if section_id not in self.sections:
+            row = (
+                self.with_enrollment(
+                    self.db.query(Section, Course).join(
+                        Course, Course.id == Section.course_id
+                    )
+                )
+                .filter(Section.id == section_id)
+                .first()
+            )
+            if not row:
+                raise HTTPException(status_code=missing, detail="Section not found")
+            section, course, enrollment = row
+            self.sections[section_id] = section
+            self.courses.setdefault(course.id, CourseAccess(course, enrollment))
+        section = self.sections[section_id]
+        return section, self.courses[section.course_id]
+
+    def check_view(self, access: CourseAccess) -> Course:
+        """
+        The course if the user may view it, otherwise 403.
+        """
+        course = access.course
+        if self.user is None:
+            if course.is_hidden or course.is_premium:
+                raise HTTPException(status_code=403, detail="Access denied")
+            return course
+        if self.user.role == Role.STUDENT:
+            if course.is_hidden:
+                raise HTTPException(status_code=403, detail="This course is hidden")
+            if course.is_premium and not access.is_approved:
+                raise HTTPException(
+                    status_code=403,
+                    detail="You do not have enrolled in this premium course",
+                )
+        if self.user.role == Role.TEACHER:
+            if course.is_hidden or course.owner_id != self.user.id:
+                raise HTTPException(status_code=403, detail="Access denied")
+        return course
+
+
+def access_context(db: Session, current_user: Optional[User]) -> AccessContext:
+    contexts = db.info.setdefault(CONTEXTS_KEY, {})
+    key = current_user.id if current_user is not None else None
+    context = contexts.get(key)
+    if context is None:
+        context = contexts[key] = AccessContext(db, current_user)
+    return context
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_contexts(session):
+    # Committed objects are expired and enrollments may have changed.
+    session.info.pop(CONTEXTS_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_contexts_on_rollback(session, previous_transaction):
+    session.info.pop(CONTEXTS_KEY, None)
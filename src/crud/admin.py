@@ -1,74 +1,121 @@
+from dataclasses import asdict
+from typing import Iterator
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from src.core.auth_cache import invalidate_user
+from src.crud.course import record_rating
+from src.crud.media import release_media
+from src.crud.section import forget_completed_sections
+from src.crud.stats import contribution, drop_course_stats, record_enrollment
 from src.crud.user import get_by_id
-from src.models.models import Admin, Course, Role, Student, StudentCourse, Teacher, User
+from src.models.models import (
+    CompletedSection,
+    Course,
+    Role,
+    Student,
+    StudentCourse,
+    User,
+)
 from src.utils.custom_responses import BadRequest, NotFound
-from src.utils.email_utils import send_email
+from src.utils.json_stream import STREAM_BATCH_SIZE
+from src.utils.notifications import get_job, notify_many
+from src.utils.pagination import DEFAULT_PAGE_SIZE, clamp_limit, decode_cursor
 
 
-def list_all_users(db: Session, role: str = None, search: str = None) -> list[User]:
-    if role and role.upper() not in ["ADMIN", "TEACHER", "STUDENT"]:
-        raise BadRequest("Invalid role. Must be one of: ADMIN, TEACHER, STUDENT.")
+def user_summary(user: User) -> dict:
+    user_info = {
+        "id": str(user.id),
+        "email": user.email,
+        "role": user.role.value,
+        "is_active": user.is_active,
+    }
 
-    if role and search:
-        users = (
-            db.query(User)
-            .filter(User.role == Role(role.upper()), User.email.ilike(f"%{search}%"))
-            .all()
+    if user.role == Role.ADMIN and user.admin:
+        user_info.update(
+            {"first_name": user.admin.first_name, "last_name": user.admin.last_name}
         )
-    elif role:
-        users = db.query(User).filter(User.role == Role(role.upper())).all()
-    elif search:
-        users = db.query(User).filter(User.email.ilike(f"%{search}%")).all()
-    else:
-        users = db.query(User).all()
 
-    result = []
+    elif user.role == Role.TEACHER and user.teacher:
+        user_info.update(
+            {
+                "first_name": user.teacher.first_name,
+                "last_name": user.teacher.last_name,
+                "phone_number": user.teacher.phone_number,
+                "linked_in_acc": user.teacher.linked_in_acc,
+                "profile_picture": user.teacher.profile_picture,
+            }
+        )
 
-    for user in users:
-        user_info = {
-            "id": str(user.id),
-            "email": user.email,
-            "role": user.role.value,
-            "is_active": user.is_active,
-        }
+    elif user.role == Role.STUDENT and user.student:
+        user_info.update(
+            {
+                "first_name": user.student.first_name,
+                "last_name": user.student.last_name,
+                "profile_picture": user.student.profile_picture,
+            }
+        )
 
-        if user.role == Role.ADMIN:
-            admin = db.query(Admin).filter(Admin.id == user.id).first()
-            if admin:
-                user_info.update(
-                    {"first_name": admin.first_name, "last_name": admin.last_name}
-                )
-
-        elif user.role == Role.TEACHER:
-            teacher = db.query(Teacher).filter(Teacher.id == user.id).first()
-            if teacher:
-                user_info.update(
-                    {
-                        "first_name": teacher.first_name,
-                        "last_name": teacher.last_name,
-                        "phone_number": teacher.phone_number,
-                        "linked_in_acc": teacher.linked_in_acc,
-                        "profile_picture": teacher.profile_picture,
-                    }
-                )
-
-        elif user.role == Role.STUDENT:
-            student = db.query(Student).filter(Student.id == user.id).first()
-            if student:
-                user_info.update(
-                    {
-                        "first_name": student.first_name,
-                        "last_name": student.last_name,
-                        "profile_picture": student.profile_picture,
-                    }
-                )
-
-        result.append(user_info)
+    return user_info
 
-    return result
+
+def users_query(db: Session, role: str = None, search: str = None):
+    """
+    Users matching the admin filters, with their role profile joined in the
+    same query.
+    """
+    if role and role.upper() not in ["ADMIN", "TEACHER", "STUDENT"]:
+        raise BadRequest("Invalid role. Must be one of: ADMIN, TEACHER, STUDENT.")
+
+    query = db.query(User).options(
+        joinedload(User.admin), joinedload(User.teacher), joinedload(User.student)
+    )
+    if role:
+        query = query.filter(User.role == Role(role.upper()))
+    if search:
+        query = query.filter(User.email.ilike(f"%{search}%"))
+    return query
+
+
+def list_all_users(
+    db: Session,
+    role: str = None,
+    search: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None,
+) -> list[dict]:
+    """
+    One page of users_query() ordered by email. Pass the email of the last row back as
+    ``cursor`` for the next page.
+    """
+    query = users_query(db, role, search)
+    if cursor:
+        (after_email,) = decode_cursor(cursor)
+        query = query.filter(User.email > after_email)
+
+    users = query.order_by(User.email).limit(clamp_limit(limit)).all()
+
+    return [user_summary(user) for user in users]
+
+
+def iter_all_users(
+    db: Session,
+    role: str = None,
+    search: str = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Every user matching the filters, fetched ``batch_size`` rows at a time
+    through a server-side cursor so memory does not grow with the table.
+    """
+    statement = users_query(db, role, search).order_by(User.email).statement
+    # Executed as a statement: legacy Query uniquifies joined eager loads,
+    # which would buffer the whole result.
+    users = db.execute(statement.execution_options(yield_per=batch_size)).scalars()
+    for user in users:
+        yield user_summary(user)
 
 
 def update_user_active(db: Session, user_id: UUID):
@@ -77,6 +124,7 @@ def update_user_active(db: Session, user_id: UUID):
     user.is_active = not user.is_active
 
     db.commit()
+    invalidate_user(user.id)
 
     status = "activated" if user.is_active else "deactivated"
 
@@ -125,19 +173,57 @@ def approve_teacher_by_id(db: Session, user_id: UUID):
     user.is_approved = True
 
     db.commit()
+    invalidate_user(user.id)
 
     return {"message": "Teacher approved successfully"}
 
 
-def list_all_courses(
+def admin_course_summary(course: Course, include_students: bool = True) -> dict:
+    summary = {
+        "id": str(course.id),
+        "title": course.title,
+        "description": course.description,
+        "objectives": course.objectives,
+        "owner_id": str(course.owner_id),
+        "teacher_name": (
+            f"{course.owner.first_name} {course.owner.last_name}"
+            if course.owner
+            else None
+        ),
+        "is_premium": course.is_premium,
+        "is_hidden": course.is_hidden,
+        "picture": course.picture,
+        "rating": course.rating,
+    }
+    if include_students:
+        summary["students"] = [
+            {
+                "id": str(student.id),
+                "first_name": student.first_name,
+                "last_name": student.last_name,
+                "email": student.user.email if student.user else None,
+                "profile_picture": student.profile_picture,
+            }
+            for student in course.students
+        ]
+    return summary
+
+
+def courses_query(
     db: Session,
     teacher_id: UUID = None,
     student_id: UUID = None,
     title: str = None,
-    skip: int = 0,
-    limit: int = 10,
+    include_students: bool = False,
 ):
-    query = db.query(Course)
+    """
+    Courses matching the admin filters, with their owner joined in and,
+    with ``include_students``, their students and users selectin-loaded.
+    That stays one extra query per page, or per batch under yield_per.
+    """
+    query = db.query(Course).options(joinedload(Course.owner))
+    if include_students:
+        query = query.options(selectinload(Course.students).selectinload(Student.user))
 
     if teacher_id:
         query = query.filter(Course.owner_id == teacher_id)
@@ -148,40 +234,88 @@ def list_all_courses(
     if title:
         query = query.filter(Course.title.ilike(f"%{title}%"))
 
-    courses = query.offset(skip).limit(limit).all()
+    return query.order_by(Course.title, Course.id)
 
-    result = []
-    for course in courses:
-        result.append(
-            {
-                "id": str(course.id),
-                "title": course.title,
-                "description": course.description,
-                "objectives": course.objectives,
-                "owner_id": str(course.owner_id),
-                "teacher_name": (
-                    f"{course.owner.first_name} {course.owner.last_name}"
-                    if course.owner
-                    else None
-                ),
-                "is_premium": course.is_premium,
-                "is_hidden": course.is_hidden,
-                "picture": course.picture,
-                "rating": course.rating,
-                "students": [
-                    {
-                        "id": str(student.id),
-                        "first_name": student.first_name,
-                        "last_name": student.last_name,
-                        "email": student.user.email if student.user else None,
-                        "profile_picture": student.profile_picture,
-                    }
-                    for student in course.students
-                ],
-            }
-        )
 
-    return result
+def page_all_courses(
+    db: Session,
+    teacher_id: UUID = None,
+    student_id: UUID = None,
+    title: str = None,
+    skip: int = 0,
+    limit: int = 10,
+    include_students: bool = True,
+) -> tuple[list[dict], int]:
+    """
+    A page of courses and the number of courses matching the filters. The
+    total comes from COUNT(*) OVER () on the page query itself; only a page
+    past the end needs a separate count. ``limit`` is clamped like the other
+    listings.
+    """
+    query = courses_query(db, teacher_id, student_id, title, include_students)
+    rows = (
+        query.add_columns(func.count().over())
+        .offset(skip)
+        .limit(clamp_limit(limit))
+        .all()
+    )
+    if rows:
+        total = rows[0][1]
+    elif skip:
+        total = query.order_by(None).count()
+    else:
+        total = 0
+    return [admin_course_summary(course, include_students) for course, _ in rows], total
+
+
+def list_all_courses(
+    db: Session,
+    teacher_id: UUID = None,
+    student_id: UUID = None,
+    title: str = None,
+    skip: int = 0,
+    limit: int = 10,
+    include_students: bool = True,
+) -> list[dict]:
+    courses, _ = page_all_courses(
+        db, teacher_id, student_id, title, skip, limit, include_students
+    )
+    return courses
+
+
+def iter_all_courses(
+    db: Session,
+    teacher_id: UUID = None,
+    student_id: UUID = None,
+    title: str = None,
+    include_students: bool = True,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Every course matching the filters, streamed like iter_all_users(). The
+    server-side cursor reads only course ids; each batch of ids is then
+    loaded with the students selectin-loaded. Streaming the courses
+    themselves does not work: with the Session's do_orm_execute hooks
+    registered, SQLAlchemy carries yield_per into the selectin queries,
+    which then refuse to run.
+    """
+    query = courses_query(db, teacher_id, student_id, title, include_students)
+    statement = query.with_entities(Course.id).statement
+    ids = db.execute(statement.execution_options(yield_per=batch_size)).scalars()
+    for batch in ids.partitions():
+        courses = {course.id: course for course in query.filter(Course.id.in_(batch))}
+        for course_id in batch:
+            yield admin_course_summary(courses[course_id], include_students)
+
+
+def enrolled_emails(db: Session, course_id: UUID) -> list[str]:
+    rows = (
+        db.query(User.email)
+        .join(StudentCourse, StudentCourse.student_id == User.id)
+        .filter(StudentCourse.course_id == course_id, User.email.isnot(None))
+        .all()
+    )
+    return [email for (email,) in rows]
 
 
 def toggle_course_visability(db: Session, course_id: UUID):
@@ -194,16 +328,16 @@ def toggle_course_visability(db: Session, course_id: UUID):
     db.commit()
 
     if course.is_hidden:
-        for student in course.students:
-            user = db.query(User).filter(User.id == student.id).first()
-            if user and user.email:
-                send_email(
-                    to=user.email,
-                    subject="Course Hidden Notification",
-                    body=f"The course '{course.title}' has been temporarily hidden by an administrator and is currently unavailable.",
-                )
+        job = notify_many(
+            enrolled_emails(db, course.id),
+            subject="Course Hidden Notification",
+            body=f"The course '{course.title}' has been temporarily hidden by an administrator and is currently unavailable.",
+        )
 
-        return {"message": f"Course '{course.title}' hidden successfully."}
+        return {
+            "message": f"Course '{course.title}' hidden successfully.",
+            "job_id": job.id,
+        }
 
     return {"message": f"Course '{course.title}' is now visible again."}
 
@@ -214,20 +348,36 @@ def delete_course(db: Session, course_id: UUID):
     if not course:
         raise NotFound(f"Course with ID: {course_id} not found")
 
-    for student in course.students:
-        user = db.query(User).filter(User.id == student.id).first()
-        if user and user.email:
-            send_email(
-                to=user.email,
-                subject="Course Deleted Notification",
-                body=f"The course '{course.title}' has been deleted by an administrator and is no longer available.",
-            )
-    course.students.clear()
+    recipients = enrolled_emails(db, course.id)
+    db.query(CompletedSection).filter(CompletedSection.course_id == course.id).delete(
+        synchronize_session=False
+    )
+    db.query(StudentCourse).filter(StudentCourse.course_id == course.id).delete(
+        synchronize_session=False
+    )
+    drop_course_stats(db, course.id)
     db.flush()
+    release_media(db, course.picture)
     db.delete(course)
     db.commit()
 
-    return {"message": f"Course {course.title} deleted successfully."}
+    job = notify_many(
+        recipients,
+        subject="Course Deleted Notification",
+        body=f"The course '{course.title}' has been deleted by an administrator and is no longer available.",
+    )
+
+    return {
+        "message": f"Course {course.title} deleted successfully.",
+        "job_id": job.id,
+    }
+
+
+def get_notification_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise NotFound(f"Notification job {job_id} not found")
+    return asdict(job)
 
 
 def remove_student_from_course(db: Session, course_id: UUID, student_id: UUID):
@@ -245,6 +395,9 @@ def remove_student_from_course(db: Session, course_id: UUID, student_id: UUID):
             f"Student : {student_id} not enrolled in course with ID: {course_id}"
         )
 
+    record_rating(db, course_id, old_score=student_course.score)
+    record_enrollment(db, course_id, old=contribution(student_course))
+    forget_completed_sections(db, student_id, course_id)
     db.delete(student_course)
     db.commit()
 
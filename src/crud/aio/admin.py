@@ -0,0 +1,12 @@
+from src.crud import admin
+from src.crud.aio.base import asyncify
+
+# toggle_course_visability and delete_course are not wrapped: they write
+# notification jobs to the mail spool.
+list_all_users = asyncify(admin.list_all_users)
+update_user_active = asyncify(admin.update_user_active)
+list_pending_teachers = asyncify(admin.list_pending_teachers)
+approve_teacher_by_id = asyncify(admin.approve_teacher_by_id)
+list_all_courses = asyncify(admin.list_all_courses)
+remove_student_from_course = asyncify(admin.remove_student_from_course)
+get_course_ratings = asyncify(admin.get_course_ratings)
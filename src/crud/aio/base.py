@@ -0,0 +1,38 @@
+import inspect
+from functools import wraps
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def asyncify(func):
+    """
+    Turn a sync CRUD function into a coroutine function.
+
+    With an AsyncSession the function runs through ``AsyncSession.run_sync`` on the
+    event loop, so lazy loads inside it go through the async driver. With a plain
+    Session it falls back to the threadpool, which keeps the wrappers usable when
+    DATABASE_ASYNC is off.
+
+    run_sync holds the event loop for the whole call, so only wrap functions
+    whose blocking work is database I/O; password hashing or file and network
+    I/O inside them would stall every other request.
+    """
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        db = bound.arguments["db"]
+
+        if isinstance(db, AsyncSession):
+
+            def call(session):
+                bound.arguments["db"] = session
+                return func(*bound.args, **bound.kwargs)
+
+            return await db.run_sync(call)
+
+        return await run_in_threadpool(func, *bound.args, **bound.kwargs)
+
+    return wrapper
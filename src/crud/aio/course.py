@@ -0,0 +1,10 @@
+from src.crud import course
+from src.crud.aio.base import asyncify
+
+get_course = asyncify(course.get_course)
+get_course_by_id = asyncify(course.get_course_by_id)
+create_courses = asyncify(course.create_courses)
+update_specific_course = asyncify(course.update_specific_course)
+rating_course = asyncify(course.rating_course)
+get_courses_by_tag_id = asyncify(course.get_courses_by_tag_id)
+get_courses_by_tags = asyncify(course.get_courses_by_tags)
@@ -0,0 +1,4 @@
+from src.crud import search
+from src.crud.aio.base import asyncify
+
+search_courses = asyncify(search.search_courses)
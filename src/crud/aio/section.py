@@ -0,0 +1,10 @@
+from src.crud import section
+from src.crud.aio.base import asyncify
+
+get_all_sections = asyncify(section.get_all_sections)
+information_about_section = asyncify(section.information_about_section)
+mark_as_completed = asyncify(section.mark_as_completed)
+leave_section = asyncify(section.leave_section)
+add_section_to_course = asyncify(section.add_section_to_course)
+delete_section_from_course = asyncify(section.delete_section_from_course)
+update_info_about_section = asyncify(section.update_info_about_section)
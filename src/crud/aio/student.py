@@ -0,0 +1,8 @@
+from src.crud import student
+from src.crud.aio.base import asyncify
+
+# subscribe_to_course is not wrapped: it queues the owner's email.
+unsubscribe_from_course = asyncify(student.unsubscribe_from_course)
+rate_course = asyncify(student.rate_course)
+get_all_favorite_courses = asyncify(student.get_all_favorite_courses)
+toggle_favorite_course = asyncify(student.toggle_favorite_course)
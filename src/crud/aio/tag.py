@@ -0,0 +1,11 @@
+from src.crud import tag
+from src.crud.aio.base import asyncify
+
+get_tags = asyncify(tag.get_tags)
+get_courses_by_tag_id = asyncify(tag.get_courses_by_tag_id)
+create_tags = asyncify(tag.create_tags)
+delete_tags = asyncify(tag.delete_tags)
+add_tag_to_course = asyncify(tag.add_tag_to_course)
+delete_tag_from_course = asyncify(tag.delete_tag_from_course)
+search_course_by_tag = asyncify(tag.search_course_by_tag)
+return_all_tags = asyncify(tag.return_all_tags)
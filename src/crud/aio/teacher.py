@@ -0,0 +1,10 @@
+from src.crud import teacher
+from src.crud.aio.base import asyncify
+
+approve_student_by_token = asyncify(teacher.approve_student_by_token)
+remove_student_from_course = asyncify(teacher.remove_student_from_course)
+approve_student_by_id = asyncify(teacher.approve_student_by_id)
+list_pending_students = asyncify(teacher.list_pending_students)
+toggle_course_visibility_by_teacher = asyncify(
+    teacher.toggle_course_visibility_by_teacher
+)
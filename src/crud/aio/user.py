@@ -0,0 +1,25 @@
+from fastapi.concurrency import run_in_threadpool
+
+from src.core.security import hash_password
+from src.crud import user
+from src.crud.aio.base import asyncify
+
+# login_user, register_teacher and the update_*_info functions are not wrapped:
+# they hash passwords or queue email, which must not run on the event loop.
+get_by_id = asyncify(user.get_by_id)
+get_by_email = asyncify(user.get_by_email)
+get_user_info = asyncify(user.get_user_info)
+delete_user = asyncify(user.delete_user)
+_register_admin = asyncify(user.register_admin)
+_register_student = asyncify(user.register_student)
+
+
+# The hash is computed on the threadpool before the database work starts.
+async def register_admin(db, payload):
+    hashed_password = await run_in_threadpool(hash_password, payload.password)
+    return await _register_admin(db, payload, hashed_password)
+
+
+async def register_student(db, payload):
+    hashed_password = await run_in_threadpool(hash_password, payload.password)
+    return await _register_student(db, payload, hashed_password)
@@ -0,0 +1,268 @@
+import csv
+import io
+import json
+from itertools import batched
+from typing import IO, Iterable, Iterator
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from src.crud.tag import ensure_tags, insert_course_tags
+from src.models.models import Course, CourseTag, Section, Tag, Teacher
+from src.schemas.all_models import CourseImport
+from src.utils.custom_responses import BadRequest
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+FORMATS = ("jsonl", "csv")
+CSV_COLUMNS = [
+    "title",
+    "description",
+    "objectives",
+    "is_premium",
+    "is_hidden",
+    "owner_id",
+    "picture",
+    "tags",
+    "sections",
+]
+SECTION_FIELDS = ["title", "content", "description", "information", "link"]
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[tuple[int, dict | str]]:
+    """
+    (line number, record or error message) for every non-blank line.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, f"Invalid JSON: {exc.msg}"
+            continue
+        yield number, record if isinstance(record, dict) else "Expected an object"
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict | str]]:
+    """
+    Like read_jsonl for CSV with CSV_COLUMNS headers. ``tags`` is separated by
+    semicolons and ``sections`` holds a JSON array.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        record = {key: value for key, value in row.items() if value not in ("", None)}
+        try:
+            if "tags" in record:
+                record["tags"] = record["tags"].split(";")
+            if "sections" in record:
+                record["sections"] = json.loads(record["sections"])
+        except json.JSONDecodeError as exc:
+            yield reader.line_num, f"sections: invalid JSON: {exc.msg}"
+            continue
+        yield reader.line_num, record
+
+
+def read_records(file: IO[bytes], format: str) -> Iterator[tuple[int, dict | str]]:
+    if format not in FORMATS:
+        raise BadRequest(f"Unsupported format: {format}")
+    lines = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    return read_jsonl(lines) if format == "jsonl" else read_csv(lines)
+
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def import_batch(
+    db: Session, batch: list[tuple[int, CourseImport]], default_owner_id: UUID | None
+) -> list[dict]:
+    """
+    Insert one batch of validated courses with their sections and tags and
+    commit it. Returns the errors for records that were skipped.
+    """
+    errors = []
+    titles = [course.title for _, course in batch]
+    taken = set(
+        db.execute(select(Course.title).where(Course.title.in_(titles))).scalars()
+    )
+    owner_ids = {course.owner_id or default_owner_id for _, course in batch}
+    teachers = set(
+        db.execute(
+            select(Teacher.id).where(Teacher.id.in_(owner_ids - {None}))
+        ).scalars()
+    )
+
+    courses, sections, tagged = [], [], []
+    for line, course in batch:
+        owner_id = course.owner_id or default_owner_id
+        if course.title in taken:
+            errors.append({"line": line, "error": "Title already exists"})
+            continue
+        if owner_id not in teachers:
+            errors.append({"line": line, "error": "Owner must be an existing teacher"})
+            continue
+        taken.add(course.title)
+        course_id = uuid4()
+        courses.append(
+            {
+                "id": course_id,
+                "owner_id": owner_id,
+                "section_count": len(course.sections),
+                **course.model_dump(exclude={"owner_id", "tags", "sections"}),
+            }
+        )
+        sections.extend(
+            {
+                "id": uuid4(),
+                "course_id": course_id,
+                "position": position,
+                **section.model_dump(),
+            }
+            for position, section in enumerate(course.sections, start=1)
+        )
+        names = {name.strip() for name in course.tags if name.strip()}
+        tagged.append((course_id, names))
+
+    # executemany, batched into multi-row INSERTs by SQLAlchemy.
+    if courses:
+        db.execute(insert(Course), courses)
+    if sections:
+        db.execute(insert(Section), sections)
+    tag_ids = ensure_tags(db, (name for _, names in tagged for name in names))
+    insert_course_tags(
+        db,
+        [(course_id, tag_ids[name]) for course_id, names in tagged for name in names],
+    )
+    db.commit()
+    return errors
+
+
+def import_courses(
+    db: Session,
+    records: Iterable[tuple[int, dict | str]],
+    default_owner_id: UUID | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """
+    Validate and insert courses from read_records(), committing every
+    ``batch_size`` records so memory stays flat. Records that fail are
+    reported by line and skipped; the rest are imported.
+    """
+    imported = failed = 0
+    errors = []
+
+    def report(new_errors: list[dict]):
+        nonlocal failed
+        failed += len(new_errors)
+        errors.extend(new_errors[: MAX_REPORTED_ERRORS - len(errors)])
+
+    batch = []
+    for line, record in records:
+        if isinstance(record, str):
+            report([{"line": line, "error": record}])
+            continue
+        try:
+            batch.append((line, CourseImport.model_validate(record)))
+        except ValidationError as exc:
+            report([{"line": line, "error": validation_message(exc)}])
+            continue
+        if len(batch) >= batch_size:
+            batch_errors = import_batch(db, batch, default_owner_id)
+            imported += len(batch) - len(batch_errors)
+            report(batch_errors)
+            batch = []
+    if batch:
+        batch_errors = import_batch(db, batch, default_owner_id)
+        imported += len(batch) - len(batch_errors)
+        report(batch_errors)
+
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+
+def export_courses(
+    db: Session, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[CourseImport]:
+    """
+    Every course with its sections and tags, in id order. Each batch of
+    courses costs three queries, however many sections and tags it has.
+    """
+    last_id = None
+    while True:
+        query = select(Course).order_by(Course.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Course.id > last_id)
+        courses = db.execute(query).scalars().all()
+        if not courses:
+            return
+        ids = [course.id for course in courses]
+
+        sections: dict[UUID, list[dict]] = {course_id: [] for course_id in ids}
+        for section in db.execute(
+            select(Section)
+            .where(Section.course_id.in_(ids))
+            .order_by(Section.course_id, Section.position, Section.id)
+        ).scalars():
+            sections[section.course_id].append(
+                {field: getattr(section, field) or "" for field in SECTION_FIELDS}
+            )
+        tags: dict[UUID, list[str]] = {course_id: [] for course_id in ids}
+        for course_id, name in db.execute(
+            select(CourseTag.course_id, Tag.name)
+            .join(Tag, Tag.id == CourseTag.tag_id)
+            .where(CourseTag.course_id.in_(ids))
+            .order_by(Tag.name)
+        ):
+            tags[course_id].append(name)
+
+        for course in courses:
+            yield CourseImport(
+                title=course.title,
+                description=course.description or "",
+                objectives=course.objectives or "",
+                is_premium=bool(course.is_premium),
+                is_hidden=bool(course.is_hidden),
+                owner_id=course.owner_id,
+                picture=course.picture,
+                tags=tags[course.id],
+                sections=sections[course.id],
+            )
+        last_id = ids[-1]
+        # Release the batch; the session would otherwise keep every course.
+        db.expunge_all()
+
+
+def write_jsonl(courses: Iterable[CourseImport]) -> Iterator[str]:
+    for course in courses:
+        yield course.model_dump_json() + "\n"
+
+
+def write_csv(courses: Iterable[CourseImport]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for chunk in batched(courses, 100):
+        for course in chunk:
+            row = course.model_dump(mode="json")
+            row["tags"] = ";".join(course.tags)
+            row["sections"] = json.dumps(row["sections"]) if course.sections else ""
+            row["is_premium"] = str(course.is_premium).lower()
+            row["is_hidden"] = str(course.is_hidden).lower()
+            writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_records(courses: Iterable[CourseImport], format: str) -> Iterator[str]:
+    if format not in FORMATS:
+        raise BadRequest(f"Unsupported format: {format}")
+    return write_jsonl(courses) if format == "jsonl" else write_csv(courses)
@@ -1,157 +1,127 @@
 from typing import Optional
 from uuid import UUID
 
-from fastapi import File, HTTPException, UploadFile
-from sqlalchemy import not_
+from fastapi import HTTPException
+from sqlalchemy import and_, case, false, func, literal, not_, or_, select, true
 from sqlalchemy.orm import Session
 
-from src.models.models import Course, Role, StudentCourse, User
+from src.crud.access import access_context
+from src.crud.media import release_media
+from src.database.dialect import insert_dialect
+from src.models.models import (
+    Course,
+    CourseRatingBucket,
+    CourseTag,
+    Role,
+    Student,
+    StudentCourse,
+    User,
+)
 from src.models.models import Tag as TagModel
-from src.utils.s3 import upload_image_to_s3
+from src.utils.custom_responses import BadRequest
+from src.utils.pagination import DEFAULT_PAGE_SIZE, clamp_limit, decode_cursor
 
+RATING_BUCKETS = range(6)
 
-def get_course(db: Session, title: str, current_user: Optional[User] = None):
-    read_courses = db.query(Course)
-    if title:
-        read_courses = read_courses.filter(Course.title.ilike(f"%{title}%"))
 
-    if current_user is None:
-        return [
-            {
-                "id": course.id,
-                "title": course.title,
-                "description": course.description,
-                "objectives": course.objectives,
-                "picture": course.picture,
-                "rating": course.rating,
-                "is_premium": course.is_premium,
-                "owner_id": course.owner_id,
-            }
-            for course in read_courses.filter(not_(Course.is_hidden)).all()
-        ]
-
-    if current_user.role == Role.STUDENT:
-        read_courses = read_courses.filter(not_(Course.is_hidden))
-
-        approved_student = (
-            db.query(Course)
-            .join(StudentCourse)
-            .filter(
+def course_summary(course: Course, include_rating: bool = True) -> dict:
+    summary = {
+        "id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "objectives": course.objectives,
+        "picture": course.picture,
+        "rating": course.rating,
+        "is_premium": course.is_premium,
+        "owner_id": course.owner_id,
+    }
+    if not include_rating:
+        del summary["rating"]
+    return summary
+
+
+def entitlement_clause(current_user: Optional[User] = None):
+    """
+    SQL condition for "may see premium content". For students it relies on the
+    outer join added by with_entitlement().
+    """
+    if current_user is not None and current_user.role == Role.STUDENT:
+        return or_(not_(Course.is_premium), StudentCourse.course_id.isnot(None))
+    return true()
+
+
+def with_entitlement(db: Session, current_user: Optional[User] = None):
+    """
+    Query of (Course, is_entitled) rows. For students ``is_entitled`` is computed
+    in SQL from an outer join on their approved enrollments, so premium courses
+    can be redacted without a second query; every other caller is entitled.
+    """
+    if current_user is not None and current_user.role == Role.STUDENT:
+        is_entitled = case((entitlement_clause(current_user), True), else_=False)
+        return db.query(Course, is_entitled.label("is_entitled")).outerjoin(
+            StudentCourse,
+            and_(
+                StudentCourse.course_id == Course.id,
                 StudentCourse.student_id == current_user.id,
-                StudentCourse.is_approved == True,  # noqa: E712
-            )
-            .all()
+                StudentCourse.is_approved.is_(True),
+            ),
         )
+    return db.query(Course, literal(True).label("is_entitled"))
 
-        approved_courses = [course.id for course in approved_student]
-
-        result = []
-        for course in read_courses.all():
-            if not course.is_premium or course.id in approved_courses:
-                result.append(
-                    {
-                        "id": course.id,
-                        "title": course.title,
-                        "description": course.description,
-                        "objectives": course.objectives,
-                        "picture": course.picture,
-                        "rating": course.rating,
-                        "is_premium": course.is_premium,
-                        "owner_id": course.owner_id,
-                    }
-                )
-            else:
-                result.append(
-                    {
-                        "id": course.id,
-                        "title": course.title,
-                        "description": course.description,
-                        "objectives": course.objectives,
-                        "picture": course.picture,
-                        "is_premium": course.is_premium,
-                        "owner_id": course.owner_id,
-                    }
-                )
-        return result
 
+def visible_courses(db: Session, current_user: Optional[User] = None):
+    """
+    with_entitlement() restricted to the courses the user may list.
+    """
+    query = with_entitlement(db, current_user)
+    if current_user is None or current_user.role == Role.STUDENT:
+        return query.filter(not_(Course.is_hidden))
     if current_user.role == Role.TEACHER:
-        result = []
-        for course in read_courses.all():
-            if course.owner_id == current_user.id:
-                result.append(
-                    {
-                        "id": course.id,
-                        "title": course.title,
-                        "description": course.description,
-                        "objectives": course.objectives,
-                        "picture": course.picture,
-                        "rating": course.rating,
-                        "is_premium": course.is_premium,
-                        "owner_id": course.owner_id,
-                    }
-                )
-            elif not course.is_hidden:
-                result.append(
-                    {
-                        "id": course.id,
-                        "title": course.title,
-                        "description": course.description,
-                        "objectives": course.objectives,
-                        "picture": course.picture,
-                        "rating": course.rating,
-                        "is_premium": course.is_premium,
-                        "owner_id": course.owner_id,
-                    }
-                )
-        return result
+        return query.filter(
+            or_(Course.owner_id == current_user.id, not_(Course.is_hidden))
+        )
     if current_user.role == Role.ADMIN:
-        return [
-            {
-                "id": course.id,
-                "title": course.title,
-                "description": course.description,
-                "objectives": course.objectives,
-                "picture": course.picture,
-                "rating": course.rating,
-                "is_premium": course.is_premium,
-                "owner_id": course.owner_id,
-            }
-            for course in read_courses.all()
-        ]
+        return query
+    return query.filter(false())
+
+
+def paginate_courses(query, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """
+    Keyset pagination over (title, id); the cursor is the key of the last row
+    of the previous page.
+    """
+    if cursor:
+        title, last_id = decode_cursor(cursor, size=2)
+        try:
+            last_id = UUID(last_id)
+        except ValueError:
+            raise BadRequest("Invalid cursor")
+        query = query.filter(
+            or_(Course.title > title, and_(Course.title == title, Course.id > last_id))
+        )
+    return query.order_by(Course.title, Course.id).limit(clamp_limit(limit))
 
-    return []
+
+def get_course(
+    db: Session,
+    title: str,
+    current_user: Optional[User] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None,
+):
+    read_courses = visible_courses(db, current_user)
+    if title:
+        read_courses = read_courses.filter(Course.title.ilike(f"%{title}%"))
+
+    return [
+        course_summary(course, include_rating=is_entitled)
+        for course, is_entitled in paginate_courses(read_courses, limit, cursor).all()
+    ]
 
 
 def get_course_by_id(db: Session, id: UUID, current_user: Optional[User] = None):
-    course = db.query(Course).filter(Course.id == id).first()
-    if not course:
-        raise HTTPException(status_code=403, detail="Course not found")
-    if current_user is None:
-        if course.is_hidden or course.is_premium:
-            raise HTTPException(status_code=403, detail="Access denied")
-        return course
-    if current_user.role == Role.STUDENT:
-        if course.is_hidden:
-            raise HTTPException(status_code=403, detail="This course is hidden")
-        if course.is_premium:
-            enrolled_premium = (
-                db.query(StudentCourse)
-                .filter(
-                    StudentCourse.student_id == current_user.id,
-                    StudentCourse.course_id == course.id,
-                )
-                .first()
-            )
-            if not enrolled_premium:
-                raise HTTPException(
-                    status_code=403,
-                    detail="You do not have enrolled in this premium course",
-                )
-    if current_user.role == Role.TEACHER:
-        if course.is_hidden or course.owner_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Access denied")
-        return course
-    return course
+    context = access_context(db, current_user)
+    return context.check_view(context.course(id))
 
 
 def create_courses(
@@ -161,13 +131,8 @@ def create_courses(
     objectives: str,
     is_premium: bool,
     owner_id: UUID,
-    picture: UploadFile = File(None),
+    picture: str | None = None,
 ):
-    if picture:
-        picture_path = upload_image_to_s3(picture)
-    else:
-        picture_path = None
-
     existing_title = db.query(Course).filter(Course.title == title).first()
     if existing_title:
         raise HTTPException(status_code=400, detail="Title already exists")
@@ -175,7 +140,7 @@ def create_courses(
         title=title,
         description=description,
         objectives=objectives,
-        picture=picture_path,
+        picture=picture,
         is_premium=is_premium,
         owner_id=owner_id,
     )
@@ -193,7 +158,7 @@ def update_specific_course(
     description: str = None,
     objectives: str = None,
     is_premium: bool = None,
-    picture: UploadFile = None,
+    picture: str | None = None,
 ):
     if current_user is None:
         raise HTTPException(status_code=404, detail="User not found")
@@ -214,8 +179,9 @@ def update_specific_course(
             course.objectives = objectives
         if is_premium is not None:
             course.is_premium = is_premium
-        if picture:
-            course.picture = upload_image_to_s3(picture)
+        if picture and picture != course.picture:
+            release_media(db, course.picture)
+            course.picture = picture
         db.commit()
         db.refresh(course)
         return course
@@ -225,81 +191,156 @@ def update_specific_course(
         )
 
 
-def rating_course(db: Session, id: UUID):
+def rating_bucket(score: float) -> int:
+    return min(int(score), RATING_BUCKETS[-1])
+
+
+def bump_rating_bucket(db: Session, course_id: UUID, bucket: int, delta: int):
+    if delta < 0:
+        db.query(CourseRatingBucket).filter(
+            CourseRatingBucket.course_id == course_id,
+            CourseRatingBucket.bucket == bucket,
+        ).update(
+            {CourseRatingBucket.count: CourseRatingBucket.count + delta},
+            synchronize_session=False,
+        )
+        return
+    statement = (
+        insert_dialect(db)
+        .insert(CourseRatingBucket)
+        .values(course_id=course_id, bucket=bucket, count=delta)
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CourseRatingBucket.course_id, CourseRatingBucket.bucket],
+            set_={"count": CourseRatingBucket.count + delta},
+        )
+    )
+
+
+def record_rating(
+    db: Session,
+    course_id: UUID,
+    old_score: Optional[float] = None,
+    new_score: Optional[float] = None,
+):
+    """
+    Apply one student's rating change to the stored aggregates of a course.
+    ``None`` means "not rated", so (None, 4) adds a rating and (4, None) removes
+    it. Counters are updated relative to their current value in SQL, so
+    concurrent ratings of the same course do not overwrite each other.
+    """
+    count_delta = (new_score is not None) - (old_score is not None)
+    sum_delta = (new_score or 0.0) - (old_score or 0.0)
+    if count_delta or sum_delta:
+        count = Course.rating_count + count_delta
+        total = Course.rating_sum + sum_delta
+        db.query(Course).filter(Course.id == course_id).update(
+            {
+                Course.rating_count: count,
+                Course.rating_sum: total,
+                Course.rating: case((count > 0, total / count), else_=0.0),
+            },
+            synchronize_session=False,
+        )
+
+    old_bucket = rating_bucket(old_score) if old_score is not None else None
+    new_bucket = rating_bucket(new_score) if new_score is not None else None
+    if old_bucket != new_bucket:
+        if old_bucket is not None:
+            bump_rating_bucket(db, course_id, old_bucket, -1)
+        if new_bucket is not None:
+            bump_rating_bucket(db, course_id, new_bucket, 1)
+
+
+def rating_course(
+    db: Session, id: UUID, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None
+):
+    """
+    Stored rating aggregates of a course plus one page of individual ratings,
+    ordered by student. Pass the ``student_id`` of the last rating back as
+    ``cursor`` for the next page.
+    """
     course = db.query(Course).filter(Course.id == id).first()
     if not course:
         raise HTTPException(status_code=403, detail="Course not found")
 
-    ratings = (
-        db.query(StudentCourse)
+    query = (
+        db.query(StudentCourse.student_id, StudentCourse.score, Student.first_name)
+        .outerjoin(Student, Student.id == StudentCourse.student_id)
         .filter(StudentCourse.course_id == course.id, StudentCourse.score.isnot(None))
-        .all()
     )
-
-    if ratings:
-        total_score = sum(rating.score for rating in ratings)
-        max_score = len(ratings) * 10
-        avg_rating = total_score / max_score
-        course.rating = avg_rating * 10
-    else:
-        course.rating = 0.0
-
-    db.commit()
-    db.refresh(course)
+    if cursor:
+        (after_id,) = decode_cursor(cursor)
+        try:
+            after_id = UUID(after_id)
+        except ValueError:
+            raise BadRequest("Invalid cursor")
+        query = query.filter(StudentCourse.student_id > after_id)
+    ratings = query.order_by(StudentCourse.student_id).limit(clamp_limit(limit)).all()
+
+    histogram = dict.fromkeys(RATING_BUCKETS, 0)
+    for bucket in course.rating_buckets:
+        histogram[bucket.bucket] = bucket.count
 
     return {
         "title": course.title,
         "rating": course.rating,
+        "rating_count": course.rating_count,
+        "histogram": histogram,
         "ratings": [
             {
-                "student_name": (
-                    rating.student.first_name if rating.student else "Anonymous"
-                ),
-                "score": rating.score,
+                "student_id": student_id,
+                "student_name": first_name or "Anonymous",
+                "score": score,
             }
-            for rating in ratings
+            for student_id, score, first_name in ratings
         ],
     }
 
 
-def get_courses_by_tag_id(
-    db: Session, tag_id: UUID, current_user: Optional[User] = None
+def with_tags(query, tag_ids: list[UUID], match_all: bool = False):
+    """
+    Restrict a course query to courses tagged with any (or every) tag in
+    ``tag_ids``, through a semi-join on course_tags so rows are not repeated.
+    """
+    matching = select(CourseTag.course_id).where(CourseTag.tag_id.in_(tag_ids))
+    if match_all:
+        matching = matching.group_by(CourseTag.course_id).having(
+            func.count(CourseTag.tag_id) == len(tag_ids)
+        )
+    return query.filter(Course.id.in_(matching))
+
+
+def get_courses_by_tags(
+    db: Session,
+    tag_ids: list[UUID],
+    current_user: Optional[User] = None,
+    match_all: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None,
 ):
-    tag = db.query(TagModel).filter(TagModel.id == tag_id).first()
-    if tag is None:
+    tag_ids = list(set(tag_ids))
+    if not tag_ids:
+        raise BadRequest("At least one tag is required")
+    found = db.query(func.count(TagModel.id)).filter(TagModel.id.in_(tag_ids)).scalar()
+    if found != len(tag_ids):
         raise HTTPException(status_code=404, detail="Tag not found")
 
-    course_tags = tag.course_tags
-    courses = [ct.course for ct in course_tags if ct.course is not None]
-
-    result = []
-
-    for course in courses:
-        if current_user is None:
-            if not course.is_hidden:
-                result.append(course)
-        elif current_user.role == Role.STUDENT:
-            if not course.is_hidden and (
-                not course.is_premium
-                or any(c.id == course.id for c in current_user.student.courses)
-            ):
-                result.append(course)
-        elif current_user.role == Role.TEACHER:
-            if course.owner_id == current_user.id or not course.is_hidden:
-                result.append(course)
-        elif current_user.role == Role.ADMIN:
-            result.append(course)
+    query = with_tags(visible_courses(db, current_user), tag_ids, match_all)
+    rows = paginate_courses(
+        query.filter(entitlement_clause(current_user)), limit, cursor
+    ).all()
+    return [course_summary(course) for course, _ in rows]
 
-    return [
-        {
-            "id": course.id,
-            "title": course.title,
-            "description": course.description,
-            "objectives": course.objectives,
-            "picture": course.picture,
-            "rating": course.rating,
-            "is_premium": course.is_premium,
-            "owner_id": course.owner_id,
-        }
-        for course in result
-    ]
+
+def get_courses_by_tag_id(
+    db: Session,
+    tag_id: UUID,
+    current_user: Optional[User] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None,
+):
+    return get_courses_by_tags(
+        db, [tag_id], current_user=current_user, limit=limit, cursor=cursor
+    )
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.models.models import Course, MediaObject, Student, Teacher
+from src.utils.media import rendition_keys
+from src.utils.storage import get_storage
+
+
+def release_media(db: Session, url: str | None):
+    """
+    Mark the image at ``url`` as possibly unreferenced. Call it in the same
+    transaction that replaces or deletes the picture; it is a no-op for
+    pictures uploaded before media tracking existed.
+    """
+    if not url:
+        return
+    db.query(MediaObject).filter(MediaObject.url == url).update(
+        {MediaObject.orphaned_at: datetime.now(timezone.utc)},
+        synchronize_session=False,
+    )
+
+
+def is_referenced():
+    return or_(
+        exists().where(Teacher.profile_picture == MediaObject.url),
+        exists().where(Student.profile_picture == MediaObject.url),
+        exists().where(Course.picture == MediaObject.url),
+    )
+
+
+def collect_media_garbage(
+    db: Session,
+    grace: float = settings.MEDIA_GC_GRACE,
+    batch_size: int = settings.MEDIA_GC_BATCH,
+) -> dict:
+    """
+    Delete stored images that have been unreferenced for at least ``grace``
+    seconds, ``batch_size`` at a time. Candidates that turn out to be in use
+    again are unmarked.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+    storage = get_storage()
+    deleted = kept = 0
+    while True:
+        # Row locks make concurrent uploads of the same content wait for this
+        # batch; see src.utils.media.upload_image.
+        candidates = (
+            db.query(MediaObject.key, is_referenced())
+            .filter(MediaObject.orphaned_at < cutoff)
+            .order_by(MediaObject.orphaned_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        in_use = [key for key, referenced in candidates if referenced]
+        orphans = [key for key, referenced in candidates if not referenced]
+        if in_use:
+            db.query(MediaObject).filter(MediaObject.key.in_(in_use)).update(
+                {MediaObject.orphaned_at: None}, synchronize_session=False
+            )
+        if orphans:
+            # Main renditions first: a set without its main key counts as gone.
+            storage.delete_many(orphans)
+            storage.delete_many(
+                [key for orphan in orphans for key in rendition_keys(orphan)[1:]]
+            )
+            db.query(MediaObject).filter(MediaObject.key.in_(orphans)).delete(
+                synchronize_session=False
+            )
+        db.commit()
+        deleted += len(orphans)
+        kept += len(in_use)
+        if len(candidates) < batch_size:
+            return {"deleted": deleted, "kept": kept}
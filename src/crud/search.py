@@ -0,0 +1,250 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Hashable, Iterable, Optional
+
+from sqlalchemy import case, event, func, literal, or_, select
+from sqlalchemy.orm import Session
+
+from src.crud.course import course_summary, visible_courses
+from src.models.models import Course, CourseTag, Tag, User
+from src.utils.custom_responses import BadRequest
+from src.utils.pagination import clamp_limit
+
+DEFAULT_SEARCH_LIMIT = 20
+# Same default as pg_trgm.similarity_threshold, so both paths agree on "fuzzy".
+SIMILARITY_THRESHOLD = 0.3
+PREFIX_BONUS = 1.0
+MAX_CANDIDATES = 1000
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    return " ".join(_WORD.findall((text or "").lower()))
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Trigrams the way pg_trgm builds them: every word is padded with two spaces
+    in front and one behind.
+    """
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    left, right = trigrams(a), trigrams(b)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def is_prefix(term: str, text: str) -> bool:
+    """
+    ``term`` starts the text or one of its words.
+    """
+    return f" {text}".find(f" {term}") != -1
+
+
+class TrigramIndex:
+    """
+    In-memory inverted index from trigram to keys, used where pg_trgm is not
+    available (SQLite in development and tests).
+    """
+
+    def __init__(self, entries: Iterable[tuple[Hashable, str]] = ()):
+        self.texts: dict[Hashable, str] = {}
+        self.grams: dict[Hashable, set[str]] = {}
+        self.postings: dict[str, set[Hashable]] = defaultdict(set)
+        for key, text in entries:
+            self.add(key, text)
+
+    def add(self, key: Hashable, text: str):
+        self.texts[key] = normalize(text)
+        self.grams[key] = trigrams(text)
+        for gram in self.grams[key]:
+            self.postings[gram].add(key)
+
+    def search(self, term: str, threshold: float = SIMILARITY_THRESHOLD):
+        """
+        Score every key whose text starts with ``term`` (at a word boundary) or
+        is at least ``threshold`` similar to it. Prefix matches rank first.
+        """
+        term = normalize(term)
+        term_grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in term_grams:
+            for key in self.postings.get(gram, ()):
+                shared[key] += 1
+
+        scores = {}
+        for key, common in shared.items():
+            score = common / (len(term_grams) + len(self.grams[key]) - common)
+            if is_prefix(term, self.texts[key]):
+                scores[key] = PREFIX_BONUS + score
+            elif score >= threshold:
+                scores[key] = score
+        return scores
+
+
+class CourseSearchIndex:
+    def __init__(self, courses, tags, links):
+        self.titles = TrigramIndex(courses)
+        self.tags = TrigramIndex(tags)
+        self.tag_courses = defaultdict(list)
+        for course_id, tag_id in links:
+            self.tag_courses[tag_id].append(course_id)
+
+    @classmethod
+    def load(cls, db: Session):
+        return cls(
+            db.query(Course.id, Course.title).all(),
+            db.query(Tag.id, Tag.name).all(),
+            db.query(CourseTag.course_id, CourseTag.tag_id).all(),
+        )
+
+    def rank(self, term: str) -> dict:
+        """
+        Course id -> score, where a course scores the better of its title and
+        its best matching tag.
+        """
+        ranks = self.titles.search(term)
+        for tag_id, score in self.tags.search(term).items():
+            for course_id in self.tag_courses.get(tag_id, ()):
+                if score > ranks.get(course_id, 0.0):
+                    ranks[course_id] = score
+        return ranks
+
+
+_index_lock = threading.Lock()
+_indexes: dict = {}
+_generation = 0
+
+
+def get_search_index(db: Session) -> CourseSearchIndex:
+    engine = db.get_bind()
+    with _index_lock:
+        index = _indexes.get(engine)
+        generation = _generation
+    if index is not None:
+        return index
+
+    index = CourseSearchIndex.load(db)
+    with _index_lock:
+        # A commit that landed while we were loading makes this copy stale.
+        if generation == _generation:
+            _indexes[engine] = index
+    return index
+
+
+def invalidate_search_index():
+    global _generation
+    with _index_lock:
+        _generation += 1
+        _indexes.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_search_dirty(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Course, Tag, CourseTag)):
+            session.info["search_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_search_dirty_bulk(orm_execute_state):
+    # Bulk inserts/updates/deletes bypass the flush.
+    mapper = orm_execute_state.bind_mapper
+    if not orm_execute_state.is_select and mapper is not None:
+        if mapper.class_ in (Course, Tag, CourseTag):
+            orm_execute_state.session.info["search_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_search_index(session):
+    if session.info.pop("search_dirty", False):
+        invalidate_search_index()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_search_dirty(session, previous_transaction):
+    session.info.pop("search_dirty", None)
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def trigram_search(db: Session, term: str, current_user: Optional[User] = None):
+    """
+    Postgres path: ``%`` and prefix ``ILIKE`` are both answered by the
+    gin_trgm_ops indexes on courses.title and tags.name.
+    """
+    prefix = escape_like(term) + "%"
+    word_prefix = "% " + prefix
+    title_prefix = or_(Course.title.ilike(prefix), Course.title.ilike(word_prefix))
+    tag_prefix = or_(Tag.name.ilike(prefix), Tag.name.ilike(word_prefix))
+    tag_match = or_(Tag.name.op("%")(term), tag_prefix)
+    tag_score = (
+        select(
+            func.max(
+                func.similarity(Tag.name, term)
+                + case((tag_prefix, PREFIX_BONUS), else_=0.0)
+            )
+        )
+        .join(CourseTag, CourseTag.tag_id == Tag.id)
+        .where(CourseTag.course_id == Course.id, tag_match)
+        .scalar_subquery()
+    )
+    title_score = func.similarity(Course.title, term) + case(
+        (title_prefix, PREFIX_BONUS), else_=0.0
+    )
+    rank = func.greatest(title_score, func.coalesce(tag_score, literal(0.0)))
+    tagged = (
+        select(CourseTag.course_id)
+        .join(Tag, Tag.id == CourseTag.tag_id)
+        .where(tag_match)
+    )
+
+    return (
+        visible_courses(db, current_user)
+        .filter(or_(Course.title.op("%")(term), title_prefix, Course.id.in_(tagged)))
+        .order_by(rank.desc(), Course.title, Course.id)
+    )
+
+
+def search_courses(
+    db: Session,
+    q: str,
+    current_user: Optional[User] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+):
+    """
+    Courses whose title or tags match ``q`` by prefix or trigram similarity,
+    best match first.
+    """
+    term = normalize(q)
+    if not term:
+        raise BadRequest("Search term cannot be empty")
+    limit = clamp_limit(limit)
+
+    if db.get_bind().dialect.name == "postgresql":
+        rows = trigram_search(db, term, current_user).limit(limit).all()
+    else:
+        ranks = get_search_index(db).rank(term)
+        best = sorted(ranks, key=ranks.get, reverse=True)[:MAX_CANDIDATES]
+        if not best:
+            return []
+        rows = visible_courses(db, current_user).filter(Course.id.in_(best)).all()
+        rows.sort(key=lambda row: (-ranks[row[0].id], row[0].title))
+        rows = rows[:limit]
+
+    return [
+        course_summary(course, include_rating=is_entitled)
+        for course, is_entitled in rows
+    ]
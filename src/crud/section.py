@@ -2,12 +2,17 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session, load_only
 
+from src.crud.access import access_context
 from src.crud.course import get_course_by_id
-from src.models.models import Course, Section, StudentCourse, User
+from src.crud.stats import contribution, record_enrollment, refresh_course_stats
+from src.database.dialect import insert_dialect
+from src.models.models import CompletedSection, Course, Section, StudentCourse, User
 from src.schemas.all_models import Role, SectionCreate, SectionUpdate
-from src.utils.custom_responses import Unauthorized
+from src.utils.custom_responses import BadRequest, Unauthorized
+from src.utils.pagination import DEFAULT_PAGE_SIZE, clamp_limit, decode_cursor
 
 
 def get_all_sections(
@@ -15,120 +20,210 @@ def get_all_sections(
     course_id: UUID,
     title: Optional[str] = None,
     current_user: Optional[User] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None,
 ):
+    """
+    One page of a course outline in section order. The large text columns
+    are not loaded; fetch a single section for its content. Pass the
+    ``position`` and ``id`` of the last section back as ``cursor`` for the
+    next page.
+    """
     get_course_by_id(db, course_id, current_user)
-    sections1 = db.query(Section).filter(Section.course_id == course_id)
+    query = (
+        db.query(Section)
+        .options(
+            load_only(Section.id, Section.title, Section.description, Section.position)
+        )
+        .filter(Section.course_id == course_id)
+    )
     if title:
-        sections = db.query(Section).filter(Section.title.ilike(f"%{title}%"))
-    sections = sections1.order_by(Section.id.asc()).all()
+        query = query.filter(Section.title.ilike(f"%{title}%"))
+    if cursor:
+        position, last_id = decode_cursor(cursor, size=2)
+        try:
+            position, last_id = int(position), UUID(last_id)
+        except ValueError:
+            raise BadRequest("Invalid cursor")
+        query = query.filter(
+            or_(
+                Section.position > position,
+                and_(Section.position == position, Section.id > last_id),
+            )
+        )
+    sections = (
+        query.order_by(Section.position, Section.id).limit(clamp_limit(limit)).all()
+    )
     return [
         {
             "id": section.id,
             "title": section.title,
             "description": section.description,
-            "content": section.content,
+            "position": section.position,
         }
         for section in sections
     ]
 
 
+def next_position(course_id: UUID):
+    """
+    The position after the last section of a course, as a SQL expression.
+    """
+    return (
+        select(func.coalesce(func.max(Section.position), 0) + 1)
+        .where(Section.course_id == course_id)
+        .scalar_subquery()
+    )
+
+
 def information_about_section(
     db: Session, section_id: UUID, current_user: Optional[User] = None
 ):
-    section = db.query(Section).filter(Section.id == section_id).first()
-    get_course_by_id(db, section.course_id, current_user)
-    course = section.course
-    if not section:
-        raise HTTPException(status_code=403, detail="Section not found")
+    """
+    A section with its content. The section, its course and the student's
+    enrollment come from one query; viewing a free course enrolls the student.
+    """
+    context = access_context(db, current_user)
+    section, access = context.section(section_id)
+    context.check_view(access)
     if current_user.role in [Role.TEACHER, Role.ADMIN]:
         return section
-    student_course = (
-        db.query(StudentCourse)
-        .filter(
-            StudentCourse.student_id == current_user.id,
-            StudentCourse.course_id == section.course_id,
-        )
-        .first()
-    )
-    if not student_course and not course.is_premium:
-        student_course = StudentCourse(
+    info = {
+        "title": section.title,
+        "content": section.content,
+        "description": section.description,
+        "information": section.information,
+        "progress": access.enrollment.progress if access.enrollment else 0,
+        "course_id": section.course_id,
+    }
+    if access.enrollment is None:
+        enrollment = StudentCourse(
             student_id=current_user.id,
-            course_id=course.id,
+            course_id=section.course_id,
             is_approved=True,
             progress=0,
             is_visited=False,
         )
-        db.add(student_course)
+        db.add(enrollment)
+        record_enrollment(db, section.course_id, new=contribution(enrollment))
         db.commit()
-        db.refresh(student_course)
-    if course.is_premium:
-        if not student_course or not student_course.is_approved:
-            raise HTTPException(
-                status_code=403, detail="You are not approved for this course!"
+    return info
+
+
+def progress_of(completed, section_count):
+    """
+    Whole percent of a course's sections completed, as a SQL expression.
+    """
+    return case((section_count > 0, completed * 100 // section_count), else_=0)
+
+
+def refresh_progress(db: Session, course_id: UUID):
+    """
+    Recompute every enrolled student's progress after the number of sections
+    in the course changed.
+    """
+    section_count = (
+        select(Course.section_count).where(Course.id == course_id).scalar_subquery()
+    )
+    db.query(StudentCourse).filter(StudentCourse.course_id == course_id).update(
+        {
+            StudentCourse.progress: progress_of(
+                StudentCourse.completed_sections, section_count
             )
-    return {
-        "title": section.title,
-        "content": section.content,
-        "description": section.description,
-        "information": section.information,
-        "progress": student_course.progress,
-        "course_id": section.course_id,
-    }
+        },
+        synchronize_session=False,
+    )
+
+
+def forget_completed_sections(db: Session, student_id: UUID, course_id: UUID):
+    """
+    Drop a student's completed sections when they leave a course, so that
+    enrolling again starts from zero.
+    """
+    db.query(CompletedSection).filter(
+        CompletedSection.student_id == student_id,
+        CompletedSection.course_id == course_id,
+    ).delete(synchronize_session=False)
 
 
 def mark_as_completed(db: Session, section_id: UUID, current_user: User):
-    section = db.query(Section).filter(Section.id == section_id).first()
-    if not section:
-        raise HTTPException(status_code=403, detail="Section not found")
-    course = db.query(Course).filter(Course.id == section.course_id).first()
-    if not course:
-        raise HTTPException(status_code=403, detail="Course not found")
-    student_course = (
-        db.query(StudentCourse)
-        .filter_by(student_id=current_user.id, course_id=course.id)
-        .first()
-    )
-    if not student_course:
-        if course.is_premium:
+    """
+    Record the section as completed by the student and return their progress
+    in the course. Completing a section twice changes nothing. The insert is
+    an upsert that ignores repeats, and only a new completion moves the
+    stored counter, relative to its current value.
+    """
+    section, access = access_context(db, current_user).section(section_id)
+    course_id = section.course_id
+    enrollment = access.enrollment
+    progress = enrollment.progress if enrollment else 0
+    old = new = None
+    if enrollment is None:
+        if access.course.is_premium:
             raise HTTPException(
                 status_code=403, detail="You are not approved for this course!"
             )
-        student_course = StudentCourse(
+        enrollment = StudentCourse(
             student_id=current_user.id,
-            course_id=course.id,
+            course_id=course_id,
             is_approved=True,
             progress=0,
             is_visited=False,
         )
-        db.add(student_course)
-        db.commit()
-        db.refresh(student_course)
-    total_sections = db.query(Section).filter(Section.course_id == course.id).count()
-    if total_sections == 0:
-        raise HTTPException(status_code=403, detail="No sections in this course")
-    formula = 100 / total_sections
-    if student_course.progress < 100:
-        student_course.progress = min(100, student_course.progress + formula)
-        db.commit()
-        db.refresh(student_course)
+        db.add(enrollment)
+        db.flush()
+        new = contribution(enrollment)
+
+    statement = (
+        insert_dialect(db)
+        .insert(CompletedSection)
+        .values(student_id=current_user.id, section_id=section_id, course_id=course_id)
+        .on_conflict_do_nothing()
+    )
+    if db.execute(statement).rowcount:
+        section_count = (
+            select(Course.section_count).where(Course.id == course_id).scalar_subquery()
+        )
+        completed = StudentCourse.completed_sections + 1
+        written = db.execute(
+            update(StudentCourse)
+            .where(
+                StudentCourse.student_id == current_user.id,
+                StudentCourse.course_id == course_id,
+                StudentCourse.completed_sections < section_count,
+            )
+            .values(
+                completed_sections=completed,
+                progress=progress_of(completed, section_count),
+            )
+            .returning(
+                StudentCourse.is_approved,
+                progress_of(StudentCourse.completed_sections - 1, section_count),
+                StudentCourse.progress,
+            )
+            .execution_options(synchronize_session=False)
+        ).first()
+        if written is not None:
+            # The counters move by what the row held before and after this
+            # update. The enrollment read above takes no lock, so a racing
+            # completion may already have moved its progress.
+            is_approved, previous, progress = written
+            if new is None:
+                old = contribution(
+                    enrollment, is_approved=is_approved, progress=previous
+                )
+            new = contribution(enrollment, is_approved=is_approved, progress=progress)
+    if new is not None:
+        record_enrollment(db, course_id, old, new)
+    db.commit()
 
-    return {"progress": student_course.progress}
+    return {"progress": progress or 0}
 
 
 def leave_section(db: Session, section_id: UUID, current_user: User):
-    section = db.query(Section).filter(Section.id == section_id).first()
-    if not section:
-        raise HTTPException(status_code=403, detail="Section not found")
-    student_course = (
-        db.query(StudentCourse)
-        .filter(
-            StudentCourse.student_id == current_user.id,
-            StudentCourse.course_id == section.course_id,
-        )
-        .first()
-    )
-    if student_course:
-        student_course.is_visited = False
+    _, access = access_context(db, current_user).section(section_id)
+    if access.enrollment:
+        access.enrollment.is_visited = False
         db.commit()
 
     return {"message": "You left this section"}
@@ -140,10 +235,7 @@ def add_section_to_course(
     course_id: UUID,
     current_user: Optional[User] = None,
 ):
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-
+    course = access_context(db, current_user).course(course_id, missing=404).course
     if course.owner_id != current_user.id:
         raise Unauthorized("Only owner can create sections")
     existing_title = db.query(Section).filter(Section.title == payload.title).first()
@@ -155,8 +247,14 @@ def add_section_to_course(
         description=payload.description,
         information=payload.information,
         course_id=course_id,
+        position=next_position(course_id),
     )
     db.add(new_section)
+    db.query(Course).filter(Course.id == course_id).update(
+        {Course.section_count: Course.section_count + 1}, synchronize_session=False
+    )
+    refresh_progress(db, course_id)
+    refresh_course_stats(db, course_id)
     db.commit()
     db.refresh(new_section)
     return {"message": f"Section {payload.title} added to course: {course.title}"}
@@ -167,10 +265,27 @@ def delete_section_from_course(
 ):
     if section is None:
         raise HTTPException(status_code=404, detail="Course not found")
-    course = db.query(Course).filter(Course.id == section.course_id).first()
+    course = access_context(db, current_user).course(section.course_id).course
     if course.owner_id != current_user.id and current_user.role != Role.ADMIN:
         raise Unauthorized("Only owner can delete sections")
+    db.query(StudentCourse).filter(
+        StudentCourse.course_id == course.id,
+        StudentCourse.student_id.in_(
+            select(CompletedSection.student_id).where(
+                CompletedSection.section_id == section.id
+            )
+        ),
+    ).update(
+        {StudentCourse.completed_sections: StudentCourse.completed_sections - 1},
+        synchronize_session=False,
+    )
+    db.query(Course).filter(Course.id == course.id).update(
+        {Course.section_count: Course.section_count - 1}, synchronize_session=False
+    )
     db.delete(section)
+    db.flush()
+    refresh_progress(db, course.id)
+    refresh_course_stats(db, course.id)
     db.commit()
     return {"message": f"Section {section.title} deleted"}
 
@@ -181,12 +296,8 @@ def update_info_about_section(
     payload: SectionUpdate,
     current_user: Optional[User] = None,
 ):
-    section = db.query(Section).filter(Section.id == section_id).first()
-    if not section:
-        raise HTTPException(status_code=404, detail="Section not found")
-    course = db.query(Course).filter(Course.id == section.course_id).first()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
+    section, access = access_context(db, current_user).section(section_id, missing=404)
+    course = access.course
     if course.owner_id != current_user.id and current_user.role != Role.ADMIN:
         raise HTTPException(
             status_code=403, detail="You dont have permission to edit this section"
@@ -201,6 +312,8 @@ def update_info_about_section(
         section.information = payload.information
     if payload.link is not None:
         section.link = payload.link
+    if payload.position is not None:
+        section.position = payload.position
     db.commit()
     db.refresh(section)
     return section
@@ -0,0 +1,216 @@
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import case, func, insert, not_, select
+from sqlalchemy.orm import Session
+
+from src.database.dialect import insert_dialect
+from src.models.models import Course, CourseStats, StudentCourse, Teacher
+
+STAT_FIELDS = (
+    "enrolled",
+    "pending",
+    "favorited",
+    "completed",
+    "progress_sum",
+    "rating_count",
+    "rating_sum",
+)
+
+
+def contribution(enrollment: Optional[StudentCourse], **changes) -> dict:
+    """
+    What one enrollment adds to the counters of its course. ``changes``
+    override attributes of the enrollment, for values written in SQL.
+    Progress only counts once the enrollment is approved, so that
+    ``progress_sum`` stays a sum over the ``enrolled`` rows.
+    """
+    if enrollment is None:
+        return dict.fromkeys(STAT_FIELDS, 0)
+    values = {
+        "is_approved": enrollment.is_approved,
+        "is_favorite": enrollment.is_favorite,
+        "progress": enrollment.progress,
+        "score": enrollment.score,
+        **changes,
+    }
+    progress = (values["progress"] or 0) if values["is_approved"] else 0
+    return {
+        "enrolled": int(bool(values["is_approved"])),
+        "pending": int(not values["is_approved"]),
+        "favorited": int(bool(values["is_favorite"])),
+        "completed": int(progress >= 100),
+        "progress_sum": progress,
+        "rating_count": int(values["score"] is not None),
+        "rating_sum": values["score"] or 0.0,
+    }
+
+
+def bump_stats(db: Session, course_id: UUID, deltas: dict):
+    """
+    Add ``deltas`` to the counters of a course, relative to their current
+    values in SQL, creating the row on first use.
+    """
+    statement = (
+        insert_dialect(db).insert(CourseStats).values(course_id=course_id, **deltas)
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CourseStats.course_id],
+            set_={
+                field: getattr(CourseStats, field) + delta
+                for field, delta in deltas.items()
+            },
+        )
+    )
+
+
+def record_enrollment(
+    db: Session,
+    course_id: UUID,
+    old: Optional[dict] = None,
+    new: Optional[dict] = None,
+):
+    """
+    Apply one enrollment changing from the ``old`` to the ``new``
+    contribution(). ``None`` means "not enrolled", so (None, new) adds an
+    enrollment and (old, None) removes it.
+    """
+    old = old or contribution(None)
+    new = new or contribution(None)
+    deltas = {field: new[field] - old[field] for field in STAT_FIELDS}
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        bump_stats(db, course_id, deltas)
+
+
+def enrollment_totals() -> list:
+    """
+    The counters computed from StudentCourse rows, labelled by STAT_FIELDS.
+    """
+
+    def count_if(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    approved = StudentCourse.is_approved.is_(True)
+    return [
+        count_if(approved).label("enrolled"),
+        count_if(not_(approved)).label("pending"),
+        count_if(StudentCourse.is_favorite.is_(True)).label("favorited"),
+        count_if(approved & (StudentCourse.progress >= 100)).label("completed"),
+        func.coalesce(
+            func.sum(case((approved, StudentCourse.progress), else_=0)), 0
+        ).label("progress_sum"),
+        func.count(StudentCourse.score).label("rating_count"),
+        func.coalesce(func.sum(StudentCourse.score), 0.0).label("rating_sum"),
+    ]
+
+
+def stored_counters(db: Session, course_id: UUID) -> dict:
+    row = db.execute(
+        select(*(getattr(CourseStats, field) for field in STAT_FIELDS)).where(
+            CourseStats.course_id == course_id
+        )
+    ).first()
+    return row._asdict() if row else contribution(None)
+
+
+def refresh_course_stats(db: Session, course_id: UUID):
+    """
+    Recount one course from its enrollments, for writes that change many of
+    them at once.
+    """
+    totals = db.execute(
+        select(*enrollment_totals()).where(StudentCourse.course_id == course_id)
+    ).one()
+    record_enrollment(db, course_id, stored_counters(db, course_id), totals._asdict())
+
+
+def drop_course_stats(db: Session, course_id: UUID):
+    db.query(CourseStats).filter(CourseStats.course_id == course_id).delete(
+        synchronize_session=False
+    )
+
+
+def rebuild_stats(db: Session) -> dict:
+    """
+    Recount every course from the enrollments, replacing the stored
+    counters. Repairs any drift; the write paths keep them exact otherwise.
+    """
+    db.query(CourseStats).delete(synchronize_session=False)
+    db.execute(
+        insert(CourseStats).from_select(
+            ["course_id", *STAT_FIELDS],
+            select(StudentCourse.course_id, *enrollment_totals())
+            .join(Course, Course.id == StudentCourse.course_id)
+            .group_by(StudentCourse.course_id),
+        )
+    )
+    db.commit()
+    return {"courses": db.query(CourseStats).count()}
+
+
+def stats_summary(counters) -> dict:
+    """
+    The counters with the averages dashboards show.
+    """
+    summary = {field: getattr(counters, field, 0) for field in STAT_FIELDS}
+    enrolled, rated = summary["enrolled"], summary["rating_count"]
+    summary["average_progress"] = (
+        summary["progress_sum"] / enrolled if enrolled else 0.0
+    )
+    summary["average_score"] = summary["rating_sum"] / rated if rated else 0.0
+    return summary
+
+
+def course_stats(db: Session, course_id: UUID) -> dict:
+    return {"course_id": course_id, **stats_summary(db.get(CourseStats, course_id))}
+
+
+def teacher_totals() -> list:
+    """
+    The counters of a teacher's courses added together, labelled by
+    STAT_FIELDS; select them from CourseStats joined to Course and grouped
+    by the owner. Summed on read so that enrollment writes only ever touch
+    their own course's row.
+    """
+    return [
+        func.coalesce(func.sum(getattr(CourseStats, field)), 0).label(field)
+        for field in STAT_FIELDS
+    ]
+
+
+def teacher_stats(db: Session, teacher_id: UUID) -> dict:
+    totals = db.execute(
+        select(*teacher_totals())
+        .join(Course, Course.id == CourseStats.course_id)
+        .where(Course.owner_id == teacher_id)
+    ).one()
+    return {"teacher_id": teacher_id, **stats_summary(totals)}
+
+
+def teachers_overview(db: Session, skip: int = 0, limit: int = 10) -> list[dict]:
+    """
+    A page of teachers with their counters, most enrolled students first.
+    Teachers whose courses never had an enrollment are not listed.
+    """
+    rows = db.execute(
+        select(Course.owner_id, Teacher.first_name, Teacher.last_name)
+        .add_columns(*teacher_totals())
+        .select_from(CourseStats)
+        .join(Course, Course.id == CourseStats.course_id)
+        .join(Teacher, Teacher.id == Course.owner_id)
+        .group_by(Course.owner_id, Teacher.first_name, Teacher.last_name)
+        .order_by(func.sum(CourseStats.enrolled).desc(), Course.owner_id)
+        .offset(skip)
+        .limit(limit)
+    ).all()
+    return [
+        {
+            "teacher_id": row.owner_id,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            **stats_summary(row),
+        }
+        for row in rows
+    ]
@@ -6,6 +6,9 @@ from sqlalchemy.orm import Session
 
 from src.api.deps import get_db, get_student_user
 from src.core.config import settings
+from src.crud.course import record_rating
+from src.crud.section import forget_completed_sections
+from src.crud.stats import contribution, record_enrollment
 from src.models.models import Course, Student, StudentCourse
 from src.models.models import User as UserModel
 from src.schemas.all_models import CoursesRate
@@ -57,6 +60,7 @@ def subscribe_to_course(
         student_id=current_student.id, course_id=course.id, is_approved=False
     )
     db.add(new_subscription)
+    record_enrollment(db, course.id, new=contribution(new_subscription))
     db.commit()
 
     token = generate_student_approval_token(str(current_student.id), str(course.id))
@@ -100,6 +104,9 @@ def unsubscribe_from_course(
             f"Student : {student_id} not enrolled in course with ID: {course_id}"
         )
 
+    record_rating(db, course_id, old_score=student_course.score)
+    record_enrollment(db, course_id, old=contribution(student_course))
+    forget_completed_sections(db, student_id, course_id)
     db.delete(student_course)
     db.commit()
 
@@ -122,6 +129,7 @@ def rate_course(
             StudentCourse.student_id == current_student.id,
             StudentCourse.is_approved.is_(True),
         )
+        .with_for_update()
         .first()
     )
 
@@ -144,6 +152,13 @@ def rate_course(
     if not (0 <= payload.score <= 5):
         raise HTTPException(status_code=400, detail="Rating must be between 0 and 5")
 
+    record_rating(db, course_id, student_course.score, payload.score)
+    record_enrollment(
+        db,
+        course_id,
+        contribution(student_course),
+        contribution(student_course, score=payload.score),
+    )
     student_course.score = payload.score
     db.commit()
     db.refresh(student_course)
@@ -198,7 +213,9 @@ def toggle_favorite_course(
     )
 
     if student_course:
+        old = contribution(student_course)
         student_course.is_favorite = not student_course.is_favorite
+        record_enrollment(db, course.id, old, contribution(student_course))
         db.commit()
         return {
             "message": (
@@ -215,5 +232,6 @@ def toggle_favorite_course(
             is_approved=False,
         )
         db.add(student_course)
+        record_enrollment(db, course.id, new=contribution(student_course))
         db.commit()
         return {"message": "Course added to favorites."}
@@ -1,7 +1,15 @@
-from typing import Optional
+import uuid
+from itertools import batched, groupby
+from typing import Iterable, Iterator, Optional
+from src.crud import course as course_crud
+from src.database.dialect import insert_dialect
 from src.models.models import Tag as TagModel, Course, CourseTag
-from src.schemas.all_models import CreateTag, User
+from src.schemas.all_models import CourseTagAssignment, CreateTag, User
+from src.utils.json_stream import STREAM_BATCH_SIZE
+from src.utils.pagination import DEFAULT_PAGE_SIZE
 from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import Session
 from uuid import UUID
 
@@ -14,11 +22,7 @@ def get_tags(db: Session):
 def get_courses_by_tag_id(
     db: Session, tag_id: UUID, current_user: Optional[User] = None
 ):
-    tag = search_course_by_tag(db, tag_id)
-    if not tag:
-        raise HTTPException(status_code=404, detail="Tag not found")
-
-    return [ct.course for ct in tag.course_tags]
+    return course_crud.get_courses_by_tag_id(db, tag_id, current_user)
 
 
 def create_tags(db: Session, payload: CreateTag):
@@ -69,6 +73,91 @@ def add_tag_to_course(
     return {"message": f"Tag {tag.name} added to {course.title}"}
 
 
+BULK_BATCH_SIZE = 1000
+
+
+def ensure_tags(db: Session, names: Iterable[str]) -> dict[str, UUID]:
+    """
+    Ids of the tags called ``names``, creating the missing ones.
+    """
+    dialect = insert_dialect(db)
+    tag_ids = {}
+    for batch in batched(sorted(set(names)), BULK_BATCH_SIZE):
+        db.execute(
+            dialect.insert(TagModel)
+            .values([{"id": uuid.uuid4(), "name": name} for name in batch])
+            .on_conflict_do_nothing(index_elements=[TagModel.name])
+        )
+        tag_ids.update(
+            db.execute(
+                select(TagModel.name, TagModel.id).where(TagModel.name.in_(batch))
+            ).all()
+        )
+    return tag_ids
+
+
+def insert_course_tags(db: Session, links: Iterable[tuple[UUID, UUID]]):
+    """
+    Link (course_id, tag_id) pairs, skipping the ones that already exist.
+    """
+    dialect = insert_dialect(db)
+    for batch in batched(links, BULK_BATCH_SIZE):
+        db.execute(
+            dialect.insert(CourseTag)
+            .values([{"course_id": c, "tag_id": t} for c, t in batch])
+            .on_conflict_do_nothing()
+        )
+
+
+def assign_tags_bulk(db: Session, items: list[CourseTagAssignment]) -> dict:
+    """
+    Attach tags to many courses at once, creating missing tags by name. Tags
+    and links are written with multi-row INSERT ... ON CONFLICT DO NOTHING in
+    batches of BULK_BATCH_SIZE, in one transaction. Returns a result per item.
+    """
+    requested = [
+        (item.course_id, sorted({name.strip() for name in item.tags if name.strip()}))
+        for item in items
+    ]
+    course_ids = {course_id for course_id, _ in requested}
+
+    known_courses = set()
+    for batch in batched(course_ids, BULK_BATCH_SIZE):
+        known_courses.update(
+            db.execute(select(Course.id).where(Course.id.in_(batch))).scalars()
+        )
+
+    tag_ids = ensure_tags(db, (name for _, names in requested for name in names))
+
+    existing = set()
+    for batch in batched(known_courses, BULK_BATCH_SIZE):
+        existing.update(
+            db.execute(
+                select(CourseTag.course_id, CourseTag.tag_id).where(
+                    CourseTag.course_id.in_(batch)
+                )
+            ).all()
+        )
+
+    results, links = [], {}
+    for course_id, tag_names in requested:
+        if course_id not in known_courses:
+            results.append({"course_id": course_id, "error": "Course not found"})
+            continue
+        added = []
+        for name in tag_names:
+            link = (course_id, tag_ids[name])
+            if link not in existing:
+                links[link] = None
+                existing.add(link)
+                added.append(name)
+        results.append({"course_id": course_id, "added": added})
+
+    insert_course_tags(db, links)
+    db.commit()
+    return {"links_created": len(links), "results": results}
+
+
 def delete_tag_from_course(db: Session, course_id: UUID, tag_id: UUID):
     link = db.query(CourseTag).filter_by(course_id=course_id, tag_id=tag_id).first()
     if not link:
@@ -78,26 +167,72 @@ def delete_tag_from_course(db: Session, course_id: UUID, tag_id: UUID):
     return {"message": "Tag removed from course"}
 
 
-def search_course_by_tag(db: Session, tag_name: Optional[str]):
+def search_course_by_tag(
+    db: Session,
+    tag_name: Optional[str],
+    current_user: Optional[User] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str = None,
+):
     tag = db.query(TagModel).filter(TagModel.name.ilike(f"%{tag_name}%")).first()
     if tag is None:
         raise HTTPException(status_code=404, detail="Tag not found")
 
+    query = (
+        course_crud.visible_courses(db, current_user)
+        .join(CourseTag, CourseTag.course_id == Course.id)
+        .filter(CourseTag.tag_id == tag.id)
+    )
+    rows = course_crud.paginate_courses(query, limit, cursor).all()
     return [
         {
-            "title": ct.course.title,
-            "description": ct.course.description,
-            "objectives": ct.course.objectives,
-            "premium": ct.course.is_premium,
+            "id": course.id,
+            "title": course.title,
+            "description": course.description,
+            "objectives": course.objectives,
+            "premium": course.is_premium,
         }
-        for ct in tag.course_tags
-        if ct.course is not None
+        for course, _ in rows
     ]
 
 
-def return_all_tags(db: Session):
-    course_tags = db.query(Course).filter(Course.tags.any()).all()
-    result = {}
-    for course in course_tags:
-        result[str(course.id)] = [ct.tag.name for ct in course.tags]
-    return result
+def tag_map_rows(
+    db: Session,
+    course_ids: Optional[Iterable[UUID]] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[tuple[UUID, list[str]]]:
+    """
+    (course id, sorted tag names) for every tagged course, read ``batch_size``
+    rows at a time. Postgres aggregates per course with array_agg; elsewhere
+    the joined rows come back ordered and are grouped as they arrive.
+    """
+    aggregated = db.get_bind().dialect.name == "postgresql"
+    if aggregated:
+        statement = (
+            select(
+                CourseTag.course_id,
+                func.array_agg(aggregate_order_by(TagModel.name, TagModel.name)),
+            )
+            .join(TagModel, TagModel.id == CourseTag.tag_id)
+            .group_by(CourseTag.course_id)
+            .order_by(CourseTag.course_id)
+        )
+    else:
+        statement = (
+            select(CourseTag.course_id, TagModel.name)
+            .join(TagModel, TagModel.id == CourseTag.tag_id)
+            .order_by(CourseTag.course_id, TagModel.name)
+        )
+    if course_ids is not None:
+        statement = statement.where(CourseTag.course_id.in_(list(course_ids)))
+    rows = db.execute(statement.execution_options(yield_per=batch_size))
+
+    if aggregated:
+        yield from rows
+        return
+    for course_id, group in groupby(rows, key=lambda row: row[0]):
+        yield course_id, [name for _, name in group]
+
+
+def return_all_tags(db: Session, course_ids: Optional[Iterable[UUID]] = None):
+    return {str(course_id): names for course_id, names in tag_map_rows(db, course_ids)}
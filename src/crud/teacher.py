@@ -4,6 +4,9 @@ from fastapi import Depends
 from sqlalchemy.orm import Session
 
 from src.api.deps import get_db
+from src.crud.course import record_rating
+from src.crud.section import forget_completed_sections
+from src.crud.stats import contribution, course_stats, record_enrollment
 from src.crud.user import get_by_id
 from src.models.models import Course, Role, StudentCourse, User
 from src.utils.custom_responses import BadRequest, NotFound, Unauthorized
@@ -35,6 +38,7 @@ def approve_student_by_token(token: str, db: Session = Depends(get_db)):
         .first()
     )
 
+    old = contribution(enrollment)
     if not enrollment:
         enrollment = StudentCourse(
             student_id=student_id, course_id=course_id, is_approved=True
@@ -42,6 +46,7 @@ def approve_student_by_token(token: str, db: Session = Depends(get_db)):
         db.add(enrollment)
     else:
         enrollment.is_approved = True
+    record_enrollment(db, course_id, old, contribution(enrollment))
 
     db.commit()
 
@@ -65,6 +70,9 @@ def remove_student_from_course(db: Session, course_id: UUID, student_id: UUID):
             f"Student with ID: {student_id} is not enrolled in course with ID: {course_id}"
         )
 
+    record_rating(db, course_id, old_score=student_course.score)
+    record_enrollment(db, course_id, old=contribution(student_course))
+    forget_completed_sections(db, student_id, course_id)
     db.delete(student_course)
     db.commit()
 
@@ -95,6 +103,7 @@ def approve_student_by_id(db: Session, student_id: UUID, course_id: UUID):
         .first()
     )
 
+    old = contribution(existing)
     if not existing:
         existing = StudentCourse(
             student_id=student_id, course_id=course_id, is_approved=True
@@ -102,6 +111,7 @@ def approve_student_by_id(db: Session, student_id: UUID, course_id: UUID):
         db.add(existing)
     else:
         existing.is_approved = True
+    record_enrollment(db, course_id, old, contribution(existing))
 
     db.commit()
 
@@ -142,6 +152,20 @@ def list_pending_students(db: Session, current_teacher: User, course_id: UUID):
     return result
 
 
+def get_course_stats(db: Session, current_teacher: User, course_id: UUID):
+    """
+    Enrollment counters of one of the teacher's courses, read from one row.
+    """
+    owner_id = db.query(Course.owner_id).filter(Course.id == course_id).scalar()
+    if owner_id is None:
+        raise NotFound("Course not found.")
+
+    if owner_id != current_teacher.id:
+        raise Unauthorized("You do not have permission to view this course's stats.")
+
+    return course_stats(db, course_id)
+
+
 def toggle_course_visibility_by_teacher(
     db: Session, course_id: UUID, current_user: User
 ):
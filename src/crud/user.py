@@ -2,9 +2,21 @@ from uuid import UUID
 
 from sqlalchemy.orm import Session
 
+from src.core.auth_cache import invalidate_user
 from src.core.config import settings
 from src.core.security import hash_password, verify_password
-from src.models.models import Admin, Role, Student, Teacher, User
+from src.crud.course import record_rating
+from src.crud.media import release_media
+from src.crud.stats import contribution, record_enrollment
+from src.models.models import (
+    Admin,
+    CompletedSection,
+    Role,
+    Student,
+    StudentCourse,
+    Teacher,
+    User,
+)
 from src.schemas.all_models import (
     AdminCreate,
     LoginRequest,
@@ -32,6 +44,14 @@ def get_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email.lower()).first()
 
 
+def change_password(user: User, password: str):
+    """
+    Set a new password and revoke every token issued with the old one.
+    """
+    user.password = hash_password(password)
+    user.token_version = (user.token_version or 0) + 1
+
+
 def login_user(db: Session, payload: LoginRequest) -> User:
     user = get_by_email(db, payload.email)
     if user is None or not verify_password(payload.password, user.password):
@@ -42,11 +62,24 @@ def login_user(db: Session, payload: LoginRequest) -> User:
     return user
 
 
-def register_admin(db: Session, payload: AdminCreate) -> User:
+def store_rehashed_password(db: Session, user: User, hashed_password: str):
+    """
+    Replace a hash made with an outdated cost factor. Unlike change_password()
+    this keeps existing tokens valid.
+    """
+    user.password = hashed_password
+    db.commit()
+    invalidate_user(user.id)
+
+
+def register_admin(
+    db: Session, payload: AdminCreate, hashed_password: str | None = None
+) -> User:
     if not payload.first_name or not payload.last_name:
         raise UnprocessableEntity("Admins must provide first and last name")
 
-    hashed_password = hash_password(payload.password)
+    if hashed_password is None:
+        hashed_password = hash_password(payload.password)
     new_user = User(
         email=payload.email.lower(), password=hashed_password, role=Role.ADMIN
     )
@@ -68,7 +101,9 @@ def register_admin(db: Session, payload: AdminCreate) -> User:
     }
 
 
-def register_teacher(db: Session, payload: TeacherCreate) -> User:
+def register_teacher(
+    db: Session, payload: TeacherCreate, hashed_password: str | None = None
+) -> User:
     if not payload.first_name:
         raise UnprocessableEntity("Teachers must provide first name")
     if not payload.last_name:
@@ -78,7 +113,8 @@ def register_teacher(db: Session, payload: TeacherCreate) -> User:
     if not payload.linked_in_acc:
         raise UnprocessableEntity("Teachers must provide LinkedIn account")
 
-    hashed_password = hash_password(payload.password)
+    if hashed_password is None:
+        hashed_password = hash_password(payload.password)
     new_user = User(
         email=payload.email.lower(), password=hashed_password, role=Role.TEACHER
     )
@@ -126,11 +162,14 @@ def register_teacher(db: Session, payload: TeacherCreate) -> User:
     }
 
 
-def register_student(db: Session, payload: StudentCreate) -> User:
+def register_student(
+    db: Session, payload: StudentCreate, hashed_password: str | None = None
+) -> User:
     if not payload.first_name or not payload.last_name:
         raise UnprocessableEntity("Students must provide first and last name")
 
-    hashed_password = hash_password(payload.password)
+    if hashed_password is None:
+        hashed_password = hash_password(payload.password)
     new_user = User(
         email=payload.email.lower(), password=hashed_password, role=Role.STUDENT
     )
@@ -196,7 +235,7 @@ def get_user_info(db: Session, current_user: User) -> dict:
 
 def update_admin_info(db: Session, current_user: User, payload):
     if payload.password is not None:
-        current_user.password = hash_password(payload.password)
+        change_password(current_user, payload.password)
 
     admin = db.query(Admin).filter(Admin.id == current_user.id).first()
     if not admin:
@@ -208,6 +247,7 @@ def update_admin_info(db: Session, current_user: User, payload):
         admin.last_name = payload.last_name
 
     db.commit()
+    invalidate_user(current_user.id)
     return {
         "first_name": admin.first_name,
         "last_name": admin.last_name,
@@ -217,7 +257,7 @@ def update_admin_info(db: Session, current_user: User, payload):
 
 def update_teacher_info(db: Session, current_user: User, payload):
     if payload.password is not None:
-        current_user.password = hash_password(payload.password)
+        change_password(current_user, payload.password)
 
     teacher = db.query(Teacher).filter(Teacher.id == current_user.id).first()
     if not teacher:
@@ -232,9 +272,12 @@ def update_teacher_info(db: Session, current_user: User, payload):
     if payload.linked_in_acc and payload.linked_in_acc.strip():
         teacher.linked_in_acc = payload.linked_in_acc
     if payload.profile_picture and payload.profile_picture.strip():
+        if payload.profile_picture != teacher.profile_picture:
+            release_media(db, teacher.profile_picture)
         teacher.profile_picture = payload.profile_picture
 
     db.commit()
+    invalidate_user(current_user.id)
     return {
         "first_name": teacher.first_name,
         "last_name": teacher.last_name,
@@ -247,7 +290,7 @@ def update_teacher_info(db: Session, current_user: User, payload):
 
 def update_student_info(db: Session, current_user: User, payload):
     if payload.password is not None:
-        current_user.password = hash_password(payload.password)
+        change_password(current_user, payload.password)
 
     student = db.query(Student).filter(Student.id == current_user.id).first()
     if not student:
@@ -258,9 +301,12 @@ def update_student_info(db: Session, current_user: User, payload):
     if payload.last_name and payload.last_name.strip():
         student.last_name = payload.last_name
     if payload.profile_picture and payload.profile_picture.strip():
+        if payload.profile_picture != student.profile_picture:
+            release_media(db, student.profile_picture)
         student.profile_picture = payload.profile_picture
 
     db.commit()
+    invalidate_user(current_user.id)
     return {
         "first_name": student.first_name,
         "last_name": student.last_name,
@@ -272,6 +318,24 @@ def update_student_info(db: Session, current_user: User, payload):
 
 def delete_user(db: Session, user_id: UUID):
     user = get_by_id(db, user_id)
+    if user.role == Role.STUDENT:
+        enrollments = (
+            db.query(StudentCourse).filter(StudentCourse.student_id == user.id).all()
+        )
+        for enrollment in enrollments:
+            if enrollment.score is not None:
+                record_rating(db, enrollment.course_id, old_score=enrollment.score)
+            record_enrollment(db, enrollment.course_id, old=contribution(enrollment))
+        db.query(CompletedSection).filter(
+            CompletedSection.student_id == user.id
+        ).delete(synchronize_session=False)
+    if user.student:
+        release_media(db, user.student.profile_picture)
+    if user.teacher:
+        release_media(db, user.teacher.profile_picture)
+        for course in user.teacher.courses:
+            release_media(db, course.picture)
     db.delete(user)
     db.commit()
+    invalidate_user(user_id)
     return {"message": "Account deleted successfully."}
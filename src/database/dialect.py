@@ -0,0 +1,10 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert_dialect(db: Session):
+    """
+    The dialect module whose ``insert()`` supports ``on_conflict_do_*`` for the
+    database ``db`` is bound to: PostgreSQL in production, SQLite in tests.
+    """
+    return postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+import src.models.models  # noqa: F401
+from src.database.base import Base
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+BASELINE_REVISION = "0001"
+MIGRATION_LOCK_ID = 804_113_001
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.attributes["connection"] = connection
+    return config
+
+
+def migrate(engine: Engine):
+    """
+    Bring the database schema to the latest revision.
+
+    A fresh database is created from the models and stamped at head. A database
+    created by create_all before migrations existed is stamped at the baseline
+    and then upgraded.
+    """
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Several uvicorn workers start at once; only one may migrate.
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+
+        config = alembic_config(connection)
+        tables = inspect(connection).get_table_names()
+
+        if "alembic_version" not in tables:
+            if "users" not in tables:
+                Base.metadata.create_all(connection)
+                command.stamp(config, "head")
+                return
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, "head")
@@ -0,0 +1,52 @@
+"""Indexes for hot foreign keys and filters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+PENDING_TEACHERS = sa.text("role = 'TEACHER' AND NOT is_approved")
+
+
+def upgrade():
+    op.create_index("ix_courses_owner_id", "courses", ["owner_id"])
+    op.create_index(
+        "ix_courses_is_hidden_title", "courses", ["is_hidden", "title", "id"]
+    )
+    op.create_index("ix_sections_course_id", "sections", ["course_id"])
+    op.create_index("ix_student_courses_course_id", "student_courses", ["course_id"])
+    op.create_index(
+        "ix_student_courses_student_id_is_approved",
+        "student_courses",
+        ["student_id", "is_approved"],
+    )
+    op.create_index("ix_course_tags_tag_id", "course_tags", ["tag_id"])
+    op.create_index("ix_users_role_is_approved", "users", ["role", "is_approved"])
+    op.create_index(
+        "ix_users_pending_teachers",
+        "users",
+        ["id"],
+        postgresql_where=PENDING_TEACHERS,
+        sqlite_where=PENDING_TEACHERS,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_users_pending_teachers", table_name="users")
+    op.drop_index("ix_users_role_is_approved", table_name="users")
+    op.drop_index("ix_course_tags_tag_id", table_name="course_tags")
+    op.drop_index(
+        "ix_student_courses_student_id_is_approved", table_name="student_courses"
+    )
+    op.drop_index("ix_student_courses_course_id", table_name="student_courses")
+    op.drop_index("ix_sections_course_id", table_name="sections")
+    op.drop_index("ix_courses_is_hidden_title", table_name="courses")
+    op.drop_index("ix_courses_owner_id", table_name="courses")
@@ -0,0 +1,41 @@
+"""Trigram indexes for title, tag and email search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = [
+    ("ix_courses_title_trgm", "courses", "title"),
+    ("ix_tags_name_trgm", "tags", "name"),
+    ("ix_users_email_trgm", "users", "email"),
+]
+
+
+def upgrade():
+    # SQLite searches through the in-process index in src.crud.search instead.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for name, table, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,66 @@
+"""Stored rating count, sum and histogram per course
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("courses") as batch:
+        batch.add_column(
+            sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch.add_column(
+            sa.Column("rating_sum", sa.Float(), nullable=False, server_default="0")
+        )
+    op.create_table(
+        "course_rating_buckets",
+        sa.Column(
+            "course_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("courses.id"),
+            primary_key=True,
+        ),
+        sa.Column("bucket", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+
+    rated = (
+        "FROM student_courses sc"
+        " WHERE sc.course_id = courses.id AND sc.score IS NOT NULL"
+    )
+    op.execute(f"""
+        UPDATE courses SET
+            rating_count = (SELECT COUNT(*) {rated}),
+            rating_sum = (SELECT COALESCE(SUM(sc.score), 0) {rated}),
+            rating = COALESCE((SELECT AVG(sc.score) {rated}), 0)
+        """)
+    # CAST truncates on SQLite but rounds on Postgres, hence FLOOR there.
+    if op.get_bind().dialect.name == "postgresql":
+        bucket = "LEAST(CAST(FLOOR(score) AS INTEGER), 5)"
+    else:
+        bucket = "MIN(CAST(score AS INTEGER), 5)"
+    op.execute(f"""
+        INSERT INTO course_rating_buckets (course_id, bucket, count)
+        SELECT course_id, {bucket}, COUNT(*)
+        FROM student_courses
+        WHERE score IS NOT NULL
+        GROUP BY course_id, {bucket}
+        """)
+
+
+def downgrade():
+    op.drop_table("course_rating_buckets")
+    with op.batch_alter_table("courses") as batch:
+        batch.drop_column("rating_sum")
+        batch.drop_column("rating_count")
@@ -0,0 +1,36 @@
+"""Tracked media objects
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "media_objects",
+        sa.Column("key", sa.String(255), primary_key=True),
+        sa.Column("url", sa.String(255), nullable=False, unique=True),
+        sa.Column("orphaned_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_media_objects_orphaned_at", "media_objects", ["orphaned_at"])
+    # The garbage collector looks up references by url.
+    op.create_index("ix_teachers_profile_picture", "teachers", ["profile_picture"])
+    op.create_index("ix_students_profile_picture", "students", ["profile_picture"])
+    op.create_index("ix_courses_picture", "courses", ["picture"])
+
+
+def downgrade():
+    op.drop_index("ix_courses_picture", "courses")
+    op.drop_index("ix_students_profile_picture", "students")
+    op.drop_index("ix_teachers_profile_picture", "teachers")
+    op.drop_index("ix_media_objects_orphaned_at", "media_objects")
+    op.drop_table("media_objects")
@@ -0,0 +1,81 @@
+"""Stored section counts and completed sections per student
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("courses") as batch:
+        batch.add_column(
+            sa.Column("section_count", sa.Integer(), nullable=False, server_default="0")
+        )
+    with op.batch_alter_table("student_courses") as batch:
+        batch.add_column(
+            sa.Column(
+                "completed_sections", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+    op.create_table(
+        "completed_sections",
+        sa.Column(
+            "student_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("students.id"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "section_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("sections.id"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "course_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("courses.id"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_completed_sections_student_id_course_id",
+        "completed_sections",
+        ["student_id", "course_id"],
+    )
+
+    op.execute("""
+        UPDATE courses SET section_count =
+            (SELECT COUNT(*) FROM sections s WHERE s.course_id = courses.id)
+        """)
+    # Which sections were completed was never recorded; estimate how many from
+    # the stored percentage so existing progress is kept.
+    completed = "(COALESCE(progress, 0) * c.section_count + 50) / 100"
+    op.execute(f"""
+        UPDATE student_courses SET completed_sections = (
+            SELECT CASE WHEN {completed} > c.section_count
+                        THEN c.section_count ELSE {completed} END
+            FROM courses c WHERE c.id = student_courses.course_id
+        )
+        WHERE EXISTS (
+            SELECT 1 FROM courses c WHERE c.id = student_courses.course_id
+        )
+        """)
+
+
+def downgrade():
+    op.drop_index("ix_completed_sections_student_id_course_id", "completed_sections")
+    op.drop_table("completed_sections")
+    with op.batch_alter_table("student_courses") as batch:
+        batch.drop_column("completed_sections")
+    with op.batch_alter_table("courses") as batch:
+        batch.drop_column("section_count")
@@ -0,0 +1,39 @@
+"""Explicit section order
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("sections") as batch:
+        batch.add_column(
+            sa.Column("position", sa.Integer(), nullable=False, server_default="0")
+        )
+    # Sections had no order of their own; number them by title.
+    op.execute("""
+        UPDATE sections SET position = (
+            SELECT COUNT(*) FROM sections s
+            WHERE s.course_id = sections.course_id
+              AND (s.title < sections.title
+                   OR (s.title = sections.title AND s.id <= sections.id))
+        )
+        """)
+    op.create_index(
+        "ix_sections_course_id_position", "sections", ["course_id", "position", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_sections_course_id_position", "sections")
+    with op.batch_alter_table("sections") as batch:
+        batch.drop_column("position")
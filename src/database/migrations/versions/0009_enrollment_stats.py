@@ -0,0 +1,71 @@
+"""Enrollment counters per course
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+COUNTERS = [
+    "enrolled",
+    "pending",
+    "favorited",
+    "completed",
+    "progress_sum",
+    "rating_count",
+    "rating_sum",
+]
+
+
+def counter_columns():
+    return [
+        sa.Column(
+            name,
+            sa.Float() if name == "rating_sum" else sa.Integer(),
+            nullable=False,
+            server_default="0",
+        )
+        for name in COUNTERS
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "course_stats",
+        sa.Column(
+            "course_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("courses.id"),
+            primary_key=True,
+        ),
+        *counter_columns(),
+    )
+
+    columns = ", ".join(COUNTERS)
+    op.execute(f"""
+        INSERT INTO course_stats (course_id, {columns})
+        SELECT sc.course_id,
+               SUM(CASE WHEN sc.is_approved THEN 1 ELSE 0 END),
+               SUM(CASE WHEN sc.is_approved THEN 0 ELSE 1 END),
+               SUM(CASE WHEN sc.is_favorite THEN 1 ELSE 0 END),
+               SUM(CASE WHEN sc.is_approved AND sc.progress >= 100
+                        THEN 1 ELSE 0 END),
+               COALESCE(SUM(CASE WHEN sc.is_approved THEN sc.progress
+                                 ELSE 0 END), 0),
+               COUNT(sc.score),
+               COALESCE(SUM(sc.score), 0)
+        FROM student_courses sc JOIN courses c ON c.id = sc.course_id
+        GROUP BY sc.course_id
+        """)
+
+
+def downgrade():
+    op.drop_table("course_stats")
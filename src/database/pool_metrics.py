@@ -0,0 +1,124 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class PoolMetrics:
+    """
+    Counters and a checkout wait-time histogram for one connection pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def observe_wait(self, seconds: float):
+        index = len(WAIT_BUCKETS)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.wait_count += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def histogram(self) -> dict:
+        """
+        Cumulative bucket counts, keyed by upper bound in seconds.
+        """
+        result = {}
+        total = 0
+        for bound, count in zip(WAIT_BUCKETS, self.bucket_counts):
+            total += count
+            result[str(bound)] = total
+        result["+Inf"] = total + self.bucket_counts[-1]
+        return result
+
+
+class InstrumentedPoolMixin:
+    """
+    Times every checkout, including the time spent queued behind other requests
+    when the pool is exhausted, and counts new and invalidated connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        if kwargs.get("_dispatch") is None:
+            metrics = self.metrics
+            event.listen(self, "connect", lambda *_: metrics.record_connect())
+            event.listen(self, "invalidate", lambda *_: metrics.record_invalidation())
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool that inherits our listeners; keep the
+        # same metrics object so the counters survive and stay consistent.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool) -> dict:
+    status = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "timeout": pool.timeout(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(
+            {
+                "checkouts": metrics.wait_count,
+                "timeouts": metrics.timeouts,
+                "connects": metrics.connects,
+                "invalidations": metrics.invalidations,
+                "wait_seconds_sum": round(metrics.wait_sum, 6),
+                "wait_seconds_max": round(metrics.wait_max, 6),
+                "wait_seconds_histogram": metrics.histogram(),
+            }
+        )
+    return status
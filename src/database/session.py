@@ -1,17 +1,75 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from src.database.base import Base
+from src.database.migrate import migrate
+from src.database.pool_metrics import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    pool_status,
+)
 from src.core.config import settings
 
+pool_options = {
+    "echo": settings.DB_ECHO,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
 engine = create_engine(
-    settings.DATABASE_URL, echo=True, pool_pre_ping=True, pool_recycle=1800
+    settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def async_database_url(url: str) -> URL:
+    """
+    Derive the asyncio driver URL from the sync DATABASE_URL. asyncpg is the
+    only async driver installed, so other databases need ASYNC_DATABASE_URL.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "postgresql":
+        raise ValueError(
+            f"DATABASE_ASYNC has no async driver for {url.get_backend_name()}; "
+            "set ASYNC_DATABASE_URL"
+        )
+    query = dict(url.query)
+    sslmode = query.pop("sslmode", None)
+    if sslmode:
+        query["ssl"] = sslmode
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+
+if settings.DATABASE_ASYNC:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        **pool_options,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+
+def get_pool_status() -> dict:
+    """
+    Connection pool usage for this worker process.
+    """
+    status = {"sync": pool_status(engine.pool)}
+    if async_engine is not None:
+        status["async"] = pool_status(async_engine.sync_engine.pool)
+    return status
+
+
 def init_db():
     """
-    Create all tables in the database.
+    Create or upgrade the database schema.
     """
-    Base.metadata.create_all(bind=engine)
+    migrate(engine)
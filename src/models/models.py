@@ -1,12 +1,42 @@
 import uuid
 from enum import Enum as PyEnum
 
-from sqlalchemy import Boolean, Column, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    Column,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from src.database.base import Base
 
+# Trigram indexes back the fuzzy/substring searches; Postgres only.
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def trigram_index(name: str, column: str) -> Index:
+    return Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
 
 class Role(PyEnum):
     ADMIN = "ADMIN"
@@ -16,12 +46,24 @@ class Role(PyEnum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role_is_approved", "role", "is_approved"),
+        Index(
+            "ix_users_pending_teachers",
+            "id",
+            postgresql_where=text("role = 'TEACHER' AND NOT is_approved"),
+            sqlite_where=text("role = 'TEACHER' AND NOT is_approved"),
+        ),
+        trigram_index("ix_users_email_trgm", "email"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String(255), unique=True, nullable=False)
     password = Column(String(255), nullable=False)
     role = Column(Enum(Role), nullable=False)
     is_active = Column(Boolean, default=True)
     is_approved = Column(Boolean, default=False)
+    # Bumped to revoke every token issued before; see src.core.authentication.
+    token_version = Column(Integer, nullable=False, default=0)
 
     admin = relationship(
         "Admin", back_populates="user", uselist=False, cascade="all, delete-orphan"
@@ -48,7 +90,7 @@ class Teacher(Base):
     id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
     first_name = Column(String(100))
     last_name = Column(String(100))
-    profile_picture = Column(String(255))
+    profile_picture = Column(String(255), index=True)
     phone_number = Column(String(20))
     linked_in_acc = Column(String(255))
 
@@ -63,7 +105,7 @@ class Student(Base):
     id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
     first_name = Column(String(100))
     last_name = Column(String(100))
-    profile_picture = Column(String(255))
+    profile_picture = Column(String(255), index=True)
 
     user = relationship("User", back_populates="student")
     courses = relationship(
@@ -73,15 +115,24 @@ class Student(Base):
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        Index("ix_courses_is_hidden_title", "is_hidden", "title", "id"),
+        trigram_index("ix_courses_title_trgm", "title"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), unique=True, nullable=False)
     description = Column(Text)
     objectives = Column(Text)
-    owner_id = Column(UUID(as_uuid=True), ForeignKey("teachers.id"), nullable=False)
+    owner_id = Column(
+        UUID(as_uuid=True), ForeignKey("teachers.id"), nullable=False, index=True
+    )
     is_premium = Column(Boolean, default=False)
     is_hidden = Column(Boolean, default=False)
-    picture = Column(String(255))
+    picture = Column(String(255), index=True)
     rating = Column(Float, default=0.0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    section_count = Column(Integer, nullable=False, default=0)
 
     owner = relationship("Teacher", back_populates="courses")
     students = relationship(
@@ -93,10 +144,31 @@ class Course(Base):
     sections = relationship(
         "Section", back_populates="course", cascade="all, delete-orphan"
     )
+    rating_buckets = relationship(
+        "CourseRatingBucket", back_populates="course", cascade="all, delete-orphan"
+    )
+    stats = relationship(
+        "CourseStats",
+        back_populates="course",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+
+
+class CourseRatingBucket(Base):
+    __tablename__ = "course_rating_buckets"
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # whole stars, 0-5
+    count = Column(Integer, nullable=False, default=0)
+
+    course = relationship("Course", back_populates="rating_buckets")
 
 
 class Section(Base):
     __tablename__ = "sections"
+    __table_args__ = (
+        Index("ix_sections_course_id_position", "course_id", "position", "id"),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
     content = Column(Text)
@@ -104,13 +176,18 @@ class Section(Base):
     information = Column(Text)
     link = Column(String(255))
     is_visited = Column(Boolean, default=False)
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"))
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), index=True)
+    position = Column(Integer, nullable=False, default=0)
 
     course = relationship("Course", back_populates="sections")
+    completions = relationship(
+        "CompletedSection", back_populates="section", cascade="all, delete-orphan"
+    )
 
 
 class Tag(Base):
     __tablename__ = "tags"
+    __table_args__ = (trigram_index("ix_tags_name_trgm", "name"),)
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), unique=True, nullable=False)
 
@@ -121,11 +198,17 @@ class Tag(Base):
 
 class StudentCourse(Base):
     __tablename__ = "student_courses"
+    __table_args__ = (
+        Index("ix_student_courses_student_id_is_approved", "student_id", "is_approved"),
+    )
     student_id = Column(UUID(as_uuid=True), ForeignKey("students.id"), primary_key=True)
-    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), primary_key=True)
+    course_id = Column(
+        UUID(as_uuid=True), ForeignKey("courses.id"), primary_key=True, index=True
+    )
     is_approved = Column(Boolean, default=False)
     is_visited = Column(Boolean, default=False)
     progress = Column(Integer, default=0)
+    completed_sections = Column(Integer, nullable=False, default=0)
     score = Column(Float, nullable=True)
     is_favorite = Column(Boolean, default=False)
 
@@ -133,10 +216,63 @@ class StudentCourse(Base):
     course = relationship("Course", backref="student_associations")
 
 
+class CompletedSection(Base):
+    """
+    A section a student has marked as completed. StudentCourse keeps the
+    running count and the progress derived from it.
+    """
+
+    __tablename__ = "completed_sections"
+    __table_args__ = (
+        Index("ix_completed_sections_student_id_course_id", "student_id", "course_id"),
+    )
+    student_id = Column(UUID(as_uuid=True), ForeignKey("students.id"), primary_key=True)
+    section_id = Column(UUID(as_uuid=True), ForeignKey("sections.id"), primary_key=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), nullable=False)
+
+    section = relationship("Section", back_populates="completions")
+
+
+class CourseStats(Base):
+    """
+    Running totals over a course's StudentCourse rows, kept in step by
+    src.crud.stats. ``completed`` and ``progress_sum`` only cover approved
+    enrollments. Teacher totals are summed from these rows on read.
+    """
+
+    __tablename__ = "course_stats"
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), primary_key=True)
+    enrolled = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+    favorited = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    progress_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+
+    course = relationship("Course", back_populates="stats")
+
+
 class CourseTag(Base):
     __tablename__ = "course_tags"
     course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id"), primary_key=True)
-    tag_id = Column(UUID(as_uuid=True), ForeignKey("tags.id"), primary_key=True)
+    tag_id = Column(
+        UUID(as_uuid=True), ForeignKey("tags.id"), primary_key=True, index=True
+    )
 
     course = relationship("Course", back_populates="tags")
     tag = relationship("Tag", back_populates="course_tags")
+
+
+class MediaObject(Base):
+    """
+    An uploaded image, keyed by the storage key of its main rendition. The
+    picture columns reference it by url. ``orphaned_at`` is set when nothing
+    may reference it any more (fresh uploads, replaced or deleted pictures);
+    src.crud.media.collect_media_garbage deletes those that stay unreferenced.
+    """
+
+    __tablename__ = "media_objects"
+    key = Column(String(255), primary_key=True)
+    url = Column(String(255), unique=True, nullable=False)
+    orphaned_at = Column(DateTime(timezone=True), index=True)
@@ -1,10 +1,10 @@
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, StringConstraints
 
 from src.models.models import Role
 
-from typing import Optional
+from typing import Annotated, Optional
 
 
 class User(BaseModel):
@@ -138,6 +138,20 @@ class CreateTag(BaseModel):
     name: str
 
 
+# Checked after stripping, as stored; must fit tags.name. Blank names are
+# skipped by the bulk assignment rather than rejected.
+TagName = Annotated[str, StringConstraints(strip_whitespace=True, max_length=100)]
+
+
+class CourseTagAssignment(BaseModel):
+    course_id: UUID
+    tags: list[TagName] = Field(max_length=50)
+
+
+class BulkTagAssignment(BaseModel):
+    items: list[CourseTagAssignment] = Field(max_length=10000)
+
+
 class SectionInDB(BaseModel):
     title: str
     content: str
@@ -156,12 +170,25 @@ class SectionCreate(BaseModel):
     link: Optional[str] = ""
 
 
+class CourseImport(BaseModel):
+    title: str = Field(min_length=1, max_length=255)
+    description: str = ""
+    objectives: str = ""
+    is_premium: bool = False
+    is_hidden: bool = False
+    owner_id: UUID | None = None
+    picture: str | None = None
+    tags: list[TagName] = Field([], max_length=50)
+    sections: list[SectionCreate] = []
+
+
 class SectionUpdate(BaseModel):
     title: str | None = None
     content: str | None = None
     description: str | None = None
     information: str | None = None
     link: str | None = None
+    position: int | None = None
 
 
 class SectionVisit(BaseModel):
@@ -187,4 +214,6 @@ class RatingEntry(BaseModel):
 class CourseWithRatings(BaseModel):
     title: str
     rating: float
+    rating_count: int
+    histogram: dict[int, int]
     ratings: list[RatingEntry]
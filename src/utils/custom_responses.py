@@ -38,3 +38,8 @@ class InternalServerError(HTTPException):
 class NoContent(HTTPException):
     def __init__(self):
         super().__init__(status_code=status.HTTP_204_NO_CONTENT, detail=None)
+
+
+class ServiceUnavailable(HTTPException):
+    def __init__(self, detail: str = "Service unavailable"):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
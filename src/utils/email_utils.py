@@ -1,15 +1,64 @@
-import smtplib
-from email.mime.text import MIMEText
+from functools import lru_cache
 
 from src.core.config import settings
+from src.utils.mail_queue import MailWorker, SpoolQueue
+from src.utils.mail_transport import FileTransport, MemoryTransport, SMTPTransport
+
+mail_worker: MailWorker | None = None
+
+
+@lru_cache()
+def get_mail_queue() -> SpoolQueue:
+    return SpoolQueue(
+        settings.EMAIL_SPOOL_DIR,
+        max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+        backoff=settings.EMAIL_RETRY_BACKOFF,
+    )
+
+
+def create_transport():
+    if settings.EMAIL_TRANSPORT == "file":
+        return FileTransport(settings.EMAIL_OUTBOX_DIR)
+    if settings.EMAIL_TRANSPORT == "memory":
+        return MemoryTransport()
+    return SMTPTransport(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        settings.EMAIL_USERNAME,
+        settings.EMAIL_PASSWORD,
+        idle_timeout=settings.EMAIL_SMTP_IDLE_TIMEOUT,
+    )
 
 
 def send_email(to: str, subject: str, body: str):
-    msg = MIMEText(body)
-    msg["Subject"] = subject
-    msg["From"] = settings.EMAIL_USERNAME
-    msg["To"] = to
-
-    with smtplib.SMTP_SSL(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-        server.login(settings.EMAIL_USERNAME, settings.EMAIL_PASSWORD)
-        server.send_message(msg)
+    """
+    Queue an email; the mail worker delivers it in the background.
+    """
+    get_mail_queue().put(to, subject, body)
+    wake_mail_worker()
+
+
+def wake_mail_worker():
+    if mail_worker is not None:
+        mail_worker.wake()
+
+
+def start_mail_worker(on_idle=None) -> MailWorker:
+    global mail_worker
+    if mail_worker is None:
+        mail_worker = MailWorker(
+            get_mail_queue(),
+            create_transport(),
+            sender=settings.EMAIL_USERNAME,
+            batch_size=settings.EMAIL_BATCH_SIZE,
+            on_idle=on_idle,
+        )
+        mail_worker.start()
+    return mail_worker
+
+
+def stop_mail_worker():
+    global mail_worker
+    if mail_worker is not None:
+        mail_worker.stop()
+        mail_worker = None
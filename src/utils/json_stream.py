@@ -0,0 +1,51 @@
+import json
+from itertools import batched
+from typing import Any, Iterable, Iterator
+
+from fastapi.encoders import jsonable_encoder
+
+STREAM_BATCH_SIZE = 500
+
+
+def iter_json_object(
+    members: Iterable[tuple[Any, Any]], batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Encode (key, value) pairs as a single JSON object, ``batch_size`` members
+    per chunk, for a StreamingResponse.
+    """
+    separator = b"{"
+    for batch in batched(members, batch_size):
+        chunk = ",".join(
+            f"{json.dumps(str(key))}:{json.dumps(jsonable_encoder(value))}"
+            for key, value in batch
+        )
+        yield separator + chunk.encode()
+        separator = b","
+    yield b"{}" if separator == b"{" else b"}"
+
+
+def iter_json_array(
+    items: Iterable[Any], batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Encode items as a single JSON array, ``batch_size`` items per chunk.
+    """
+    separator = b"["
+    for batch in batched(items, batch_size):
+        chunk = ",".join(json.dumps(jsonable_encoder(item)) for item in batch)
+        yield separator + chunk.encode()
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def iter_ndjson(
+    items: Iterable[Any], batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Encode items as newline-delimited JSON, ``batch_size`` lines per chunk.
+    """
+    for batch in batched(items, batch_size):
+        yield "".join(
+            json.dumps(jsonable_encoder(item)) + "\n" for item in batch
+        ).encode()
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from email.mime.text import MIMEText
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedEmail:
+    to: str
+    subject: str
+    body: str
+    attempts: int = 0
+    not_before: float = 0.0
+    id: str = field(default_factory=lambda: f"{time.time_ns()}-{uuid.uuid4().hex}")
+
+    def to_message(self, sender: str) -> MIMEText:
+        message = MIMEText(self.body)
+        message["Subject"] = self.subject
+        message["From"] = sender
+        message["To"] = self.to
+        return message
+
+
+class SpoolQueue:
+    """
+    Durable mail queue in a local spool directory, one JSON file per message.
+
+    Files are written to ``tmp/`` and renamed into ``new/``; a worker claims a
+    message by renaming it into ``cur/``, so several processes can share one
+    spool without sending anything twice. Claims older than ``lease`` seconds
+    (a worker that died mid-send) are put back into ``new/``. Messages that run
+    out of attempts, and files that cannot be parsed, end up in ``failed/``.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_attempts: int = 5,
+        backoff: float = 30,
+        lease: float = 600,
+    ):
+        self.root = Path(directory)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        for name in ("tmp", "new", "cur", "failed"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    def write(self, email: QueuedEmail, folder: str):
+        tmp = self.root / "tmp" / f"{email.id}.json"
+        tmp.write_text(json.dumps(email.__dict__))
+        os.replace(tmp, self.root / folder / tmp.name)
+
+    def put(self, to: str, subject: str, body: str) -> QueuedEmail:
+        email = QueuedEmail(to=to, subject=subject, body=body)
+        self.write(email, "new")
+        return email
+
+    def recover(self):
+        deadline = time.time() - self.lease
+        for path in (self.root / "cur").iterdir():
+            try:
+                if path.stat().st_mtime < deadline:
+                    os.replace(path, self.root / "new" / path.name)
+            except FileNotFoundError:
+                pass
+
+    def claim(self, limit: int) -> list[QueuedEmail]:
+        """
+        Take up to ``limit`` due messages, oldest first.
+        """
+        self.recover()
+        now = time.time()
+        claimed = []
+        for path in sorted((self.root / "new").iterdir()):
+            if len(claimed) >= limit:
+                break
+            try:
+                email = QueuedEmail(**json.loads(path.read_text()))
+                if email.not_before > now:
+                    continue
+                target = self.root / "cur" / path.name
+                os.replace(path, target)
+                # Start the lease now rather than at enqueue time.
+                os.utime(target)
+            except FileNotFoundError:
+                # Another worker claimed it first.
+                continue
+            except (ValueError, TypeError):
+                # Unreadable messages are set aside instead of blocking the queue.
+                logger.exception("Moving unreadable spool file %s to failed/", path)
+                try:
+                    os.replace(path, self.root / "failed" / path.name)
+                except FileNotFoundError:
+                    pass
+                continue
+            claimed.append(email)
+        return claimed
+
+    def ack(self, email: QueuedEmail):
+        (self.root / "cur" / f"{email.id}.json").unlink(missing_ok=True)
+
+    def retry(self, email: QueuedEmail):
+        email.attempts += 1
+        if email.attempts >= self.max_attempts:
+            self.write(email, "failed")
+        else:
+            email.not_before = time.time() + self.backoff * 2 ** (email.attempts - 1)
+            self.write(email, "new")
+        self.ack(email)
+
+    def pending(self) -> int:
+        return sum(1 for _ in (self.root / "new").iterdir())
+
+
+class MailWorker:
+    """
+    Background thread that drains a SpoolQueue through a transport in batches.
+    ``on_idle`` runs whenever the queue is empty, for other spool upkeep.
+    """
+
+    def __init__(
+        self,
+        queue: SpoolQueue,
+        transport,
+        sender: str,
+        batch_size: int = 50,
+        poll_interval: float = 5,
+        on_idle=None,
+    ):
+        self.queue = queue
+        self.transport = transport
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.on_idle = on_idle
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def run_once(self) -> int:
+        """
+        Send one batch; returns how many messages were claimed.
+        """
+        batch = self.queue.claim(self.batch_size)
+        for email in batch:
+            try:
+                self.transport.send(email.to_message(self.sender))
+            except Exception:
+                logger.exception("Sending email %s to %s failed", email.id, email.to)
+                self.transport.close()
+                self.queue.retry(email)
+            else:
+                self.queue.ack(email)
+        return len(batch)
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                if self.run_once():
+                    continue
+                if self.on_idle is not None:
+                    self.on_idle()
+            except Exception:
+                logger.exception("Mail worker iteration failed")
+            self.transport.idle()
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+        self.transport.close()
+
+    def wake(self):
+        self.wakeup.set()
+
+    def start(self):
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="mail-worker", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 10):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
@@ -0,0 +1,102 @@
+import smtplib
+import time
+import uuid
+from email.message import Message
+from pathlib import Path
+
+
+class SMTPTransport:
+    """
+    Sends over one logged-in SMTP_SSL connection that is kept open between
+    messages. The connection is dropped after ``idle_timeout`` seconds without
+    traffic and re-opened on the next send; a connection the server closed in
+    the meantime is detected and re-opened once per message.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        idle_timeout: float = 60,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connection = None
+        self.last_used = 0.0
+
+    def connect(self):
+        connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        connection.login(self.username, self.password)
+        self.connection = connection
+
+    def send(self, message: Message):
+        if self.connection is None:
+            self.connect()
+        try:
+            self.connection.send_message(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            self.close()
+            self.connect()
+            self.connection.send_message(message)
+        self.last_used = time.monotonic()
+
+    def idle(self):
+        if (
+            self.connection is not None
+            and time.monotonic() - self.last_used > self.idle_timeout
+        ):
+            self.close()
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.connection = None
+
+
+class FileTransport:
+    """
+    Writes every message to ``directory`` as an .eml file, for local development.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def send(self, message: Message):
+        name = f"{time.time_ns()}-{uuid.uuid4().hex}.eml"
+        (self.directory / name).write_bytes(message.as_bytes())
+
+    def idle(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryTransport:
+    """
+    Keeps sent messages in ``outbox``, for tests.
+    """
+
+    def __init__(self):
+        self.outbox: list[Message] = []
+
+    def send(self, message: Message):
+        self.outbox.append(message)
+
+    def idle(self):
+        pass
+
+    def close(self):
+        pass
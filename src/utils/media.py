@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import NamedTuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.core.config import settings
+from src.database.dialect import insert_dialect
+from src.database.session import SessionLocal
+from src.models.models import MediaObject
+from src.utils.custom_responses import BadRequest
+from src.utils.storage import get_storage
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Rendition(NamedTuple):
+    suffix: str
+    size: int
+    format: str
+    content_type: str
+    quality: int
+
+
+# The first rendition is the one whose URL gets stored; the others live next
+# to it as "<key>_<suffix>.webp".
+RENDITIONS = (
+    Rendition("", 1600, "JPEG", "image/jpeg", 85),
+    Rendition("medium", 800, "WEBP", "image/webp", 80),
+    Rendition("thumb", 256, "WEBP", "image/webp", 75),
+)
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+
+class ImageRejected(ValueError):
+    pass
+
+
+def render_image(data: bytes, max_dimension: int) -> list[bytes]:
+    """
+    Encode every rendition of ``data``, in RENDITIONS order. Runs in the media
+    process pool, so it only takes and returns picklable values.
+    """
+    try:
+        image = Image.open(BytesIO(data))
+    except (UnidentifiedImageError, OSError):
+        raise ImageRejected("Invalid image file")
+    # Image.open only reads the header, so oversized images are refused
+    # before any pixel memory is allocated.
+    if max(image.size) > max_dimension:
+        raise ImageRejected(
+            f"Image dimensions exceed {max_dimension}x{max_dimension} pixels"
+        )
+    largest = RENDITIONS[0].size
+    # Lets the JPEG decoder downscale by 1/2, 1/4 or 1/8 while decoding.
+    image.draft("RGB", (largest, largest))
+    try:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        raise ImageRejected("Invalid image file")
+
+    results = []
+    for rendition in RENDITIONS:
+        resized = image.copy()
+        resized.thumbnail((rendition.size, rendition.size), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        options = {"progressive": True} if rendition.format == "JPEG" else {}
+        resized.save(
+            buffer,
+            format=rendition.format,
+            quality=rendition.quality,
+            optimize=True,
+            **options,
+        )
+        results.append(buffer.getvalue())
+    return results
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def get_media_pool() -> ProcessPoolExecutor | None:
+    """
+    Process pool for image encoding, started on first use. Returns None when
+    MEDIA_WORKERS is 0, in which case images are encoded on a thread instead.
+    """
+    global _pool
+    if settings.MEDIA_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.MEDIA_WORKERS,
+                # The app process runs other threads; forking it is unsafe.
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_media_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def rendition_key(base: str, rendition: Rendition) -> str:
+    name = f"{base}_{rendition.suffix}" if rendition.suffix else base
+    return f"{name}.{EXTENSIONS[rendition.format]}"
+
+
+def rendition_keys(key: str) -> list[str]:
+    """
+    Keys of every rendition of the image stored under main key ``key``.
+    """
+    base = key.rsplit(".", 1)[0]
+    return [rendition_key(base, rendition) for rendition in RENDITIONS]
+
+
+def track_media(key: str, url: str):
+    """
+    Record an upload as a garbage collection candidate until something
+    references it. Re-uploads of existing content refresh ``orphaned_at``, so
+    an object is never collected right after being handed out again.
+
+    Committed on a session of its own, so the caller's request session is
+    left with only its own pending changes.
+    """
+    with SessionLocal() as db:
+        now = datetime.now(timezone.utc)
+        statement = (
+            insert_dialect(db)
+            .insert(MediaObject)
+            .values(key=key, url=url, orphaned_at=now)
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[MediaObject.key], set_={"orphaned_at": now}
+            )
+        )
+        db.commit()
+
+
+async def read_upload(file: UploadFile) -> bytes:
+    limit = settings.MEDIA_MAX_UPLOAD_BYTES
+    chunks, size = [], 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > limit:
+            raise BadRequest(f"Image must be at most {limit // (1024 * 1024)} MB")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def render(data: bytes) -> list[bytes]:
+    pool = get_media_pool()
+    try:
+        if pool is None:
+            return await run_in_threadpool(
+                render_image, data, settings.MEDIA_MAX_DIMENSION
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            pool, render_image, data, settings.MEDIA_MAX_DIMENSION
+        )
+    except ImageRejected as exc:
+        raise BadRequest(str(exc))
+
+
+async def upload_image(file: UploadFile, folder: str = "profile_pictures") -> str:
+    """
+    Validate and resize an uploaded image, store all of its renditions and
+    return the URL of the main one.
+
+    Objects are named after the SHA-256 of the uploaded bytes, so uploading the
+    same file again skips both the resize and the upload.
+    """
+    data = await read_upload(file)
+    storage = get_storage()
+    base = f"{folder}/{hashlib.sha256(data).hexdigest()}"
+    key = rendition_key(base, RENDITIONS[0])
+    url = storage.url(key)
+    # Tracked before the existence check so a concurrent garbage collection
+    # either keeps the object or finishes deleting it before we look.
+    await run_in_threadpool(track_media, key, url)
+    if await run_in_threadpool(storage.exists, key):
+        return url
+
+    main, *others = await render(data)
+    await asyncio.gather(
+        *(
+            run_in_threadpool(
+                storage.put,
+                rendition_key(base, rendition),
+                body,
+                rendition.content_type,
+            )
+            for rendition, body in zip(RENDITIONS[1:], others)
+        )
+    )
+    # The main rendition goes last (and is deleted first), so its presence
+    # means the whole set is stored.
+    await run_in_threadpool(storage.put, key, main, RENDITIONS[0].content_type)
+    return url
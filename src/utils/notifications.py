@@ -0,0 +1,140 @@
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from src.utils.email_utils import get_mail_queue, wake_mail_worker
+
+BATCH_SIZE = 500
+JOB_RETENTION = 7 * 24 * 3600
+# A pending or running job not saved for this long lost its process.
+JOB_LEASE = 600
+
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="notifications")
+
+
+@dataclass
+class NotificationJob:
+    subject: str
+    total: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "pending"
+    queued: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+
+
+def jobs_dir() -> Path:
+    path = get_mail_queue().root / "jobs"
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def save_job(job: NotificationJob):
+    # Kept next to the spool so every app process sees the same jobs.
+    tmp = get_mail_queue().root / "tmp" / f"job-{job.id}.json"
+    tmp.write_text(json.dumps(asdict(job)))
+    os.replace(tmp, jobs_dir() / f"{job.id}.json")
+
+
+def work_path(job_id: str) -> Path:
+    return jobs_dir() / f"{job_id}.work.json"
+
+
+def save_work(job: NotificationJob, recipients: list[str], body: str):
+    # The recipients outlive the process, so another one can finish the job.
+    tmp = get_mail_queue().root / "tmp" / f"job-{job.id}.work.json"
+    tmp.write_text(json.dumps({"recipients": recipients, "body": body}))
+    os.replace(tmp, work_path(job.id))
+
+
+def get_job(job_id: str) -> NotificationJob | None:
+    try:
+        path = jobs_dir() / f"{uuid.UUID(hex=job_id).hex}.json"
+        return NotificationJob(**json.loads(path.read_text()))
+    except (ValueError, FileNotFoundError):
+        return None
+
+
+def prune_jobs():
+    deadline = time.time() - JOB_RETENTION
+    for path in jobs_dir().iterdir():
+        try:
+            if path.stat().st_mtime < deadline:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def run_job(job: NotificationJob, recipients: list[str], body: str):
+    """
+    Queue the recipients from ``job.queued`` on, saving progress after each
+    batch. A resumed job may queue part of its last unsaved batch twice.
+    """
+    queue = get_mail_queue()
+    job.status = "running"
+    save_job(job)
+    try:
+        for start in range(job.queued, len(recipients), BATCH_SIZE):
+            for to in recipients[start : start + BATCH_SIZE]:
+                queue.put(to, job.subject, body)
+            job.queued = min(start + BATCH_SIZE, len(recipients))
+            save_job(job)
+            wake_mail_worker()
+        job.status = "done"
+    except Exception as exc:
+        job.status = "failed"
+        job.error = str(exc)
+    save_job(job)
+    work_path(job.id).unlink(missing_ok=True)
+
+
+def recover_jobs() -> int:
+    """
+    Resume jobs whose process died, from their last saved batch: pending or
+    running jobs that were not saved for JOB_LEASE seconds. Jobs without
+    their recipients are marked failed. Returns how many were resumed.
+    """
+    deadline = time.time() - JOB_LEASE
+    resumed = 0
+    for path in jobs_dir().glob("*.json"):
+        if path.name.endswith(".work.json"):
+            continue
+        try:
+            if path.stat().st_mtime >= deadline:
+                continue
+            job = NotificationJob(**json.loads(path.read_text()))
+        except (ValueError, FileNotFoundError):
+            continue
+        if job.status not in ("pending", "running"):
+            continue
+        try:
+            work = json.loads(work_path(job.id).read_text())
+        except (ValueError, FileNotFoundError):
+            job.status = "failed"
+            job.error = "Recipients were lost"
+            save_job(job)
+            continue
+        # Saving renews the lease, so other processes leave the job alone.
+        save_job(job)
+        executor.submit(run_job, job, work["recipients"], work["body"])
+        resumed += 1
+    return resumed
+
+
+def notify_many(recipients: list[str], subject: str, body: str) -> NotificationJob:
+    """
+    Queue the same email for every recipient on a background thread and return
+    the job right away; poll get_job() for progress. Delivery itself is done by
+    the mail worker. The recipients are saved with the job, so
+    recover_jobs() can finish it if this process dies.
+    """
+    prune_jobs()
+    job = NotificationJob(subject=subject, total=len(recipients))
+    save_work(job, recipients, body)
+    save_job(job)
+    executor.submit(run_job, job, recipients, body)
+    return job
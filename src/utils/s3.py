@@ -1,33 +1,68 @@
-import uuid
+from functools import lru_cache
 from io import BytesIO
 
 import boto3
-from PIL import Image
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from src.core.config import settings
 
 
-def upload_image_to_s3(file, folder="profile_pictures"):
-    s3 = boto3.client(
+@lru_cache()
+def get_s3_client():
+    """
+    One client per process. botocore clients are thread-safe and keep a pool of
+    HTTPS connections, so reusing it saves a TLS handshake per upload.
+    """
+    return boto3.client(
         "s3",
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         region_name=settings.AWS_REGION,
+        config=Config(max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS),
     )
 
-    image = Image.open(file.file)
-    image = image.convert("RGB")
-    buffer = BytesIO()
-    image.save(buffer, format="JPEG")
-    buffer.seek(0)
 
-    filename = f"{folder}/{uuid.uuid4()}.jpg"
+class S3Storage:
+    def __init__(self, bucket: str, region: str, client=None):
+        self.bucket = bucket
+        self.region = region
+        self.client = client or get_s3_client()
 
-    s3.upload_fileobj(
-        buffer,
-        settings.AWS_BUCKET_NAME,
-        filename,
-        ExtraArgs={"ContentType": "image/jpeg"},
-    )
+    def put(self, key: str, data: bytes, content_type: str):
+        self.client.upload_fileobj(
+            BytesIO(data),
+            self.bucket,
+            key,
+            ExtraArgs={
+                "ContentType": content_type,
+                # Keys are never reused for different content.
+                "CacheControl": "public, max-age=31536000, immutable",
+            },
+        )
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_many(self, keys: list[str]):
+        # DeleteObjects takes at most 1000 keys per request.
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [{"Key": key} for key in keys[start : start + 1000]],
+                    "Quiet": True,
+                },
+            )
 
-    return f"https://{settings.AWS_BUCKET_NAME}.s3.{settings.AWS_REGION}.amazonaws.com/{filename}"
+    def url(self, key: str) -> str:
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{key}"
@@ -0,0 +1,82 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from src.core.config import settings
+from src.utils.s3 import S3Storage
+
+
+class LocalStorage:
+    """
+    Stores objects under ``root`` on the local disk; main.py serves them at
+    ``base_url``. Meant for development and single-host deployments.
+    """
+
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+    def delete_many(self, keys: list[str]):
+        for key in keys:
+            self.delete(key)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+class MemoryStorage:
+    """
+    Keeps objects in a dict, for tests.
+    """
+
+    def __init__(self, base_url: str = "memory://media"):
+        self.base_url = base_url
+        self.objects: dict[str, tuple[bytes, str]] = {}
+
+    def put(self, key: str, data: bytes, content_type: str):
+        self.objects[key] = (data, content_type)
+
+    def exists(self, key: str) -> bool:
+        return key in self.objects
+
+    def delete(self, key: str):
+        self.objects.pop(key, None)
+
+    def delete_many(self, keys: list[str]):
+        for key in keys:
+            self.delete(key)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+@lru_cache()
+def get_storage():
+    """
+    The configured backend. Every backend has put, exists, delete, delete_many
+    and url.
+    """
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.MEDIA_ROOT, settings.MEDIA_URL)
+    if settings.STORAGE_BACKEND == "memory":
+        return MemoryStorage()
+    return S3Storage(settings.AWS_BUCKET_NAME, settings.AWS_REGION)
@@ -1,14 +1,28 @@
+import json
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
 from src.models.models import Role, User, Teacher, Student, Course, StudentCourse
 from src.crud import admin as admin_crud
+from src.database.base import Base
+from src.utils.json_stream import iter_json_array, iter_ndjson
+from src.utils.custom_responses import NotFound
+from src.utils.pagination import MAX_PAGE_SIZE, encode_cursor
 
 
 class TestAdminCrud(unittest.TestCase):
     def setUp(self):
         self.mock_db = MagicMock()
+        # Hiding and deleting courses start notification jobs; keep them
+        # out of the real spool.
+        notify = patch("src.crud.admin.notify_many")
+        notify.start()
+        self.addCleanup(notify.stop)
         self.user_id = uuid4()
         self.course_id = uuid4()
         self.student_id = uuid4()
@@ -35,6 +49,40 @@ class TestAdminCrud(unittest.TestCase):
         result = admin_crud.list_all_users(self.mock_db)
         self.assertIsInstance(result, list)
 
+    def test_list_all_users_uses_single_query(self):
+        self.mock_teacher.teacher = Teacher(
+            id=self.user_id,
+            first_name="T",
+            last_name="L",
+            phone_number="123",
+            linked_in_acc="linkedin",
+        )
+        page = self.mock_db.query().options().order_by().limit()
+        page.all.return_value = [self.mock_teacher]
+        self.mock_db.query.reset_mock()
+
+        result = admin_crud.list_all_users(self.mock_db)
+
+        self.mock_db.query.assert_called_once_with(User)
+        self.assertEqual(result[0]["first_name"], "T")
+        self.assertEqual(result[0]["phone_number"], "123")
+
+    def test_list_all_users_limit_is_capped(self):
+        query = self.mock_db.query().options()
+        admin_crud.list_all_users(self.mock_db, limit=10_000)
+        query.order_by().limit.assert_called_with(MAX_PAGE_SIZE)
+
+    def test_list_all_users_with_cursor(self):
+        query = self.mock_db.query().options()
+        admin_crud.list_all_users(
+            self.mock_db, cursor=encode_cursor("teacher@example.com")
+        )
+        query.filter.assert_called_once()
+
+    def test_list_all_users_invalid_cursor(self):
+        with self.assertRaises(Exception):
+            admin_crud.list_all_users(self.mock_db, cursor="not-a-cursor")
+
     def test_list_all_users_invalid_role(self):
         with self.assertRaises(Exception):
             admin_crud.list_all_users(self.mock_db, role="INVALID")
@@ -71,9 +119,11 @@ class TestAdminCrud(unittest.TestCase):
         self.assertEqual(result["message"], "Teacher is already approved")
 
     def test_list_all_courses_empty(self):
-        self.mock_db.query().offset().limit().all.return_value = []
+        query = self.mock_db.query().options().options().order_by()
+        query.add_columns().offset().limit().all.return_value = []
         result = admin_crud.list_all_courses(self.mock_db)
-        self.assertIsInstance(result, list)
+        self.assertEqual(result, [])
+        query.add_columns().offset().limit.assert_called_with(10)
 
     def test_toggle_course_visibility(self):
         course = Course(
@@ -83,6 +133,44 @@ class TestAdminCrud(unittest.TestCase):
         result = admin_crud.toggle_course_visability(self.mock_db, self.course_id)
         self.assertIn("message", result)
 
+    @patch("src.crud.admin.notify_many")
+    def test_hiding_course_notifies_enrolled_students_in_one_job(self, notify):
+        course = Course(id=self.course_id, title="Course A", is_hidden=False)
+        self.mock_db.query().filter().first.return_value = course
+        self.mock_db.query().join().filter().all.return_value = [
+            ("a@example.com",),
+            ("b@example.com",),
+        ]
+        notify.return_value.id = "job-1"
+
+        result = admin_crud.toggle_course_visability(self.mock_db, self.course_id)
+
+        self.assertEqual(result["job_id"], "job-1")
+        notify.assert_called_once()
+        self.assertEqual(notify.call_args.args[0], ["a@example.com", "b@example.com"])
+
+    @patch("src.crud.admin.notify_many")
+    def test_delete_course_notifies_after_commit(self, notify):
+        course = Course(id=self.course_id, title="Course A")
+        self.mock_db.query().filter().first.return_value = course
+        self.mock_db.query().join().filter().all.return_value = [("a@example.com",)]
+
+        def check_committed(*args, **kwargs):
+            self.mock_db.commit.assert_called()
+            return MagicMock(id="job-1")
+
+        notify.side_effect = check_committed
+
+        admin_crud.delete_course(self.mock_db, self.course_id)
+
+        notify.assert_called_once()
+        self.mock_db.delete.assert_called_with(course)
+
+    @patch("src.crud.admin.get_job", return_value=None)
+    def test_get_notification_job_not_found(self, _):
+        with self.assertRaises(NotFound):
+            admin_crud.get_notification_job("missing")
+
     def test_delete_course_successfully(self):
         course = Course(id=self.course_id, title="Course A", students=[])
         self.mock_db.query().filter().first.side_effect = [course]
@@ -144,3 +232,116 @@ class TestAdminCrud(unittest.TestCase):
         self.mock_db.query().filter().first.return_value = None
         with self.assertRaises(Exception):
             admin_crud.delete_course(self.mock_db, self.course_id)
+
+
+class TestStreamedListings(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        teacher = User(email="t@example.com", password="x", role=Role.TEACHER)
+        self.db.add(teacher)
+        self.db.flush()
+        self.db.add(Teacher(id=teacher.id, first_name="T", last_name="L"))
+        courses = [Course(title=f"C{n}", owner_id=teacher.id) for n in range(5)]
+        self.db.add_all(courses)
+        for n in range(3):
+            user = User(email=f"s{n}@example.com", password="x", role=Role.STUDENT)
+            self.db.add(user)
+            self.db.flush()
+            self.db.add(Student(id=user.id, first_name=f"S{n}"))
+            self.db.flush()
+            for course in courses[n:]:
+                self.db.add(StudentCourse(student_id=user.id, course_id=course.id))
+        self.db.commit()
+        self.db.expunge_all()
+
+        self.queries = 0
+        event.listen(self.engine, "before_cursor_execute", self.count)
+
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self.count)
+        self.db.close()
+        self.engine.dispose()
+
+    def count(self, *args):
+        self.queries += 1
+
+    def test_users_are_streamed_in_email_order(self):
+        users = list(admin_crud.iter_all_users(self.db, role="student", batch_size=2))
+
+        self.assertEqual(
+            [user["email"] for user in users],
+            ["s0@example.com", "s1@example.com", "s2@example.com"],
+        )
+        self.assertEqual(users[0]["first_name"], "S0")
+
+    def test_course_students_cost_three_queries_per_batch(self):
+        courses = list(admin_crud.iter_all_courses(self.db, batch_size=2))
+
+        self.assertEqual(
+            [len(course["students"]) for course in courses], [1, 2, 3, 3, 3]
+        )
+        self.assertEqual(courses[4]["students"][0]["email"][0], "s")
+        self.assertEqual(courses[0]["teacher_name"], "T L")
+        # The id cursor, then the courses, their students and those students'
+        # users for each of three batches.
+        self.assertEqual(self.queries, 10)
+
+    def test_stream_runs_under_orm_execute_hooks(self):
+        # The search index and response cache register such hooks app-wide.
+        def hook(orm_execute_state):
+            pass
+
+        event.listen(Session, "do_orm_execute", hook)
+        self.addCleanup(event.remove, Session, "do_orm_execute", hook)
+
+        courses = list(admin_crud.iter_all_courses(self.db, batch_size=2))
+
+        self.assertEqual(len(courses[4]["students"]), 3)
+
+    def test_page_matches_stream(self):
+        page = admin_crud.list_all_courses(self.db, skip=1, limit=2)
+        streamed = list(admin_crud.iter_all_courses(self.db))
+
+        self.assertEqual(page, streamed[1:3])
+
+    def test_encodings_round_trip(self):
+        users = list(admin_crud.iter_all_users(self.db))
+        array = b"".join(iter_json_array(iter(users), batch_size=2))
+        lines = b"".join(iter_ndjson(iter(users), batch_size=2)).splitlines()
+
+        self.assertEqual(json.loads(array), users)
+        self.assertEqual([json.loads(line) for line in lines], users)
+        self.assertEqual(b"".join(iter_json_array([])), b"[]")
+
+    def test_page_reports_total_in_constant_queries(self):
+        courses, total = admin_crud.page_all_courses(self.db, skip=1, limit=3)
+
+        self.assertEqual(total, 5)
+        self.assertEqual([course["title"] for course in courses], ["C1", "C2", "C3"])
+        self.assertEqual(courses[2]["students"][2]["email"], "s2@example.com")
+        # The page, its students, and their users.
+        self.assertEqual(self.queries, 3)
+
+    def test_page_past_the_end_still_counts(self):
+        self.assertEqual(admin_crud.page_all_courses(self.db, skip=10), ([], 5))
+
+    def test_students_can_be_omitted(self):
+        courses, _ = admin_crud.page_all_courses(self.db, include_students=False)
+
+        self.assertNotIn("students", courses[0])
+        self.assertEqual(self.queries, 1)
+
+    def test_page_size_is_clamped(self):
+        courses, total = admin_crud.page_all_courses(self.db, limit=0)
+        self.assertEqual((len(courses), total), (5, 5))
+
+        with patch("src.crud.admin.clamp_limit", return_value=2) as clamp:
+            courses, _ = admin_crud.page_all_courses(self.db, limit=10_000)
+        clamp.assert_called_once_with(10_000)
+        self.assertEqual(len(courses), 2)
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
 from src.models.models import Role, User
@@ -15,6 +15,11 @@ class TestAdminRoutes(unittest.TestCase):
             is_active=True,
         )
         self.mock_db = MagicMock()
+        # Hiding and deleting courses start notification jobs; keep them
+        # out of the real spool.
+        notify = patch("src.crud.admin.notify_many")
+        notify.start()
+        self.addCleanup(notify.stop)
 
     def test_list_users_no_filters(self):
         # Simulate no users found
@@ -108,7 +113,9 @@ class TestAdminRoutes(unittest.TestCase):
             admin.delete_course(self.mock_db, uuid4())
 
     def test_remove_student_from_course_success(self):
-        student_course_mock = MagicMock()
+        student_course_mock = MagicMock(
+            is_approved=True, is_favorite=False, progress=0, score=None
+        )
         self.mock_db.query().filter().first.return_value = student_course_mock
         result = admin.remove_student_from_course(self.mock_db, uuid4(), uuid4())
         self.assertIn("message", result)
@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api import deps
+from src.crud.aio import student as aio_student
+from src.crud.aio import user as aio_user
+from src.crud.aio.base import asyncify
+from src.database.session import async_database_url
+from src.models.models import Role, User
+
+
+class TestAsyncCrud(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.user_id = uuid4()
+        self.mock_user = User(
+            id=self.user_id, email="test@example.com", role=Role.ADMIN, is_active=True
+        )
+
+    async def test_sync_session_runs_in_threadpool(self):
+        mock_db = MagicMock()
+        mock_db.query().filter().first.return_value = self.mock_user
+        user = await aio_user.get_by_id(mock_db, self.user_id)
+        self.assertEqual(user.email, "test@example.com")
+
+    async def test_async_session_uses_run_sync(self):
+        sync_session = MagicMock()
+        sync_session.query().filter().first.return_value = self.mock_user
+        async_db = MagicMock(spec=AsyncSession)
+        async_db.run_sync = AsyncMock(side_effect=lambda fn: fn(sync_session))
+
+        user = await aio_user.get_by_email(async_db, "Test@Example.com")
+
+        self.assertEqual(user.email, "test@example.com")
+        async_db.run_sync.assert_awaited_once()
+
+    async def test_db_passed_by_keyword_is_replaced(self):
+        sync_session = MagicMock()
+        async_db = MagicMock(spec=AsyncSession)
+        async_db.run_sync = AsyncMock(side_effect=lambda fn: fn(sync_session))
+
+        def toggle(course_id, current_student, db):
+            return db
+
+        result = await asyncify(toggle)(uuid4(), self.mock_user, db=async_db)
+        self.assertIs(result, sync_session)
+
+    async def test_wrappers_keep_names(self):
+        self.assertEqual(aio_student.rate_course.__name__, "rate_course")
+
+    async def test_registration_hashes_outside_run_sync(self):
+        async_db = MagicMock(spec=AsyncSession)
+        async_db.run_sync = AsyncMock(return_value={"id": self.user_id})
+        payload = MagicMock(password="secret")
+
+        with (
+            patch("src.crud.aio.user.hash_password", return_value="hashed") as hashing,
+            patch("src.crud.user.hash_password") as inner_hash,
+        ):
+            await aio_user.register_student(async_db, payload)
+            async_db.run_sync.call_args.args[0](MagicMock())
+
+        hashing.assert_called_once_with("secret")
+        inner_hash.assert_not_called()
+
+    async def test_optional_async_user_uses_the_request_session(self):
+        request = MagicMock(headers={"Authorization": "Bearer token"})
+        async_db = MagicMock(spec=AsyncSession)
+        async_db.run_sync = AsyncMock(side_effect=lambda fn: fn("sync-session"))
+        claims = {"user_id": str(self.user_id), "email": "test@example.com"}
+
+        with (
+            patch("src.core.authentication.jwt.decode", return_value=claims),
+            patch(
+                "src.core.authentication.cached_user", return_value=self.mock_user
+            ) as cached_user,
+        ):
+            user = await deps.optional_async_user(request, async_db)
+
+        self.assertIs(user, self.mock_user)
+        cached_user.assert_called_once_with("sync-session", str(self.user_id), 0)
+
+
+class TestAsyncDatabaseUrl(unittest.TestCase):
+    def test_postgres_url_uses_asyncpg(self):
+        url = async_database_url("postgresql://u:p@db/moodle?sslmode=require")
+        self.assertEqual(url.drivername, "postgresql+asyncpg")
+        self.assertEqual(dict(url.query), {"ssl": "require"})
+
+    def test_other_databases_need_an_explicit_url(self):
+        with self.assertRaises(ValueError) as ctx:
+            async_database_url("sqlite:///moodle.db")
+        self.assertIn("ASYNC_DATABASE_URL", str(ctx.exception))
@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.core import auth_cache
+from src.core.authentication import create_token, from_token
+from src.crud.user import change_password
+from src.database.base import Base
+from src.models.models import Role, User
+from src.utils.ttl_cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        with patch("src.utils.ttl_cache.time.monotonic", return_value=1e12):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+class TestFromTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        with self.Session() as db:
+            user = User(email="s@example.com", password="x", role=Role.STUDENT)
+            db.add(user)
+            db.commit()
+            self.user_id = user.id
+            self.token = create_token(user)
+
+        self.queries = 0
+
+        @event.listens_for(self.engine, "before_cursor_execute")
+        def count(*args):
+            self.queries += 1
+
+        auth_cache.principal_cache.clear()
+
+    def tearDown(self):
+        auth_cache.principal_cache.clear()
+        self.engine.dispose()
+
+    def authenticate(self, token=None):
+        with self.Session() as db:
+            user = from_token(db, token or self.token)
+            return user and (user.id, user.email, user.role)
+
+    def test_second_request_skips_the_database(self):
+        first = self.authenticate()
+        queries = self.queries
+
+        self.assertEqual(self.authenticate(), first)
+        self.assertEqual(self.queries, queries)
+
+    def test_cached_user_is_usable_in_session(self):
+        self.authenticate()
+        with self.Session() as db:
+            user = from_token(db, self.token)
+            user.is_active = False
+            db.commit()
+        auth_cache.invalidate_user(self.user_id)
+
+        with self.Session() as db:
+            self.assertFalse(from_token(db, self.token).is_active)
+
+    def test_password_change_revokes_old_tokens(self):
+        self.authenticate()
+        with self.Session() as db:
+            user = db.get(User, self.user_id)
+            change_password(user, "new")
+            db.commit()
+            new_token = create_token(user)
+        auth_cache.invalidate_user(self.user_id)
+
+        self.assertIsNone(self.authenticate())
+        self.assertIsNotNone(self.authenticate(new_token))
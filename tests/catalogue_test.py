@@ -0,0 +1,148 @@
+import io
+import json
+import unittest
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.crud import catalogue
+from src.database.base import Base
+from src.models.models import Course, Role, Section, Tag, Teacher, User
+
+
+class CatalogueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        user = User(email="t@example.com", password="x", role=Role.TEACHER)
+        self.db.add(user)
+        self.db.flush()
+        self.db.add(Teacher(id=user.id))
+        self.db.commit()
+        self.owner_id = user.id
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def import_text(self, text, format="jsonl", **kwargs):
+        records = catalogue.read_records(io.BytesIO(text.encode()), format)
+        return catalogue.import_courses(self.db, records, self.owner_id, **kwargs)
+
+    def export_text(self, format):
+        courses = catalogue.export_courses(self.db, batch_size=2)
+        return "".join(catalogue.write_records(courses, format))
+
+
+class TestImportCourses(CatalogueTestCase):
+    def test_imports_courses_with_sections_and_tags(self):
+        lines = [
+            {
+                "title": "Python",
+                "tags": ["python", "web"],
+                "sections": [{"title": "Intro", "content": "Hello"}],
+            },
+            {"title": "SQL", "tags": ["data", "python"]},
+        ]
+        text = "\n".join(json.dumps(line) for line in lines)
+
+        result = self.import_text(text)
+
+        self.assertEqual(result, {"imported": 2, "failed": 0, "errors": []})
+        self.assertEqual(self.db.query(Course).count(), 2)
+        self.assertEqual(self.db.query(Section).one().title, "Intro")
+        self.assertEqual(
+            sorted(name for (name,) in self.db.query(Tag.name)),
+            ["data", "python", "web"],
+        )
+
+    def test_bad_records_are_reported_and_skipped(self):
+        text = "\n".join(
+            [
+                json.dumps({"title": "Python"}),
+                "{not json",
+                json.dumps({"title": ""}),
+                json.dumps({"title": "Python"}),
+                json.dumps({"title": "Other", "owner_id": str(uuid4())}),
+            ]
+        )
+
+        result = self.import_text(text, batch_size=2)
+
+        self.assertEqual((result["imported"], result["failed"]), (1, 4))
+        self.assertEqual([error["line"] for error in result["errors"]], [2, 3, 4, 5])
+        self.assertTrue(result["errors"][0]["error"].startswith("Invalid JSON"))
+        self.assertEqual(result["errors"][2]["error"], "Title already exists")
+
+    def test_oversized_tags_are_reported_on_their_line(self):
+        text = "\n".join(
+            [
+                json.dumps({"title": "Python", "tags": ["x" * 101]}),
+                json.dumps({"title": "SQL", "tags": ["t"] * 51}),
+                json.dumps({"title": "Rust", "tags": [" rust "]}),
+            ]
+        )
+
+        result = self.import_text(text)
+
+        self.assertEqual((result["imported"], result["failed"]), (1, 2))
+        self.assertEqual([error["line"] for error in result["errors"]], [1, 2])
+        self.assertTrue(result["errors"][0]["error"].startswith("tags.0:"))
+        self.assertTrue(result["errors"][1]["error"].startswith("tags:"))
+        self.assertEqual([name for (name,) in self.db.query(Tag.name)], ["rust"])
+
+    def test_imports_csv(self):
+        text = (
+            "title,is_premium,tags,sections\n"
+            'Python,true,python;web,"[{""title"": ""Intro""}]"\n'
+            "SQL,,,\n"
+        )
+
+        self.assertEqual(self.import_text(text, "csv")["imported"], 2)
+        course = self.db.query(Course).filter_by(title="Python").one()
+        self.assertTrue(course.is_premium)
+        self.assertEqual(self.db.query(Section).one().course_id, course.id)
+
+
+class TestExportCourses(CatalogueTestCase):
+    def setUp(self):
+        super().setUp()
+        lines = [
+            {
+                "title": f"Course {number}",
+                "tags": ["python"],
+                "sections": [{"title": "Intro", "content": "Hello"}],
+            }
+            for number in range(5)
+        ]
+        self.import_text("\n".join(json.dumps(line) for line in lines))
+
+    def test_round_trips_through_every_format(self):
+        for format in catalogue.FORMATS:
+            with self.subTest(format=format):
+                exported = self.export_text(format)
+                self.db.query(Course).delete()
+                self.db.commit()
+
+                result = self.import_text(exported, format)
+                self.assertEqual(result["imported"], 5)
+                # Ids are new, so the order changes but the rows do not.
+                self.assertEqual(
+                    sorted(self.export_text(format).splitlines()),
+                    sorted(exported.splitlines()),
+                )
+
+    def test_exports_in_batches(self):
+        courses = list(catalogue.export_courses(self.db, batch_size=2))
+
+        self.assertEqual(len(courses), 5)
+        self.assertEqual(courses[0].tags, ["python"])
+        self.assertEqual(courses[0].sections[0].title, "Intro")
+        self.assertEqual(self.db.identity_map.keys(), set())
@@ -3,13 +3,16 @@ from unittest.mock import MagicMock
 from uuid import uuid4
 
 from fastapi import HTTPException
-from src.models.models import Course, Role, StudentCourse, User
+from src.models.models import Course, CourseRatingBucket, Role, StudentCourse, User
 from src.crud import course as course_crud
+from src.utils.pagination import MAX_PAGE_SIZE, encode_cursor
 
 
 class TestCourseCrud(unittest.TestCase):
     def setUp(self):
         self.mock_db = MagicMock()
+        # access_context() caches per session in db.info, a real dict.
+        self.mock_db.info = {}
         self.user_id = uuid4()
         self.course_id = uuid4()
         self.student_id = uuid4()
@@ -31,14 +34,55 @@ class TestCourseCrud(unittest.TestCase):
     def test_get_course_no_user(self):
         query_mock = self.mock_db.query.return_value
         filter_mock = query_mock.filter.return_value
-        filter_mock.filter.return_value.all.return_value = [self.mock_course]
+        page_mock = filter_mock.filter.return_value.order_by.return_value.limit
+        page_mock.return_value.all.return_value = [(self.mock_course, True)]
 
         result = course_crud.get_course(self.mock_db, title="Test")
         self.assertIsInstance(result, list)
         self.assertEqual(result[0]["title"], "Test Course")
 
+    def test_get_course_page_size_is_capped(self):
+        query_mock = self.mock_db.query.return_value
+        order_mock = query_mock.filter.return_value.order_by.return_value
+        course_crud.get_course(self.mock_db, title=None, limit=5000)
+        order_mock.limit.assert_called_once_with(MAX_PAGE_SIZE)
+
+    def test_get_course_with_cursor(self):
+        cursor = encode_cursor("Test Course", self.course_id)
+        query_mock = self.mock_db.query.return_value
+        hidden_mock = query_mock.filter.return_value
+        course_crud.get_course(self.mock_db, title=None, cursor=cursor)
+        hidden_mock.filter.assert_called_once()
+
+    def test_get_course_invalid_cursor(self):
+        cursor = encode_cursor("Test Course", "not-a-uuid")
+        with self.assertRaises(HTTPException):
+            course_crud.get_course(self.mock_db, title=None, cursor=cursor)
+
+    def test_get_course_student_premium_rating_hidden(self):
+        premium_course = Course(
+            id=uuid4(),
+            title="Premium",
+            is_premium=True,
+            rating=9.0,
+            owner_id=self.user_id,
+        )
+        query_mock = self.mock_db.query.return_value.outerjoin.return_value
+        page_mock = query_mock.filter.return_value.order_by.return_value.limit
+        page_mock.return_value.all.return_value = [
+            (self.mock_course, True),
+            (premium_course, False),
+        ]
+
+        result = course_crud.get_course(
+            self.mock_db, title=None, current_user=self.mock_user
+        )
+        self.assertIn("rating", result[0])
+        self.assertNotIn("rating", result[1])
+
     def test_get_course_by_id_not_found(self):
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
+        query_mock = self.mock_db.query.return_value.add_columns.return_value
+        query_mock.filter.return_value.first.return_value = None
         with self.assertRaises(HTTPException):
             course_crud.get_course_by_id(self.mock_db, self.course_id)
 
@@ -46,19 +90,14 @@ class TestCourseCrud(unittest.TestCase):
         premium_course = Course(
             id=self.course_id, is_hidden=False, is_premium=True, owner_id=self.user_id
         )
-        self.mock_db.query.return_value.filter.return_value.first.return_value = (
-            premium_course
+        query_mock = self.mock_db.query.return_value.add_entity.return_value
+        query_mock.outerjoin.return_value.filter.return_value.first.return_value = (
+            premium_course,
+            None,
         )
         self.mock_user.role = Role.STUDENT
         self.mock_user.id = self.user_id
 
-        def filter_side_effect(*args, **kwargs):
-            mock_q = MagicMock()
-            mock_q.first.return_value = None
-            return mock_q
-
-        self.mock_db.query.return_value.filter.side_effect = filter_side_effect
-
         with self.assertRaises(HTTPException):
             course_crud.get_course_by_id(self.mock_db, self.course_id, self.mock_user)
 
@@ -79,8 +118,10 @@ class TestCourseCrud(unittest.TestCase):
 
     def test_update_specific_course_not_owner(self):
         other_user = User(id=uuid4(), role=Role.STUDENT)
-        self.mock_db.query.return_value.filter.return_value.first.return_value = (
-            self.mock_course
+        query_mock = self.mock_db.query.return_value.add_entity.return_value
+        query_mock.outerjoin.return_value.filter.return_value.first.return_value = (
+            self.mock_course,
+            None,
         )
         with self.assertRaises(HTTPException):
             course_crud.update_specific_course(
@@ -106,6 +147,49 @@ class TestCourseCrud(unittest.TestCase):
         self.assertIn("rating", result)
         self.assertEqual(result["rating"], 8.0)
 
+    def test_rating_course_reads_stored_aggregates(self):
+        self.mock_course.rating_count = 2
+        self.mock_course.rating_buckets = [
+            CourseRatingBucket(bucket=4, count=1),
+            CourseRatingBucket(bucket=5, count=1),
+        ]
+        self.mock_db.query.return_value.filter.return_value.first.return_value = (
+            self.mock_course
+        )
+        rows = self.mock_db.query.return_value.outerjoin.return_value.filter
+        rows.return_value.order_by.return_value.limit.return_value.all.return_value = [
+            (self.student_id, 4.0, "John"),
+            (uuid4(), 5.0, None),
+        ]
+
+        result = course_crud.rating_course(self.mock_db, self.course_id, limit=2)
+
+        self.assertEqual(result["rating_count"], 2)
+        self.assertEqual(result["histogram"], {0: 0, 1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+        self.assertEqual(
+            [r["student_name"] for r in result["ratings"]], ["John", "Anonymous"]
+        )
+        self.mock_db.commit.assert_not_called()
+
+    def test_record_rating_adds_new_score(self):
+        course_crud.record_rating(self.mock_db, self.course_id, None, 4.5)
+
+        values = self.mock_db.query.return_value.filter.return_value.update.call_args
+        self.assertEqual(len(values.args[0]), 3)
+        self.assertEqual(self.mock_db.execute.call_count, 1)
+
+    def test_record_rating_within_same_bucket_skips_histogram(self):
+        course_crud.record_rating(self.mock_db, self.course_id, 4.0, 4.5)
+
+        self.mock_db.query.return_value.filter.return_value.update.assert_called_once()
+        self.mock_db.execute.assert_not_called()
+
+    def test_record_rating_unchanged_is_noop(self):
+        course_crud.record_rating(self.mock_db, self.course_id, 3.0, 3.0)
+
+        self.mock_db.query.assert_not_called()
+        self.mock_db.execute.assert_not_called()
+
     def test_rating_course_not_found(self):
         self.mock_db.query.return_value.filter.return_value.first.return_value = None
         with self.assertRaises(HTTPException):
@@ -114,17 +198,11 @@ class TestCourseCrud(unittest.TestCase):
     def test_get_courses_by_tag_id_as_admin(self):
         self.mock_user.role = Role.ADMIN
 
-        tag = MagicMock()
-        tag.course_tags = []
-
-        course_tag_mock = MagicMock()
-        course_tag_mock.course = self.mock_course
-        tag.course_tags.append(course_tag_mock)
-
-        self.mock_db.query.return_value.filter.return_value.first.return_value = tag
-
-        self.mock_user.student = MagicMock()
-        self.mock_user.student.courses = []
+        self.mock_db.query.return_value.filter.return_value.scalar.return_value = 1
+        tagged = self.mock_db.query.return_value.filter.return_value.filter.return_value
+        tagged.order_by.return_value.limit.return_value.all.return_value = [
+            (self.mock_course, True)
+        ]
 
         result = course_crud.get_courses_by_tag_id(
             self.mock_db, self.tag_id, self.mock_user
@@ -133,6 +211,6 @@ class TestCourseCrud(unittest.TestCase):
         self.assertEqual(result[0]["id"], self.mock_course.id)
 
     def test_get_courses_by_tag_id_not_found(self):
-        self.mock_db.query.return_value.filter.return_value.first.return_value = None
+        self.mock_db.query.return_value.filter.return_value.scalar.return_value = 0
         with self.assertRaises(HTTPException):
             course_crud.get_courses_by_tag_id(self.mock_db, self.tag_id)
@@ -11,6 +11,8 @@ from src.crud import course as course_crud
 class TestCourseCrud(unittest.TestCase):
     def setUp(self):
         self.mock_db = MagicMock()
+        # access_context() caches per session in db.info, a real dict.
+        self.mock_db.info = {}
         self.course_id = uuid4()
         self.teacher_id = uuid4()
         self.tag_id = uuid4()
@@ -28,7 +30,7 @@ class TestCourseCrud(unittest.TestCase):
 
     def test_get_course_by_id_found(self):
         course = Course(id=self.course_id, title="Course 1", owner_id=self.teacher_id)
-        self.mock_db.query().filter().first.return_value = course
+        self.mock_db.query().add_columns().filter().first.return_value = (course, None)
         result = course_crud.get_course_by_id(
             self.mock_db, self.course_id, current_user=self.user
         )
@@ -38,7 +40,7 @@ class TestCourseCrud(unittest.TestCase):
         filter_mock = MagicMock()
         filter_mock.first.return_value = None
         query_mock = MagicMock()
-        query_mock.filter.return_value = filter_mock
+        query_mock.add_columns.return_value.filter.return_value = filter_mock
         self.mock_db.query.return_value = query_mock
 
         with self.assertRaises(HTTPException):
@@ -70,7 +72,7 @@ class TestCourseCrud(unittest.TestCase):
         filter_mock = MagicMock()
         filter_mock.first.return_value = None
         query_mock = MagicMock()
-        query_mock.filter.return_value = filter_mock
+        query_mock.add_columns.return_value.filter.return_value = filter_mock
         self.mock_db.query.return_value = query_mock
 
         with self.assertRaises(HTTPException):
@@ -92,6 +94,7 @@ class TestCourseCrud(unittest.TestCase):
         tag = Tag(id=self.tag_id)
         tag.courses = [self.mock_course]
         self.mock_db.query().filter().first.return_value = tag
+        self.mock_db.query().filter().scalar.return_value = 1
         result = course_crud.get_courses_by_tag_id(
             self.mock_db, tag_id=self.tag_id, current_user=self.user
         )
@@ -101,6 +104,7 @@ class TestCourseCrud(unittest.TestCase):
         tag = Tag(id=self.tag_id)
         tag.courses = []
         self.mock_db.query().filter().first.return_value = tag
+        self.mock_db.query().filter().scalar.return_value = 1
         result = course_crud.get_courses_by_tag_id(
             self.mock_db, tag_id=self.tag_id, current_user=self.user
         )
@@ -0,0 +1,149 @@
+import os
+import smtplib
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.utils.mail_queue import MailWorker, SpoolQueue
+from src.utils.mail_transport import MemoryTransport, SMTPTransport
+
+
+class TestSpoolQueue(unittest.TestCase):
+    def setUp(self):
+        self.spool = tempfile.TemporaryDirectory()
+        self.queue = SpoolQueue(self.spool.name, max_attempts=2, backoff=60)
+
+    def tearDown(self):
+        self.spool.cleanup()
+
+    def test_claim_is_fifo_and_exclusive(self):
+        first = self.queue.put("a@x.com", "One", "1")
+        second = self.queue.put("b@x.com", "Two", "2")
+
+        self.assertEqual([e.id for e in self.queue.claim(10)], [first.id, second.id])
+        self.assertEqual(self.queue.claim(10), [])
+
+    def test_ack_removes_message(self):
+        email = self.queue.put("a@x.com", "One", "1")
+        self.queue.claim(1)
+        self.queue.ack(email)
+        self.assertEqual(os.listdir(os.path.join(self.spool.name, "cur")), [])
+
+    def test_retry_backs_off_then_fails(self):
+        self.queue.put("a@x.com", "One", "1")
+        (email,) = self.queue.claim(1)
+
+        self.queue.retry(email)
+        self.assertEqual(self.queue.pending(), 1)
+        self.assertEqual(self.queue.claim(1), [])
+
+        with patch("src.utils.mail_queue.time.time", return_value=time.time() + 61):
+            (email,) = self.queue.claim(1)
+        self.queue.retry(email)
+        self.assertEqual(self.queue.pending(), 0)
+        self.assertEqual(len(os.listdir(os.path.join(self.spool.name, "failed"))), 1)
+
+    def test_stale_claim_is_recovered(self):
+        self.queue.put("a@x.com", "One", "1")
+        self.queue.claim(1)
+        self.queue.lease = -1
+
+        self.assertEqual(len(self.queue.claim(1)), 1)
+
+    def test_corrupt_file_is_moved_to_failed(self):
+        new = os.path.join(self.spool.name, "new")
+        for name, content in (("0-bad.json", "{not json"), ("1-odd.json", "[1]")):
+            with open(os.path.join(new, name), "w") as f:
+                f.write(content)
+        email = self.queue.put("a@x.com", "One", "1")
+
+        with self.assertLogs("src.utils.mail_queue", "ERROR"):
+            claimed = self.queue.claim(1)
+
+        self.assertEqual([e.id for e in claimed], [email.id])
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.spool.name, "failed"))),
+            ["0-bad.json", "1-odd.json"],
+        )
+
+
+class TestMailWorker(unittest.TestCase):
+    def setUp(self):
+        self.spool = tempfile.TemporaryDirectory()
+        self.queue = SpoolQueue(self.spool.name)
+        self.transport = MemoryTransport()
+        self.worker = MailWorker(self.queue, self.transport, "noreply@x.com")
+
+    def tearDown(self):
+        self.worker.stop()
+        self.spool.cleanup()
+
+    def test_run_once_sends_batch(self):
+        self.queue.put("a@x.com", "Hello", "Body")
+        self.queue.put("b@x.com", "Hello", "Body")
+
+        self.assertEqual(self.worker.run_once(), 2)
+        self.assertEqual(
+            [m["To"] for m in self.transport.outbox], ["a@x.com", "b@x.com"]
+        )
+        self.assertEqual(self.transport.outbox[0]["From"], "noreply@x.com")
+
+    def test_failed_send_is_retried_later(self):
+        self.transport.send = MagicMock(side_effect=smtplib.SMTPException("down"))
+        self.queue.put("a@x.com", "Hello", "Body")
+
+        self.worker.run_once()
+
+        self.assertEqual(self.queue.pending(), 1)
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_background_thread_delivers(self):
+        self.worker.start()
+        self.queue.put("a@x.com", "Hello", "Body")
+        self.worker.wake()
+
+        deadline = time.monotonic() + 5
+        while not self.transport.outbox and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.transport.outbox), 1)
+
+    def test_idle_worker_runs_upkeep(self):
+        idle = threading.Event()
+        self.worker.on_idle = idle.set
+        self.worker.start()
+
+        self.assertTrue(idle.wait(5))
+
+
+class TestSMTPTransport(unittest.TestCase):
+    @patch("src.utils.mail_transport.smtplib.SMTP_SSL")
+    def test_connection_is_reused(self, mock_smtp):
+        transport = SMTPTransport("smtp.x.com", 465, "user", "pw")
+        transport.send(MagicMock())
+        transport.send(MagicMock())
+
+        mock_smtp.assert_called_once()
+        mock_smtp.return_value.login.assert_called_once_with("user", "pw")
+        self.assertEqual(mock_smtp.return_value.send_message.call_count, 2)
+
+    @patch("src.utils.mail_transport.smtplib.SMTP_SSL")
+    def test_reconnects_when_server_disconnected(self, mock_smtp):
+        stale, fresh = MagicMock(), MagicMock()
+        stale.send_message.side_effect = smtplib.SMTPServerDisconnected()
+        mock_smtp.side_effect = [stale, fresh]
+        transport = SMTPTransport("smtp.x.com", 465, "user", "pw")
+
+        transport.send(MagicMock())
+
+        fresh.send_message.assert_called_once()
+
+    @patch("src.utils.mail_transport.smtplib.SMTP_SSL")
+    def test_idle_connection_is_closed(self, mock_smtp):
+        transport = SMTPTransport("smtp.x.com", 465, "user", "pw", idle_timeout=0)
+        transport.send(MagicMock())
+        transport.idle()
+
+        mock_smtp.return_value.quit.assert_called_once()
+        self.assertIsNone(transport.connection)
@@ -0,0 +1,184 @@
+import asyncio
+import io
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from fastapi import UploadFile
+from PIL import Image, ImageFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.crud import media as media_crud
+from src.database.base import Base
+from src.models.models import Course, MediaObject, Role, Teacher, User
+from src.utils import media
+from src.utils.custom_responses import BadRequest
+from src.utils.s3 import S3Storage
+from src.utils.storage import LocalStorage, MemoryStorage
+
+
+def image_bytes(size=(2000, 1000), format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class TestRenderImage(unittest.TestCase):
+    def test_renditions_fit_their_bounds(self):
+        encoded = media.render_image(image_bytes(), max_dimension=4000)
+
+        sizes = [Image.open(io.BytesIO(data)).size for data in encoded]
+        self.assertEqual(sizes, [(1600, 800), (800, 400), (256, 128)])
+        self.assertEqual(Image.open(io.BytesIO(encoded[1])).format, "WEBP")
+
+    def test_rejects_oversized_image_before_decoding(self):
+        with patch.object(ImageFile.ImageFile, "load") as load:
+            with self.assertRaises(media.ImageRejected):
+                media.render_image(image_bytes(), max_dimension=1000)
+        load.assert_not_called()
+
+    def test_rejects_invalid_image(self):
+        with self.assertRaises(media.ImageRejected):
+            media.render_image(b"not an image", max_dimension=1000)
+
+
+class MediaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.storage = MemoryStorage()
+        patches = [
+            patch.object(media, "get_storage", return_value=self.storage),
+            patch.object(media_crud, "get_storage", return_value=self.storage),
+            patch.object(media.settings, "MEDIA_WORKERS", 0),
+            patch.object(media, "SessionLocal", sessionmaker(bind=self.engine)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def upload(self, data):
+        file = UploadFile(io.BytesIO(data), filename="a.png")
+        return asyncio.run(media.upload_image(file, folder="pics"))
+
+
+class TestUploadImage(MediaTestCase):
+    def test_stores_every_rendition(self):
+        url = self.upload(image_bytes(format="JPEG"))
+
+        keys = sorted(self.storage.objects)
+        self.assertEqual(url, f"memory://media/{keys[0]}")
+        self.assertTrue(keys[0].startswith("pics/") and keys[0].endswith(".jpg"))
+        self.assertEqual(
+            [key.rsplit("_", 1)[1] for key in keys[1:]], ["medium.webp", "thumb.webp"]
+        )
+        self.assertEqual(self.db.query(MediaObject.url).scalar(), url)
+
+    def test_same_content_is_stored_once(self):
+        data = image_bytes()
+        first = self.upload(data)
+        with patch.object(media, "render_image") as render_image:
+            second = self.upload(data)
+
+        render_image.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.storage.objects), 3)
+        self.assertEqual(self.db.query(MediaObject).count(), 1)
+
+    def test_upload_leaves_the_request_session_alone(self):
+        course = Course(title="C", owner_id=uuid4())
+        self.db.add(course)
+
+        url = self.upload(image_bytes())
+
+        self.assertIn(course, self.db.new)
+        self.assertEqual(self.db.query(MediaObject.url).scalar(), url)
+
+    def test_rejects_large_upload(self):
+        with patch.object(media.settings, "MEDIA_MAX_UPLOAD_BYTES", 10):
+            with self.assertRaises(BadRequest):
+                self.upload(image_bytes())
+        self.assertEqual(self.storage.objects, {})
+
+    def test_invalid_image_is_bad_request(self):
+        with self.assertRaises(BadRequest):
+            self.upload(b"not an image")
+
+
+class TestMediaGarbageCollection(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.kept_url = self.upload(image_bytes(size=(10, 10)))
+        self.orphan_url = self.upload(image_bytes(size=(20, 20)))
+        teacher = User(email="t@example.com", password="x", role=Role.TEACHER)
+        self.db.add(teacher)
+        self.db.flush()
+        self.db.add(Teacher(id=teacher.id, profile_picture=self.kept_url))
+        self.db.add(Course(title="C", owner_id=uuid4(), picture=None))
+        self.db.commit()
+
+    def collect(self, grace):
+        return media_crud.collect_media_garbage(self.db, grace=grace, batch_size=1)
+
+    def test_recent_uploads_survive(self):
+        self.assertEqual(self.collect(grace=3600), {"deleted": 0, "kept": 0})
+        self.assertEqual(len(self.storage.objects), 6)
+
+    def test_unreferenced_images_are_deleted(self):
+        self.assertEqual(self.collect(grace=0), {"deleted": 1, "kept": 1})
+
+        kept_key = self.kept_url.removeprefix("memory://media/")
+        self.assertEqual(
+            sorted(self.storage.objects), sorted(media.rendition_keys(kept_key))
+        )
+        self.assertIsNone(
+            self.db.query(MediaObject).filter_by(url=self.orphan_url).first()
+        )
+        kept = self.db.query(MediaObject).filter_by(url=self.kept_url).one()
+        self.assertIsNone(kept.orphaned_at)
+
+    def test_released_picture_is_collected(self):
+        self.collect(grace=0)
+        self.db.query(Teacher).update({Teacher.profile_picture: None})
+        media_crud.release_media(self.db, self.kept_url)
+        self.db.commit()
+        with patch.object(media_crud, "datetime") as clock:
+            clock.now.return_value = datetime.now(timezone.utc) + timedelta(hours=2)
+            self.assertEqual(self.collect(grace=3600), {"deleted": 1, "kept": 0})
+        self.assertEqual(self.storage.objects, {})
+
+
+class TestStorage(unittest.TestCase):
+    def test_local_storage_writes_under_root(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = LocalStorage(root, "/media/")
+            storage.put("a/b.jpg", b"data", "image/jpeg")
+
+            self.assertEqual(storage.path("a/b.jpg").read_bytes(), b"data")
+            self.assertEqual(storage.url("a/b.jpg"), "/media/a/b.jpg")
+            with self.assertRaises(ValueError):
+                storage.put("../escape.jpg", b"data", "image/jpeg")
+
+    def test_s3_storage_reuses_client(self):
+        client = MagicMock()
+        storage = S3Storage("bucket", "eu-west-1", client=client)
+        storage.put("a.jpg", b"data", "image/jpeg")
+        storage.put("b.jpg", b"data", "image/jpeg")
+
+        self.assertEqual(client.upload_fileobj.call_count, 2)
+        self.assertEqual(
+            storage.url("a.jpg"), "https://bucket.s3.eu-west-1.amazonaws.com/a.jpg"
+        )
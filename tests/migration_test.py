@@ -0,0 +1,256 @@
+import unittest
+from uuid import uuid4
+
+from alembic import command
+from sqlalchemy import create_engine, inspect, not_, select, text
+from sqlalchemy.pool import StaticPool
+
+from src.database.base import Base
+from src.database.migrate import BASELINE_REVISION, alembic_config, migrate
+from src.models.models import Course, Role, Section, StudentCourse, User
+
+NEW_INDEXES = {
+    "courses": {
+        "ix_courses_owner_id",
+        "ix_courses_is_hidden_title",
+        "ix_courses_picture",
+    },
+    "sections": {"ix_sections_course_id", "ix_sections_course_id_position"},
+    "student_courses": {
+        "ix_student_courses_course_id",
+        "ix_student_courses_student_id_is_approved",
+    },
+    "course_tags": {"ix_course_tags_tag_id"},
+    "users": {"ix_users_role_is_approved", "ix_users_pending_teachers"},
+    "teachers": {"ix_teachers_profile_picture"},
+    "students": {"ix_students_profile_picture"},
+    "media_objects": {"ix_media_objects_orphaned_at"},
+    "completed_sections": {"ix_completed_sections_student_id_course_id"},
+}
+
+
+def memory_engine():
+    return create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.engine = memory_engine()
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def index_names(self, table):
+        return {index["name"] for index in inspect(self.engine).get_indexes(table)}
+
+    def current_revision(self):
+        with self.engine.connect() as conn:
+            return conn.execute(
+                text("SELECT version_num FROM alembic_version")
+            ).scalar()
+
+    def test_fresh_database_is_created_and_stamped(self):
+        migrate(self.engine)
+        self.assertIn("courses", inspect(self.engine).get_table_names())
+        self.assertIsNotNone(self.current_revision())
+        for table, indexes in NEW_INDEXES.items():
+            self.assertTrue(indexes <= self.index_names(table))
+
+    def create_legacy_database(self):
+        """
+        The schema as create_all built it before migrations existed.
+        """
+        migrate(self.engine)
+        with self.engine.begin() as conn:
+            command.downgrade(alembic_config(conn), BASELINE_REVISION)
+            conn.execute(text("DROP TABLE alembic_version"))
+
+    def test_legacy_database_is_upgraded(self):
+        self.create_legacy_database()
+        self.assertNotIn("ix_courses_owner_id", self.index_names("courses"))
+
+        migrate(self.engine)
+
+        for table, indexes in NEW_INDEXES.items():
+            self.assertTrue(indexes <= self.index_names(table))
+
+    def test_legacy_ratings_are_backfilled(self):
+        self.create_legacy_database()
+        course_id = uuid4()
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO courses (id, title, owner_id) VALUES (:id, 'C', :o)"),
+                {"id": course_id.hex, "o": uuid4().hex},
+            )
+            for score in (4.5, 4.0, 1.0):
+                conn.execute(
+                    text(
+                        "INSERT INTO student_courses (student_id, course_id, score) "
+                        "VALUES (:s, :c, :score)"
+                    ),
+                    {"s": uuid4().hex, "c": course_id.hex, "score": score},
+                )
+
+        migrate(self.engine)
+
+        with self.engine.connect() as conn:
+            count, total, rating = conn.execute(
+                text("SELECT rating_count, rating_sum, rating FROM courses")
+            ).one()
+            buckets = dict(
+                conn.execute(
+                    text("SELECT bucket, count FROM course_rating_buckets")
+                ).all()
+            )
+        self.assertEqual((count, total, rating), (3, 9.5, 9.5 / 3))
+        self.assertEqual(buckets, {1: 1, 4: 2})
+
+    def test_legacy_progress_is_backfilled(self):
+        self.create_legacy_database()
+        course_id = uuid4()
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO courses (id, title, owner_id) VALUES (:id, 'C', :o)"),
+                {"id": course_id.hex, "o": uuid4().hex},
+            )
+            for title in ("B", "C", "A"):
+                conn.execute(
+                    text(
+                        "INSERT INTO sections (id, title, course_id) "
+                        "VALUES (:s, :title, :c)"
+                    ),
+                    {"s": uuid4().hex, "title": title, "c": course_id.hex},
+                )
+            for progress in (0, 66, 100):
+                conn.execute(
+                    text(
+                        "INSERT INTO student_courses (student_id, course_id, progress) "
+                        "VALUES (:s, :c, :progress)"
+                    ),
+                    {"s": uuid4().hex, "c": course_id.hex, "progress": progress},
+                )
+
+        migrate(self.engine)
+
+        with self.engine.connect() as conn:
+            section_count = conn.execute(
+                text("SELECT section_count FROM courses")
+            ).scalar()
+            completed = conn.execute(
+                text("SELECT completed_sections FROM student_courses ORDER BY progress")
+            ).scalars()
+            self.assertEqual(section_count, 3)
+            self.assertEqual(list(completed), [0, 2, 3])
+            positions = conn.execute(
+                text("SELECT title, position FROM sections ORDER BY position")
+            ).all()
+        self.assertEqual(positions, [("A", 1), ("B", 2), ("C", 3)])
+
+    def test_legacy_enrollment_stats_are_backfilled(self):
+        self.create_legacy_database()
+        course_id = uuid4()
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO courses (id, title, owner_id) VALUES (:id, 'C', :o)"),
+                {"id": course_id.hex, "o": uuid4().hex},
+            )
+            for approved, progress, score in (
+                (1, 100, 4.0),
+                (1, 50, None),
+                (0, 100, None),
+            ):
+                conn.execute(
+                    text(
+                        "INSERT INTO student_courses "
+                        "(student_id, course_id, is_approved, progress, score) "
+                        "VALUES (:s, :c, :approved, :progress, :score)"
+                    ),
+                    {
+                        "s": uuid4().hex,
+                        "c": course_id.hex,
+                        "approved": approved,
+                        "progress": progress,
+                        "score": score,
+                    },
+                )
+
+        migrate(self.engine)
+
+        counters = (
+            "enrolled, pending, completed, progress_sum, rating_count, rating_sum"
+        )
+        with self.engine.connect() as conn:
+            course = conn.execute(text(f"SELECT {counters} FROM course_stats")).one()
+        self.assertEqual(tuple(course), (2, 1, 1, 150, 1, 4.0))
+
+    def test_migrate_is_idempotent(self):
+        migrate(self.engine)
+        revision = self.current_revision()
+        migrate(self.engine)
+        self.assertEqual(self.current_revision(), revision)
+
+
+class TestHotQueryPlans(unittest.TestCase):
+    def setUp(self):
+        self.engine = memory_engine()
+        Base.metadata.create_all(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def query_plan(self, statement):
+        with self.engine.connect() as conn:
+            compiled = statement.compile(conn)
+            params = (None,) * len(compiled.positiontup)
+            rows = conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + compiled.string, params
+            ).fetchall()
+        return " | ".join(row[-1] for row in rows)
+
+    def assert_index_scan(self, statement, table):
+        plan = self.query_plan(statement)
+        self.assertIn(f"SEARCH {table} USING", plan)
+        self.assertNotIn(f"SCAN {table}", plan)
+
+    def test_courses_by_owner(self):
+        self.assert_index_scan(
+            select(Course).where(Course.owner_id == uuid4()), "courses"
+        )
+
+    def test_visible_catalogue(self):
+        self.assert_index_scan(
+            select(Course)
+            .where(not_(Course.is_hidden))
+            .order_by(Course.title, Course.id),
+            "courses",
+        )
+
+    def test_sections_by_course(self):
+        self.assert_index_scan(
+            select(Section).where(Section.course_id == uuid4()), "sections"
+        )
+
+    def test_enrollments_by_course(self):
+        self.assert_index_scan(
+            select(StudentCourse).where(StudentCourse.course_id == uuid4()),
+            "student_courses",
+        )
+
+    def test_approved_enrollments_by_student(self):
+        self.assert_index_scan(
+            select(StudentCourse).where(
+                StudentCourse.student_id == uuid4(),
+                StudentCourse.is_approved.is_(True),
+            ),
+            "student_courses",
+        )
+
+    def test_pending_teachers(self):
+        self.assert_index_scan(
+            select(User).where(User.role == Role.TEACHER, User.is_approved.is_(False)),
+            "users",
+        )
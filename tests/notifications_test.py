@@ -0,0 +1,89 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from src.utils import notifications
+from src.utils.mail_queue import SpoolQueue
+
+
+class TestNotificationJobs(unittest.TestCase):
+    def setUp(self):
+        self.spool = tempfile.TemporaryDirectory()
+        self.queue = SpoolQueue(self.spool.name)
+        patcher = patch.object(notifications, "get_mail_queue", return_value=self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Run jobs inline so the tests can inspect the finished state.
+        inline = patch.object(
+            notifications.executor, "submit", side_effect=lambda fn, *args: fn(*args)
+        )
+        inline.start()
+        self.addCleanup(inline.stop)
+        self.addCleanup(self.spool.cleanup)
+
+    def test_job_queues_every_recipient(self):
+        recipients = [f"s{i}@example.com" for i in range(5)]
+        with patch.object(notifications, "BATCH_SIZE", 2):
+            job = notifications.notify_many(recipients, "Hidden", "Course hidden")
+
+        saved = notifications.get_job(job.id)
+        self.assertEqual(saved.status, "done")
+        self.assertEqual((saved.queued, saved.total), (5, 5))
+        self.assertEqual(self.queue.pending(), 5)
+
+    def test_finished_job_drops_its_recipients(self):
+        job = notifications.notify_many(["a@example.com"], "Hidden", "Body")
+        self.assertFalse(notifications.work_path(job.id).exists())
+
+    def stale_job(self, recipients, queued, status="running"):
+        job = notifications.NotificationJob(
+            subject="Hidden", total=len(recipients), status=status, queued=queued
+        )
+        notifications.save_work(job, recipients, "Body")
+        notifications.save_job(job)
+        path = notifications.jobs_dir() / f"{job.id}.json"
+        old = time.time() - notifications.JOB_LEASE - 1
+        os.utime(path, (old, old))
+        return job
+
+    def test_stale_job_resumes_after_last_saved_batch(self):
+        recipients = [f"s{i}@example.com" for i in range(5)]
+        job = self.stale_job(recipients, queued=2)
+
+        self.assertEqual(notifications.recover_jobs(), 1)
+
+        saved = notifications.get_job(job.id)
+        self.assertEqual((saved.status, saved.queued), ("done", 5))
+        self.assertEqual(self.queue.pending(), 3)
+
+    def test_live_job_is_left_alone(self):
+        job = notifications.NotificationJob(subject="Hidden", total=1, status="running")
+        notifications.save_work(job, ["a@example.com"], "Body")
+        notifications.save_job(job)
+
+        self.assertEqual(notifications.recover_jobs(), 0)
+        self.assertEqual(self.queue.pending(), 0)
+
+    def test_stale_job_without_recipients_fails(self):
+        job = self.stale_job(["a@example.com"], queued=0, status="pending")
+        notifications.work_path(job.id).unlink()
+
+        self.assertEqual(notifications.recover_jobs(), 0)
+
+        saved = notifications.get_job(job.id)
+        self.assertEqual(saved.status, "failed")
+        self.assertEqual(saved.error, "Recipients were lost")
+
+    def test_failed_job_records_error(self):
+        with patch.object(self.queue, "put", side_effect=OSError("disk full")):
+            job = notifications.notify_many(["a@example.com"], "Hidden", "Body")
+
+        saved = notifications.get_job(job.id)
+        self.assertEqual(saved.status, "failed")
+        self.assertEqual(saved.error, "disk full")
+
+    def test_unknown_or_malformed_job_id(self):
+        self.assertIsNone(notifications.get_job("0" * 32))
+        self.assertIsNone(notifications.get_job("../../etc/passwd"))
@@ -0,0 +1,57 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.database.pool_metrics import InstrumentedQueuePool, PoolMetrics, pool_status
+
+
+class TestPoolMetrics(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_histogram_is_cumulative(self):
+        metrics = PoolMetrics()
+        metrics.observe_wait(0.0005)
+        metrics.observe_wait(0.02)
+        metrics.observe_wait(10)
+        histogram = metrics.histogram()
+        self.assertEqual(histogram["0.001"], 1)
+        self.assertEqual(histogram["0.025"], 2)
+        self.assertEqual(histogram["5.0"], 2)
+        self.assertEqual(histogram["+Inf"], 3)
+
+    def test_checkout_is_counted(self):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            status = pool_status(self.engine.pool)
+            self.assertEqual(status["checked_out"], 1)
+        status = pool_status(self.engine.pool)
+        self.assertEqual(status["checked_out"], 0)
+        self.assertEqual(status["checkouts"], 1)
+        self.assertEqual(status["connects"], 1)
+
+    def test_exhausted_pool_records_timeout(self):
+        with self.engine.connect():
+            with self.assertRaises(PoolTimeoutError):
+                self.engine.connect()
+        status = pool_status(self.engine.pool)
+        self.assertEqual(status["timeouts"], 1)
+        self.assertGreaterEqual(status["wait_seconds_max"], 0.05)
+
+    def test_metrics_survive_dispose(self):
+        with self.engine.connect():
+            pass
+        self.engine.dispose()
+        with self.engine.connect():
+            pass
+        self.assertEqual(pool_status(self.engine.pool)["checkouts"], 2)
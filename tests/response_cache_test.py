@@ -0,0 +1,135 @@
+import unittest
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.core.response_cache import (
+    MemoryBackend,
+    ResponseCache,
+    json_response,
+    response_cache,
+)
+from src.database.base import Base
+from src.models.models import Course, Tag
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(MemoryBackend(16, 60), max_age=30)
+        self.calls = 0
+        app = FastAPI()
+
+        @app.get("/items")
+        async def items(request: Request):
+            async def build():
+                self.calls += 1
+                return json_response({"calls": self.calls})
+
+            return await self.cache.serve(request, "items", build)
+
+        self.client = TestClient(app)
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get("/items?b=2&a=1")
+        second = self.client.get("/items?a=1&b=2")
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(second.headers["cache-control"], "public, max-age=30")
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get("/items").headers["etag"]
+
+        response = self.client.get("/items", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["etag"], etag)
+
+    def test_invalidate_rebuilds(self):
+        etag = self.client.get("/items").headers["etag"]
+        self.cache.invalidate("items")
+
+        response = self.client.get("/items", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"calls": 2})
+
+
+class TestCommitInvalidation(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def versions(self):
+        return {
+            scope: response_cache.backend.version(scope)
+            for scope in ("courses", "tags")
+        }
+
+    def test_commit_bumps_affected_scopes(self):
+        before = self.versions()
+        with self.Session() as db:
+            db.add(Tag(name="python"))
+            db.commit()
+
+        after = self.versions()
+        self.assertEqual(after["courses"], before["courses"])
+        self.assertEqual(after["tags"], before["tags"] + 1)
+
+    def test_bulk_update_bumps_scopes(self):
+        before = self.versions()
+        with self.Session() as db:
+            db.query(Course).filter(Course.id == uuid4()).update(
+                {Course.rating: 5.0}, synchronize_session=False
+            )
+            db.commit()
+
+        self.assertEqual(self.versions()["courses"], before["courses"] + 1)
+
+    def test_rollback_keeps_cache(self):
+        before = self.versions()
+        with self.Session() as db:
+            db.add(Tag(name="python"))
+            db.flush()
+            db.rollback()
+            db.commit()
+
+        self.assertEqual(self.versions(), before)
+
+
+class TestStreamingResponseCache(unittest.TestCase):
+    def test_stream_is_cached_once_complete(self):
+        cache = ResponseCache(MemoryBackend(16, 60), max_age=30)
+        calls = []
+        app = FastAPI()
+
+        @app.get("/stream")
+        async def stream(request: Request):
+            async def build():
+                calls.append(1)
+                return StreamingResponse(
+                    iter([b'{"a":', b"1}"]), media_type="application/json"
+                )
+
+            return await cache.serve(request, "items", build)
+
+        client = TestClient(app)
+        first = client.get("/stream")
+        second = client.get("/stream")
+
+        self.assertEqual(first.json(), {"a": 1})
+        self.assertNotIn("etag", first.headers)
+        self.assertEqual(second.content, first.content)
+        self.assertIn("etag", second.headers)
+        self.assertEqual(len(calls), 1)
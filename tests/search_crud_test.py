@@ -0,0 +1,116 @@
+import unittest
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.crud import search
+from src.database.base import Base
+from src.models.models import Course, CourseTag, Role, Tag, User
+from src.utils.custom_responses import BadRequest
+
+
+class TestTrigrams(unittest.TestCase):
+    def test_trigrams_match_pg_trgm(self):
+        expected = {"  c", " ca", "cat", "at "}
+        self.assertEqual(search.trigrams("Cat"), expected)
+        self.assertEqual(search.trigrams("cat, CAT"), expected)
+
+    def test_similarity(self):
+        self.assertEqual(search.similarity("python", "python"), 1.0)
+        self.assertGreater(search.similarity("python", "pyton"), 0.3)
+        self.assertEqual(search.similarity("python", "java"), 0.0)
+
+    def test_index_ranks_prefix_before_fuzzy(self):
+        index = search.TrigramIndex(
+            [(1, "Advanced Python"), (2, "Python Basics"), (3, "Pythons of Asia")]
+        )
+        scores = index.search("pyth")
+        self.assertEqual(set(scores), {1, 2, 3})
+        self.assertTrue(all(score > search.PREFIX_BONUS for score in scores.values()))
+
+        fuzzy = index.search("pyhton basics")
+        self.assertEqual(max(fuzzy, key=fuzzy.get), 2)
+        self.assertLess(fuzzy[2], search.PREFIX_BONUS)
+
+    def test_index_ignores_unrelated_text(self):
+        index = search.TrigramIndex([(1, "Databases"), (2, "Drawing")])
+        self.assertEqual(index.search("python"), {})
+
+
+class TestSearchCourses(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.owner_id = uuid4()
+
+        self.python = self.add_course("Python for Beginners")
+        self.advanced = self.add_course("Advanced Python", is_premium=True)
+        self.hidden = self.add_course("Python Internals", is_hidden=True)
+        self.drawing = self.add_course("Drawing Basics")
+        self.data = self.add_course("Data Wrangling")
+        tag = Tag(name="pandas")
+        self.db.add(tag)
+        self.db.add(CourseTag(course=self.data, tag=tag))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        search.invalidate_search_index()
+
+    def add_course(self, title, **kwargs):
+        course = Course(title=title, owner_id=self.owner_id, **kwargs)
+        self.db.add(course)
+        return course
+
+    def titles(self, q, current_user=None, **kwargs):
+        return [
+            course["title"]
+            for course in search.search_courses(
+                self.db, q, current_user=current_user, **kwargs
+            )
+        ]
+
+    def test_prefix_match_respects_visibility(self):
+        self.assertEqual(
+            self.titles("pyth"), ["Advanced Python", "Python for Beginners"]
+        )
+
+    def test_admin_sees_hidden_courses(self):
+        admin = User(id=uuid4(), role=Role.ADMIN)
+        self.assertIn("Python Internals", self.titles("python", current_user=admin))
+
+    def test_fuzzy_match_ranks_best_first(self):
+        self.assertEqual(self.titles("drawnig basic"), ["Drawing Basics"])
+
+    def test_matches_tag_names(self):
+        self.assertEqual(self.titles("panda"), ["Data Wrangling"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.titles("python", limit=1)), 1)
+
+    def test_premium_rating_is_redacted_for_students(self):
+        student = User(id=uuid4(), role=Role.STUDENT)
+        results = {
+            course["title"]: course
+            for course in search.search_courses(self.db, "python", student)
+        }
+        self.assertNotIn("rating", results["Advanced Python"])
+        self.assertIn("rating", results["Python for Beginners"])
+
+    def test_index_is_refreshed_after_commit(self):
+        self.assertEqual(self.titles("graphic"), [])
+        self.add_course("Graphic Design")
+        self.db.commit()
+        self.assertEqual(self.titles("graphic"), ["Graphic Design"])
+
+    def test_empty_term_is_rejected(self):
+        with self.assertRaises(BadRequest):
+            search.search_courses(self.db, "  ")
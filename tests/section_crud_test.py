@@ -0,0 +1,207 @@
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.crud import section as section_crud
+from src.database.base import Base
+from src.models.models import (
+    CompletedSection,
+    Course,
+    Role,
+    Section,
+    Student,
+    StudentCourse,
+    Teacher,
+    User,
+)
+from src.schemas.all_models import SectionCreate, SectionUpdate
+from src.utils.pagination import encode_cursor
+
+
+class SectionCrudTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+        self.teacher = User(email="t@example.com", password="x", role=Role.TEACHER)
+        self.student = User(email="s@example.com", password="x", role=Role.STUDENT)
+        self.db.add_all([self.teacher, self.student])
+        self.db.flush()
+        self.db.add_all([Teacher(id=self.teacher.id), Student(id=self.student.id)])
+        self.course = Course(title="Python", owner_id=self.teacher.id)
+        self.db.add(self.course)
+        self.db.commit()
+        for number in range(3):
+            self.add_section(f"Part {number}")
+        self.sections = self.db.query(Section).order_by(Section.title).all()
+        self.section_ids = [section.id for section in self.sections]
+        self.student_id = self.student.id
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.count)
+
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self.count)
+        self.db.close()
+        self.engine.dispose()
+
+    def count(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def add_section(self, title):
+        section_crud.add_section_to_course(
+            self.db, SectionCreate(title=title), self.course.id, self.teacher
+        )
+
+    def complete(self, index):
+        # The current user is loaded for the request and not expired by it.
+        student = User(id=self.student_id, role=Role.STUDENT)
+        return section_crud.mark_as_completed(self.db, self.section_ids[index], student)
+
+    def enrollment(self):
+        self.db.expire_all()
+        return self.db.query(StudentCourse).one()
+
+
+class TestMarkAsCompleted(SectionCrudTestCase):
+    def test_progress_is_exact(self):
+        self.assertEqual(self.complete(0), {"progress": 33})
+        self.assertEqual(self.complete(1), {"progress": 66})
+        self.assertEqual(self.complete(2), {"progress": 100})
+        self.assertEqual(self.enrollment().completed_sections, 3)
+
+    def test_completing_again_changes_nothing(self):
+        self.complete(0)
+        self.assertEqual(self.complete(0), {"progress": 33})
+        self.assertEqual(self.enrollment().completed_sections, 1)
+        self.assertEqual(self.db.query(CompletedSection).count(), 1)
+
+    def test_enrolled_completion_is_one_read_and_three_writes(self):
+        self.complete(0)
+        self.statements.clear()
+
+        self.complete(1)
+
+        # The completion, the enrollment and the course counters.
+        writes = [s for s in self.statements if s.split()[0] in ("INSERT", "UPDATE")]
+        self.assertEqual(len(self.statements) - len(writes), 1)
+        self.assertEqual(len(writes), 3)
+
+    def test_premium_course_requires_enrollment(self):
+        self.course.is_premium = True
+        self.db.commit()
+
+        with self.assertRaises(HTTPException):
+            self.complete(0)
+        self.assertEqual(self.db.query(CompletedSection).count(), 0)
+
+
+class TestSectionCount(SectionCrudTestCase):
+    def test_count_follows_added_and_deleted_sections(self):
+        self.complete(0)
+        self.assertEqual(self.course.section_count, 3)
+
+        self.add_section("Part 3")
+        self.assertEqual(self.enrollment().progress, 25)
+
+        section_crud.delete_section_from_course(self.db, self.sections[0], self.teacher)
+        self.db.refresh(self.course)
+        self.assertEqual(self.course.section_count, 3)
+        enrollment = self.enrollment()
+        self.assertEqual((enrollment.completed_sections, enrollment.progress), (0, 0))
+        self.assertEqual(self.db.query(CompletedSection).count(), 0)
+
+
+class TestGetAllSections(SectionCrudTestCase):
+    def list_sections(self, **kwargs):
+        return section_crud.get_all_sections(
+            self.db, self.course.id, current_user=self.teacher, **kwargs
+        )
+
+    def test_sections_are_listed_in_position_order(self):
+        section_crud.update_info_about_section(
+            self.db, self.section_ids[0], SectionUpdate(position=10), self.teacher
+        )
+
+        sections = self.list_sections()
+
+        self.assertEqual(
+            [section["title"] for section in sections], ["Part 1", "Part 2", "Part 0"]
+        )
+        self.assertNotIn("content", sections[0])
+
+    def test_pages_follow_the_cursor(self):
+        first = self.list_sections(limit=2)
+        last = first[-1]
+        second = self.list_sections(
+            limit=2, cursor=encode_cursor(last["position"], last["id"])
+        )
+
+        self.assertEqual([section["position"] for section in first], [1, 2])
+        self.assertEqual([section["title"] for section in second], ["Part 2"])
+
+    def test_title_filter_is_applied(self):
+        sections = self.list_sections(title="part 1")
+        self.assertEqual([section["title"] for section in sections], ["Part 1"])
+
+    def test_large_text_is_not_loaded(self):
+        self.statements.clear()
+        self.list_sections()
+
+        listing = self.statements[-1]
+        self.assertNotIn("sections.content", listing)
+        self.assertNotIn("sections.information", listing)
+
+
+class TestAccessContext(SectionCrudTestCase):
+    def selects(self):
+        return [s for s in self.statements if s.startswith("SELECT")]
+
+    def test_section_view_is_one_query(self):
+        self.complete(0)
+        self.statements.clear()
+
+        student = User(id=self.student_id, role=Role.STUDENT)
+        info = section_crud.information_about_section(
+            self.db, self.section_ids[1], student
+        )
+
+        self.assertEqual(info["progress"], 33)
+        self.assertEqual(len(self.statements), 1)
+
+    def test_delete_reuses_the_checked_course(self):
+        teacher = User(id=self.teacher.id, role=Role.TEACHER)
+        self.statements.clear()
+
+        section = section_crud.information_about_section(
+            self.db, self.section_ids[1], teacher
+        )
+        section_crud.delete_section_from_course(self.db, section, teacher)
+
+        course_lookups = [s for s in self.selects() if "FROM sections JOIN" in s]
+        self.assertEqual(len(course_lookups), 1)
+        self.assertFalse(any("FROM courses" in s for s in self.selects()))
+
+    def test_premium_section_requires_approval(self):
+        self.course.is_premium = True
+        self.db.add(
+            StudentCourse(
+                student_id=self.student_id, course_id=self.course.id, is_approved=False
+            )
+        )
+        self.db.commit()
+
+        with self.assertRaises(HTTPException):
+            section_crud.information_about_section(
+                self.db,
+                self.section_ids[0],
+                User(id=self.student_id, role=Role.STUDENT),
+            )
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import unittest
+
+from src.core.security import PasswordHasher
+from src.utils.custom_responses import ServiceUnavailable
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(rounds=4, workers=2, max_pending=2)
+
+    def tearDown(self):
+        self.hasher.executor.shutdown(wait=True)
+
+    def test_hash_and_verify(self):
+        hashed = self.hasher.hash("secret")
+        self.assertTrue(self.hasher.verify("secret", hashed))
+        self.assertFalse(self.hasher.verify("wrong", hashed))
+        self.assertEqual(self.hasher.status()["completed"], 3)
+
+    def test_async_hash_and_verify(self):
+        async def roundtrip():
+            hashed = await self.hasher.hash_async("secret")
+            return await self.hasher.verify_async("secret", hashed)
+
+        self.assertTrue(asyncio.run(roundtrip()))
+
+    def test_needs_rehash_when_cost_changes(self):
+        hashed = self.hasher.hash("secret")
+        self.assertFalse(self.hasher.needs_rehash(hashed))
+        self.hasher.rounds = 5
+        self.assertTrue(self.hasher.needs_rehash(hashed))
+        self.assertFalse(self.hasher.needs_rehash("not-a-bcrypt-hash"))
+
+    def test_rejects_when_queue_is_full(self):
+        release = threading.Event()
+        futures = [self.hasher.submit(release.wait) for _ in range(2)]
+
+        with self.assertRaises(ServiceUnavailable):
+            self.hasher.submit(release.wait)
+        self.assertEqual(self.hasher.status()["rejected"], 1)
+
+        release.set()
+        for future in futures:
+            future.result()
+        self.assertEqual(self.hasher.status()["queued"], 0)
@@ -0,0 +1,249 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.crud import section as section_crud
+from src.crud import stats
+from src.crud import student as student_crud
+from src.crud import teacher as teacher_crud
+from src.database.base import Base
+from src.models.models import (
+    Course,
+    CourseStats,
+    Role,
+    Section,
+    Student,
+    StudentCourse,
+    Teacher,
+    User,
+)
+from src.schemas.all_models import CoursesRate, SectionCreate
+
+
+class StatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+        teacher = User(email="t@example.com", password="x", role=Role.TEACHER)
+        student = User(email="s@example.com", password="x", role=Role.STUDENT)
+        self.db.add_all([teacher, student])
+        self.db.flush()
+        self.db.add_all([Teacher(id=teacher.id), Student(id=student.id)])
+        course = Course(title="Python", owner_id=teacher.id, is_premium=True)
+        self.db.add(course)
+        self.db.commit()
+        self.teacher_id, self.student_id = teacher.id, student.id
+        self.course_id = course.id
+        self.teacher = User(id=self.teacher_id, role=Role.TEACHER)
+        self.student = User(id=self.student_id, role=Role.STUDENT)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def add_section(self, title):
+        section_crud.add_section_to_course(
+            self.db, SectionCreate(title=title), self.course_id, self.teacher
+        )
+
+    def counters(self):
+        self.db.expire_all()
+        course = stats.course_stats(self.db, self.course_id)
+        teacher = stats.teacher_stats(self.db, self.teacher_id)
+        return {
+            field: (course[field], teacher[field])
+            for field in stats.STAT_FIELDS
+            if course[field] or teacher[field]
+        }
+
+    def recount(self):
+        return (
+            self.db.execute(
+                select(*stats.enrollment_totals()).where(
+                    StudentCourse.course_id == self.course_id
+                )
+            )
+            .one()
+            ._asdict()
+        )
+
+
+class TestWritePaths(StatsTestCase):
+    @patch("src.crud.student.send_email")
+    def test_counters_follow_an_enrollment(self, send_email):
+        self.add_section("Intro")
+        student_user = self.db.get(User, self.student_id)
+
+        student_crud.subscribe_to_course(self.course_id, student_user, self.db)
+        self.assertEqual(self.counters(), {"pending": (1, 1)})
+
+        teacher_crud.approve_student_by_id(self.db, self.student_id, self.course_id)
+        student_crud.toggle_favorite_course(self.course_id, student_user, self.db)
+        self.assertEqual(self.counters(), {"enrolled": (1, 1), "favorited": (1, 1)})
+
+        section_id = self.db.query(Section.id).scalar()
+        section_crud.mark_as_completed(self.db, section_id, self.student)
+        student_crud.rate_course(
+            self.db, self.course_id, CoursesRate(score=4), student_user
+        )
+        self.assertEqual(
+            self.counters(),
+            {
+                "enrolled": (1, 1),
+                "favorited": (1, 1),
+                "completed": (1, 1),
+                "progress_sum": (100, 100),
+                "rating_count": (1, 1),
+                "rating_sum": (4.0, 4.0),
+            },
+        )
+        self.assertEqual(
+            stats.course_stats(self.db, self.course_id)["average_score"], 4.0
+        )
+
+        student_crud.unsubscribe_from_course(self.student_id, self.course_id, self.db)
+        self.assertEqual(self.counters(), {})
+
+    def test_new_sections_recount_progress(self):
+        self.db.get(Course, self.course_id).is_premium = False
+        self.db.commit()
+        self.add_section("Intro")
+        section_id = self.db.query(Section.id).scalar()
+        section_crud.mark_as_completed(self.db, section_id, self.student)
+        self.assertEqual(self.counters()["completed"], (1, 1))
+
+        self.add_section("More")
+
+        self.assertEqual(
+            self.counters(), {"enrolled": (1, 1), "progress_sum": (50, 50)}
+        )
+
+    def test_racing_completions_keep_counters_exact(self):
+        self.add_section("A")
+        self.add_section("B")
+        first, second = self.db.query(Section.id).order_by(Section.position)
+        self.db.add(
+            StudentCourse(
+                student_id=self.student_id, course_id=self.course_id, is_approved=True
+            )
+        )
+        self.db.commit()
+        stats.rebuild_stats(self.db)
+
+        # This session reads the enrollment at 0% before the other request
+        # completes a section and commits.
+        stale = self.db.query(StudentCourse).one()
+        other = sessionmaker(bind=self.engine)()
+        self.addCleanup(other.close)
+        section_crud.mark_as_completed(other, second.id, self.student)
+        self.assertEqual(stale.progress, 0)
+        result = section_crud.mark_as_completed(self.db, first.id, self.student)
+
+        self.assertEqual(result, {"progress": 100})
+        stored = stats.stored_counters(self.db, self.course_id)
+        self.assertEqual(stored, self.recount())
+        stats.rebuild_stats(self.db)
+        self.assertEqual(stats.stored_counters(self.db, self.course_id), stored)
+
+    def test_pending_progress_counts_once_approved(self):
+        self.db.add(
+            StudentCourse(
+                student_id=self.student_id,
+                course_id=self.course_id,
+                is_approved=False,
+                progress=100,
+            )
+        )
+        self.db.commit()
+        stats.rebuild_stats(self.db)
+        self.assertEqual(self.counters(), {"pending": (1, 1)})
+        self.assertEqual(
+            stats.course_stats(self.db, self.course_id)["average_progress"], 0.0
+        )
+
+        teacher_crud.approve_student_by_id(self.db, self.student_id, self.course_id)
+
+        expected = {"enrolled": (1, 1), "completed": (1, 1), "progress_sum": (100, 100)}
+        self.assertEqual(self.counters(), expected)
+        self.assertEqual(
+            {field: value for field, value in self.recount().items() if value},
+            {field: course for field, (course, _) in expected.items()},
+        )
+
+    def test_dropped_course_leaves_the_teacher_counters(self):
+        self.db.add(
+            StudentCourse(
+                student_id=self.student_id, course_id=self.course_id, is_approved=True
+            )
+        )
+        self.db.commit()
+        stats.rebuild_stats(self.db)
+
+        stats.drop_course_stats(self.db, self.course_id)
+        self.db.commit()
+
+        self.assertEqual(self.counters(), {})
+        self.assertEqual(self.db.query(CourseStats).count(), 0)
+
+
+class TestRebuildStats(StatsTestCase):
+    def test_rebuild_repairs_drift(self):
+        self.db.add(
+            StudentCourse(
+                student_id=self.student_id,
+                course_id=self.course_id,
+                is_approved=True,
+                is_favorite=True,
+                progress=100,
+                score=3.5,
+            )
+        )
+        self.db.add(CourseStats(course_id=self.course_id, enrolled=7, pending=2))
+        self.db.commit()
+
+        result = stats.rebuild_stats(self.db)
+
+        self.assertEqual(result, {"courses": 1})
+        recount = self.recount()
+        self.db.expire_all()
+        row = self.db.query(CourseStats).one()
+        self.assertEqual(
+            {field: getattr(row, field) for field in stats.STAT_FIELDS}, recount
+        )
+        self.assertEqual(recount["pending"], 0)
+        self.assertEqual(recount["completed"], 1)
+
+    def test_teacher_counters_sum_their_courses(self):
+        other = Course(title="SQL", owner_id=self.teacher_id)
+        self.db.add(other)
+        self.db.flush()
+        for course_id, progress in ((self.course_id, 40), (other.id, 80)):
+            self.db.add(
+                StudentCourse(
+                    student_id=self.student_id,
+                    course_id=course_id,
+                    is_approved=True,
+                    progress=progress,
+                )
+            )
+        self.db.commit()
+        stats.rebuild_stats(self.db)
+
+        overview = stats.teachers_overview(self.db)
+
+        self.assertEqual(len(overview), 1)
+        self.assertEqual(overview[0]["teacher_id"], self.teacher_id)
+        self.assertEqual(overview[0]["enrolled"], 2)
+        self.assertEqual(overview[0]["average_progress"], 60.0)
+        own = stats.teacher_stats(self.db, self.teacher_id)
+        del overview[0]["first_name"], overview[0]["last_name"]
+        self.assertEqual(own, overview[0])
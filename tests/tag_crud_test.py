@@ -0,0 +1,209 @@
+import json
+import unittest
+from unittest.mock import patch
+from uuid import uuid4
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.crud import course as course_crud
+from src.crud import tag as tag_crud
+from src.database.base import Base
+from src.models.models import Course, CourseTag, Role, Tag, Teacher, User
+from src.schemas.all_models import CourseTagAssignment
+from src.utils.json_stream import iter_json_object
+from src.utils.pagination import encode_cursor
+
+
+class TagCrudTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        teacher = User(email="t@example.com", password="x", role=Role.TEACHER)
+        self.db.add(teacher)
+        self.db.flush()
+        self.db.add(Teacher(id=teacher.id))
+        self.courses = [
+            Course(title=f"Course {i}", owner_id=teacher.id) for i in range(3)
+        ]
+        self.tags = {name: Tag(name=name) for name in ("web", "data", "python")}
+        self.db.add_all([*self.courses, *self.tags.values()])
+        self.db.flush()
+        self.teacher_id = teacher.id
+
+        self.queries = 0
+
+        @event.listens_for(self.engine, "before_cursor_execute")
+        def count(*args):
+            self.queries += 1
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def link(self, course, *names):
+        for name in names:
+            self.db.add(CourseTag(course_id=course.id, tag_id=self.tags[name].id))
+        self.db.flush()
+
+
+class TestTagMap(TagCrudTestCase):
+    def setUp(self):
+        super().setUp()
+        self.link(self.courses[0], "python", "data")
+        self.link(self.courses[1], "web")
+
+    def test_map_is_one_query(self):
+        self.queries = 0
+        result = tag_crud.return_all_tags(self.db)
+
+        self.assertEqual(self.queries, 1)
+        self.assertEqual(
+            result,
+            {
+                str(self.courses[0].id): ["data", "python"],
+                str(self.courses[1].id): ["web"],
+            },
+        )
+
+    def test_filter_by_course_ids(self):
+        result = tag_crud.return_all_tags(self.db, course_ids=[self.courses[1].id])
+        self.assertEqual(result, {str(self.courses[1].id): ["web"]})
+
+    def test_streamed_map_is_valid_json(self):
+        self.queries = 0
+        rows = tag_crud.tag_map_rows(self.db, batch_size=1)
+        self.assertEqual(self.queries, 0)
+        body = b"".join(iter_json_object(rows, batch_size=1))
+
+        self.assertEqual(json.loads(body), tag_crud.return_all_tags(self.db))
+        self.assertEqual(b"".join(iter_json_object([])), b"{}")
+
+
+class TestCoursesByTags(TagCrudTestCase):
+    def setUp(self):
+        super().setUp()
+        self.link(self.courses[0], "python", "data")
+        self.link(self.courses[1], "python")
+        self.link(self.courses[2], "data", "web")
+        self.ids = [self.tags["python"].id, self.tags["data"].id]
+
+    def titles(self, courses):
+        return [course["title"] for course in courses]
+
+    def test_any_tag(self):
+        result = course_crud.get_courses_by_tags(self.db, self.ids)
+        self.assertEqual(self.titles(result), ["Course 0", "Course 1", "Course 2"])
+
+    def test_all_tags(self):
+        result = course_crud.get_courses_by_tags(self.db, self.ids, match_all=True)
+        self.assertEqual(self.titles(result), ["Course 0"])
+
+    def test_paginates(self):
+        first = course_crud.get_courses_by_tags(self.db, self.ids, limit=2)
+        cursor = encode_cursor(first[-1]["title"], first[-1]["id"])
+        rest = course_crud.get_courses_by_tags(self.db, self.ids, cursor=cursor)
+
+        self.assertEqual(
+            self.titles(first + rest), ["Course 0", "Course 1", "Course 2"]
+        )
+
+    def test_students_see_entitled_courses_in_constant_queries(self):
+        self.courses[1].is_premium = True
+        student = User(email="s@example.com", password="x", role=Role.STUDENT)
+        self.db.add(student)
+        self.db.flush()
+
+        self.queries = 0
+        result = course_crud.get_courses_by_tags(self.db, self.ids, student)
+
+        self.assertEqual(self.titles(result), ["Course 0", "Course 2"])
+        self.assertEqual(self.queries, 2)
+
+    def test_unknown_tag(self):
+        with self.assertRaises(HTTPException):
+            course_crud.get_courses_by_tags(self.db, [uuid4()])
+
+    def test_search_course_by_tag(self):
+        self.queries = 0
+        result = tag_crud.search_course_by_tag(self.db, "pyth")
+
+        self.assertEqual(self.titles(result), ["Course 0", "Course 1"])
+        self.assertEqual(self.queries, 2)
+
+    def test_search_course_by_tag_skips_hidden_and_paginates(self):
+        self.courses[0].is_hidden = True
+        self.link(self.courses[2], "python")
+        teacher = self.db.get(User, self.teacher_id)
+
+        self.assertEqual(
+            self.titles(tag_crud.search_course_by_tag(self.db, "python")),
+            ["Course 1", "Course 2"],
+        )
+        first = tag_crud.search_course_by_tag(self.db, "python", teacher, limit=2)
+        cursor = encode_cursor(first[-1]["title"], first[-1]["id"])
+        rest = tag_crud.search_course_by_tag(self.db, "python", teacher, cursor=cursor)
+        self.assertEqual(
+            self.titles(first + rest), ["Course 0", "Course 1", "Course 2"]
+        )
+
+
+class TestAssignTagsBulk(TagCrudTestCase):
+    def assign(self, *items):
+        return tag_crud.assign_tags_bulk(
+            self.db,
+            [CourseTagAssignment(course_id=c, tags=tags) for c, tags in items],
+        )
+
+    def test_creates_missing_tags_and_skips_existing_links(self):
+        self.link(self.courses[0], "python")
+        with patch.object(tag_crud, "BULK_BATCH_SIZE", 2):
+            result = self.assign(
+                (self.courses[0].id, ["python", " sql ", ""]),
+                (self.courses[1].id, ["sql", "rust", "go"]),
+            )
+
+        self.assertEqual(result["links_created"], 4)
+        self.assertEqual(
+            [item["added"] for item in result["results"]],
+            [["sql"], ["go", "rust", "sql"]],
+        )
+        self.assertEqual(
+            tag_crud.return_all_tags(self.db)[str(self.courses[1].id)],
+            ["go", "rust", "sql"],
+        )
+        self.assertEqual(self.db.query(Tag).count(), 6)
+
+    def test_tag_names_must_fit_the_column(self):
+        course_id = self.courses[0].id
+        padded = CourseTagAssignment(course_id=course_id, tags=[" " + "x" * 100])
+        self.assertEqual(padded.tags, ["x" * 100])
+
+        with self.assertRaises(ValidationError):
+            CourseTagAssignment(course_id=course_id, tags=["x" * 101])
+        with self.assertRaises(ValidationError):
+            CourseTagAssignment(course_id=course_id, tags=["t"] * 51)
+
+    def test_reports_unknown_courses(self):
+        missing = uuid4()
+        result = self.assign((missing, ["python"]), (self.courses[0].id, ["web"]))
+
+        self.assertEqual(
+            result["results"][0], {"course_id": missing, "error": "Course not found"}
+        )
+        self.assertEqual(result["links_created"], 1)
+
+    def test_bulk_insert_refreshes_search_index(self):
+        self.db.commit()
+        with patch("src.crud.search.invalidate_search_index") as invalidate:
+            self.assign((self.courses[0].id, ["python"]))
+        invalidate.assert_called_once()